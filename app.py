@@ -1,16 +1,25 @@
 import tkinter as tk
 import sys
 import os
+import threading
 from tkinter import messagebox, filedialog
 
 # Import the UI
 from ui_layout import AutoClickerUI
 
 # Import Core modules
-from core.settings import load_locations, save_locations
+from core import startup, humanize
+from core.settings import load_settings
+from core.autosave import WriteBehindSaver
+from core.uiqueue import UIQueue
+from core.metrics import MetricsExporter
+from core.tracing import format_summary
+from core.journal import JournaledProfile, ensure_step_ids
+from core.store import LocationStore
+from core.backends import BACKENDS, DEFAULT_BACKEND
 from core.groups import init_groups, create_new_group, assign_to_group, get_all_groups
-from core.recorder import setup_recorder, start_recording
-from core.clicker import start_sequence_clicking, start_rapid_clicking, stop_clicking 
+from core.recorder import setup_recorder, start_recording, stop_recording
+from core.clicker import start_sequence_clicking, start_rapid_clicking, stop_clicking, get_rapid_stats, get_replay_stats, pause_clicking, resume_clicking, is_paused, active_runs, set_tracing, write_trace, publish_run_changes, _ENGINE_MODES
 
 if getattr(sys, 'frozen', False):
     # Running as an executable
@@ -21,6 +30,13 @@ else:
 
 _DATA_DIR = os.path.join(_APP_DIR, "Data")
 
+# How often the UI checks whether the background runs have finished
+RUN_WATCH_MS = 250
+
+# Settings that running runs follow when they're changed mid-run (see core.runconfig)
+LIVE_SETTING_VARS = ("cps", "interval", "repetitions", "infinite", "jitter_enabled", "jitter_range",
+                     "mouse_move_duration", "move_curve")
+
 class AutoClickerApp:
     def __init__(self, root):
         self.root = root
@@ -37,6 +53,7 @@ class AutoClickerApp:
             "toggle_recording": self.toggle_recording,
             "start_clicking": self.start_clicking,
             "stop_clicking": self.stop_clicking,
+            "toggle_pause": self.toggle_pause,
             "add_keystroke": self.add_keystroke,
             "edit_location": self.edit_location,
             "delete_location": self.delete_location,
@@ -47,23 +64,82 @@ class AutoClickerApp:
         })
         
         # 3. Init Core features
-        self.init_core_features()
+        # Listener threads hand work to the Tk thread through this queue, drained in batches
+        self.ui_queue = UIQueue()
+        self.ui_queue.start(self.root.after)
+        self.saver = WriteBehindSaver(self._snapshot_locations, after=self.root.after,
+                                      after_cancel=self.root.after_cancel, write=self._write_profile)
+        self.metrics_exporter = None
+        if self.metrics_interval > 0:
+            self.metrics_exporter = MetricsExporter(os.path.join(_DATA_DIR, "metrics.json"),
+                                                    os.path.join(_DATA_DIR, "metrics.prom"),
+                                                    self.metrics_interval).start()
+        startup.mark("ui built")
         
-        # 4. Load Data & Ensure save on exit
-        self.load_data()
+        # 4. Load Data in the background & Ensure save on exit. Listeners (pynput) are
+        # set up once the window has painted, so their import doesn't delay it.
+        self.on_startup_done = None # Called once the window is up and the Grimoire loaded
+        self._pending_startup = {"paint", "load"}
+        self._load_generation = 0
+        self._loading = False
+        self._edited_while_loading = False
+        self.load_data(on_done=lambda ok: self._startup_step("load"))
+        self.root.after_idle(self._on_first_paint)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    def _on_first_paint(self):
+        self.root.update_idletasks()
+        startup.mark("first paint")
+        self.init_core_features()
+        startup.mark("listeners ready")
+        humanize.warm_up()
+        self._startup_step("paint")
+
+    def _startup_step(self, step):
+        self._pending_startup.discard(step)
+        if not self._pending_startup and self.on_startup_done:
+            self.on_startup_done()
+
     def init_state(self):
         """Consolidates all app variables into a clean state object."""
         if not os.path.exists(_DATA_DIR):
             os.makedirs(_DATA_DIR)
         
         self.current_profile_path = os.path.join(_DATA_DIR, "click_locations.json")
+        self.profile = JournaledProfile(self.current_profile_path)
+        
+        # Journaled saving appends each edit to <profile>.journal instead of rewriting the file
+        app_settings = load_settings(os.path.join(_DATA_DIR, "app_settings.json"))
+        self.journaled = bool(app_settings.get("journaled_profiles", False))
+        # Streamed playback reads steps from the saved file as it goes (see core.stream)
+        self.streaming = bool(app_settings.get("stream_playback", False))
+        # Periodic export of the engine metrics (see core.metrics), for watching long runs
+        self.metrics_interval = float(app_settings.get("metrics_interval", 0) or 0)
+        # Span tracing of sequences, written as a Chrome trace when they end (see core.tracing)
+        self.tracing = bool(app_settings.get("trace_playback", False))
+        set_tracing(self.tracing)
+        # Rapid fire above 100 CPS sends its clicks in bursts this far apart (see core.engine.burst_plan)
+        self.burst_spacing = float(app_settings.get("burst_spacing", 0.001))
+        # Random delays and offsets come from this humanization profile (see core.humanize)
+        humanize_profile = app_settings.get("humanize_profile", "classic")
+        humanize_seed = app_settings.get("humanize_seed")
+        # Playback engine: a thread per run, or every run on one asyncio loop (see core.async_engine)
+        engine_mode = app_settings.get("engine_mode", "threads")
+        if engine_mode not in _ENGINE_MODES:
+            print(f"Unknown engine_mode '{engine_mode}' in settings, using threads")
+            engine_mode = "threads"
+        # How clicks reach the OS (see core.backends); the input library itself loads on first Start
+        input_backend = app_settings.get("input_backend", DEFAULT_BACKEND)
+        if input_backend not in BACKENDS:
+            print(f"Unknown input_backend '{input_backend}' in settings, using {DEFAULT_BACKEND}")
+            input_backend = DEFAULT_BACKEND
         
         self.state = {
-            "saved_locations": [],
+            "saved_locations": LocationStore(), # Indexed by id, name and group (see core.store)
             "location_counter": 1,
+            "next_step_id": 1, # Stable ids for journal ops (see core.journal)
             "is_recording": False,
+            "continuous_record": tk.BooleanVar(value=False), # Record a whole macro instead of one point
             "is_clicking": False,
             
             # --- Operating Modes ---
@@ -75,20 +151,33 @@ class AutoClickerApp:
             "repetitions": tk.IntVar(value=1),
             "infinite": tk.BooleanVar(value=False),
             "group_filter": tk.StringVar(value="All Groups"),
+            "parallel_groups": tk.BooleanVar(value=False), # One independent run per group
+            "replay_timing": tk.BooleanVar(value=False), # Use recorded timestamps instead of the cooldown
+            "replay_speed": tk.DoubleVar(value=1.0),
+            "compress_idle": tk.BooleanVar(value=False),
+            "max_idle_gap": tk.DoubleVar(value=2.0), # Longest recorded pause kept when compressing (s)
             
             # --- Stealth & System ---
             "jitter_enabled": tk.BooleanVar(value=False),
             "jitter_range": tk.IntVar(value=3),
             "always_on_top": tk.BooleanVar(value=False),
             "mouse_move_duration": tk.DoubleVar(value=0.5),
+            "move_curve": tk.StringVar(value="linear"), # See core.trajectory.CURVES
             
             "status_msg": tk.StringVar(value="Ready."),
-            "hotkeys": {"start": "F7", "stop": "F8", "record": "F6"},
+            "hotkeys": {"start": "F7", "stop": "F8", "record": "F6", "pause": "F9"},
+            "input_backend": input_backend, # See core.backends.BACKENDS
+            "engine_mode": engine_mode, # "threads" (one per run) or "asyncio" (one shared loop)
+            "humanize_profile": humanize_profile,
+            "humanize_seed": humanize_seed, # None: different every run
             "is_rebinding": None
         }
         
         # Trace 'always on top' to auto-apply when changed
         self.state["always_on_top"].trace_add("write", self._apply_window_rules)
+        # ...and hand run settings edited mid-run to the runs, which apply them between steps
+        for name in LIVE_SETTING_VARS:
+            self.state[name].trace_add("write", self._publish_run_changes)
 
     def init_core_features(self):
         """Sets up headless core logic."""
@@ -102,51 +191,120 @@ class AutoClickerApp:
 
     # --- File & Data Management ---
 
-    def load_data(self):
-        """Loads data with proper error handling."""
-        try:
-            self.state["saved_locations"] = load_locations(self.current_profile_path)
+    def load_data(self, on_done=None):
+        """Loads the current profile on a worker thread; the Grimoire fills in when it's read.
+
+        Steps added before the load finishes are kept, after the loaded ones.
+        on_done(ok) runs on the Tk thread afterwards.
+        """
+        self._load_generation += 1
+        generation = self._load_generation
+        self._loading = True
+        self.profile = profile = JournaledProfile(self.current_profile_path)
+        if self.state["saved_locations"]: # Opening another profile
+            self.state["saved_locations"] = LocationStore()
+            self.ui.refresh_location_list()
+        self.state["status_msg"].set("Opening Grimoire...")
+
+        def work():
+            try:
+                locations = profile.load() # Replays any journal left next to the file
+                next_id, assigned = ensure_step_ids(locations)
+                # New ids must reach the base before any op refers to them; a leftover
+                # journal is folded in when journaling is off
+                if assigned or (profile.pending_ops and not self.journaled):
+                    profile.compact([dict(loc) for loc in locations])
+                result = (locations, next_id, None)
+            except Exception as e:
+                result = (None, None, e)
+            self.ui_queue.post(self._install_loaded, generation, *result, on_done)
+
+        threading.Thread(target=work, name="profile-load", daemon=True).start()
+
+    def _install_loaded(self, generation, locations, next_id, error, on_done):
+        """Tk-thread half of load_data."""
+        if generation != self._load_generation:
+            return # A newer load replaced this one
+        self._loading = False
+        if error is not None:
+            self.state["status_msg"].set("Ready.")
+            messagebox.showerror("Load Error", f"Failed to read Grimoire:\n{error}")
+        else:
+            early = list(self.state["saved_locations"]) # Added while the file was loading
+            for loc in early:
+                loc["id"] = next_id
+                next_id += 1
+            self.state["next_step_id"] = next_id
+            self.state["saved_locations"] = LocationStore(locations + early)
             self._update_counter_from_data()
             self.ui.refresh_groups_dropdown()
             self.ui.refresh_location_list()
-        except Exception as e:
-            messagebox.showerror("Load Error", f"Failed to read Grimoire:\n{e}")
+            self.state["status_msg"].set("Ready.")
+            if early or self._edited_while_loading:
+                self.auto_save()
+        self._edited_while_loading = False
+        startup.mark("profile loaded")
+        if on_done:
+            on_done(error is None)
 
     def auto_save(self, *args):
-        """Silently saves the current state."""
+        """Queues a silent background save; bursts of edits collapse into one write."""
+        if self._loading: # Saved along with the loaded steps once the file is in
+            self._edited_while_loading = True
+            return
+        self.saver.mark_dirty(self.current_profile_path)
+
+    def commit_change(self, op):
+        """Persists one Grimoire edit (see core.journal for the op format)."""
+        if not self.journaled or self._loading:
+            self.auto_save()
+            return
         try:
-            save_locations(self.state["saved_locations"], self.current_profile_path)
-        except Exception as e:
-            print(f"Auto-save failed: {e}")
+            self.profile.append(op)
+        except OSError as e:
+            print(f"Journal append failed, saving in full: {e}")
+            self.auto_save()
+            return
+        if self.profile.needs_compaction:
+            self.auto_save() # The background write folds the journal into the base
 
     def save_profile_as(self):
         """Explicitly save to a new file."""
         path = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("Grimoire Scrolls", "*.json")],
+            filetypes=[("Grimoire Scrolls", "*.json"), ("Compact Grimoire", "*.btcg")],
             initialdir=_DATA_DIR,
             title="Scribe New Grimoire"
         )
         if path:
+            self.saver.flush() # Anything pending belongs to the old file
             self.current_profile_path = path
+            self.profile = JournaledProfile(path)
             self.auto_save()
+            self.saver.flush()
             messagebox.showinfo("Saved", f"Grimoire scribed to:\n{os.path.basename(path)}")
             
     def load_profile(self):
         """Explicitly load a new file."""
         path = filedialog.askopenfilename(
-            filetypes=[("Grimoire Scrolls", "*.json")],
+            filetypes=[("Grimoire Scrolls", "*.json"), ("Compact Grimoire", "*.btcg")],
             initialdir=_DATA_DIR,
             title="Open Grimoire"
         )
         if path:
+            self.saver.flush() # Anything pending belongs to the old file
             self.current_profile_path = path
-            self.load_data()
-            messagebox.showinfo("Loaded", f"Opened Grimoire:\n{os.path.basename(path)}")
+            name = os.path.basename(path)
+            self.load_data(on_done=lambda ok: ok and messagebox.showinfo("Loaded", f"Opened Grimoire:\n{name}"))
 
-    def on_closing(self):
-        """Ensures final state is saved before exit."""
-        self.auto_save()
+    def on_closing(self, save=True):
+        """Ensures final state is saved before exit (`save` False: exit without writing anything new)."""
+        if save:
+            self.auto_save()
+        self.saver.close()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        self.ui_queue.stop()
         self.root.destroy()
 
     # --- Actions & Logic ---
@@ -158,12 +316,24 @@ class AutoClickerApp:
         self.ui.update_playback_buttons(clicking=True)
         
         # Route based on the new mode toggle
+        backend = self.state["input_backend"]
         if self.state["operating_mode"].get() == "rapid":
-            start_rapid_clicking(self.state["cps"])
-            self.state["status_msg"].set(f"Rapid Fire: {self.state['cps'].get()} CPS")
+            started = start_rapid_clicking(self.state["cps"], backend, self.state["engine_mode"], self.burst_spacing,
+                                           self.state["humanize_profile"], self.state["humanize_seed"])
+            status = f"Rapid Fire: {self.state['cps'].get()} CPS"
         else:
-            start_sequence_clicking(self.state)
-            self.state["status_msg"].set("Executing Sequence...")
+            self.state["stream_source"] = self._sync_profile_file() if self.streaming else None
+            started = start_sequence_clicking(self.state, backend)
+            status = "Executing Sequence..."
+            
+        if not started:
+            self.state["is_clicking"] = False
+            self.ui.update_playback_buttons(clicking=False)
+            return
+        if isinstance(started, list) and len(started) > 1:
+            status = f"Executing {len(started)} Guild Sequences..."
+        self.state["status_msg"].set(status)
+        self.root.after(RUN_WATCH_MS, self._watch_runs)
 
     def stop_clicking(self):
         if not self.state["is_clicking"]: return
@@ -171,13 +341,45 @@ class AutoClickerApp:
         self.state["is_clicking"] = False
         stop_clicking() # Halts whichever core process is running
         self.ui.update_playback_buttons(clicking=False)
-        self.state["status_msg"].set("Stopped.")
+        self.ui.update_pause_button(paused=False)
+        
+        stats = get_rapid_stats() if self.state["operating_mode"].get() == "rapid" else None
+        if stats and stats["ticks"]:
+            burst = f" in bursts of {stats['batch']}" if stats["batch"] > 1 else ""
+            self.state["status_msg"].set(
+                f"Stopped. {stats['achieved_cps']:.1f}/{stats['target_cps']:.1f} CPS{burst}, "
+                f"late avg {stats['late_mean_ms']:.2f} ms, p99 {stats['late_p99_ms']:.2f} ms")
+        else:
+            self.state["status_msg"].set("Stopped.")
+        self._save_trace()
+
+    def on_hotkey_stop(self, halt_ms=None):
+        """Reconciles the UI after the Stop hotkey halted the runs from the listener thread."""
+        if not self.state["is_clicking"]:
+            if halt_ms is not None: # _watch_runs already reset the controls
+                self.state["status_msg"].set(f"Stopped {halt_ms:.1f} ms after the hotkey.")
+            return
+        self.stop_clicking()
+        if halt_ms is not None:
+            self.state["status_msg"].set(f"{self.state['status_msg'].get()} Halted {halt_ms:.1f} ms after the hotkey.")
+
+    def toggle_pause(self):
+        if not self.state["is_clicking"]: return
+        
+        if is_paused():
+            resume_clicking()
+            self.ui.update_pause_button(paused=False)
+            self.state["status_msg"].set("Resumed.")
+        else:
+            pause_clicking()
+            self.ui.update_pause_button(paused=True)
+            self.state["status_msg"].set("Paused. The ritual will resume where it left off.")
 
     def toggle_recording(self):
         if self.state["is_recording"]:
             self.state["is_recording"] = False
             self.ui.update_record_button(recording=False)
-            self.state["status_msg"].set("Recording stopped.")
+            stop_recording(self)
         else:
             self.state["is_recording"] = True
             self.ui.update_record_button(recording=True)
@@ -188,57 +390,131 @@ class AutoClickerApp:
     def create_group(self, group_name):
         """Passes group creation to core logic and triggers saves."""
         if create_new_group(self.state, group_name):
-            self.auto_save()
+            # Empty groups live in memory only, so there's nothing to persist yet
             self.ui.refresh_groups_dropdown() 
             return True
         return False
 
-    def assign_to_group(self, location_names, group_name):
+    def assign_to_group(self, step_ids, group_name):
         """Assigns selected scrolls to a group."""
-        count = assign_to_group(self.state, location_names, group_name)
+        count = assign_to_group(self.state, step_ids, group_name)
         if count > 0:
-            self.auto_save()
+            self.commit_change({"op": "group", "ids": list(step_ids), "group": group_name})
             self.ui.refresh_location_list()
         return count
 
-    def edit_location(self, item_id, location_name):
+    def edit_location(self, step_id):
         """Controller logic for editing. Asks UI to open the window, providing a save callback."""
-        target = next((x for x in self.state["saved_locations"] if x["name"] == location_name), None)
+        store = self.state["saved_locations"]
+        target = store.get(step_id)
         if not target: return
 
         def on_save_edit(updated_data):
-            target.update(updated_data)
-            self.auto_save()
+            store.update(target["id"], updated_data)
+            self.commit_change({"op": "update", "id": target["id"], "fields": updated_data})
             self.ui.refresh_location_list()
             
         self.ui.open_editor_window(target, on_save_edit)
 
-    def delete_location(self, location_names):
-        self.state["saved_locations"] = [x for x in self.state["saved_locations"] if x["name"] not in location_names]
-        self.auto_save()
+    def delete_location(self, step_ids):
+        store = self.state["saved_locations"]
+        ids = [i for i in step_ids if i in store]
+        store.remove(ids)
+        self.commit_change({"op": "delete", "ids": ids})
         self.ui.refresh_location_list()
 
     def clear_all_locations(self):
         if messagebox.askyesno("Confirm", "Clear all locations?"):
-            self.state["saved_locations"] = []
-            self.auto_save()
+            self.state["saved_locations"].clear()
+            self.commit_change({"op": "clear"})
             self.ui.refresh_location_list()
 
     def add_keystroke(self, key_string):
         """Called by the UI when a user enters a keystroke."""
         grp = self.state["group_filter"].get()
-        self.state["saved_locations"].append({
+        step = {
+            "id": self.next_step_id(),
             "name": f"Keystroke {self.state['location_counter']}",
             "action_type": "keystroke",
             "key": key_string,
             "group": grp if grp != "All Groups" else ""
-        })
+        }
+        self.state["saved_locations"].add(step)
         self.state["location_counter"] += 1
-        self.auto_save()
+        self.commit_change({"op": "add", "step": step})
         self.ui.refresh_location_list()
 
     # --- Helpers ---
 
+    def next_step_id(self):
+        step_id = self.state["next_step_id"]
+        self.state["next_step_id"] += 1
+        return step_id
+
+    def _watch_runs(self):
+        """Resets the controls once every run has finished on its own."""
+        if not self.state["is_clicking"]: return
+        if active_runs():
+            self.root.after(RUN_WATCH_MS, self._watch_runs)
+            return
+        self.state["is_clicking"] = False
+        self.ui.update_playback_buttons(clicking=False)
+        self.ui.update_pause_button(paused=False)
+        replay = get_replay_stats()
+        if replay and self.state["operating_mode"].get() == "sequence":
+            self.state["status_msg"].set(f"Ritual complete. {replay['speed']:g}x replay, "
+                                         f"behind the recording by {replay['late_max_ms']:.0f} ms at worst.")
+        else:
+            self.state["status_msg"].set("Ritual complete.")
+        self._save_trace()
+
+    def _save_trace(self):
+        """Writes the finished sequence's trace in the background (trace_playback setting)."""
+        if not self.tracing or self.state["operating_mode"].get() != "sequence":
+            return
+        path = os.path.join(_DATA_DIR, "playback_trace.json")
+
+        def work():
+            try:
+                summary = write_trace(path)
+            except OSError as e:
+                print(f"Trace write failed: {e}")
+                return
+            if summary:
+                print(format_summary(summary))
+                self.ui_queue.post(self.state["status_msg"].set, f"Playback trace written to {os.path.basename(path)}.", key="status")
+
+        threading.Thread(target=work, name="trace-write", daemon=True).start()
+
+    def _snapshot_locations(self):
+        """Copy of the Grimoire for the background writer (taken on the Tk thread),
+        with the journal position it reflects."""
+        return [dict(loc) for loc in self.state["saved_locations"]], self.profile.seq
+
+    def _sync_profile_file(self):
+        """Makes the profile file on disk match the Grimoire, for playback to stream from."""
+        self.saver.flush()
+        if self.profile.pending_ops: # Journaled edits aren't in the base file yet
+            self.profile.compact(*self._snapshot_locations())
+        return self.current_profile_path
+
+    def _write_profile(self, snapshot, path):
+        """Background writer: full atomic save, which also compacts the journal."""
+        locations, seq = snapshot
+        profile = self.profile
+        if profile.path != path:
+            profile, seq = JournaledProfile(path), None
+        profile.compact(locations, seq)
+
+    def _publish_run_changes(self, *args):
+        if not self.state["is_clicking"]: return
+        try:
+            versions = publish_run_changes(self.state)
+        except tk.TclError:
+            return # A spinbox mid-edit (e.g. emptied); its next valid value goes through
+        if "rapid" in versions:
+            self.state["status_msg"].set(f"Rapid Fire: {self.state['cps'].get()} CPS")
+
     def _apply_window_rules(self, *args):
         self.root.attributes("-topmost", self.state["always_on_top"].get())
         
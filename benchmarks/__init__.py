@@ -0,0 +1,4 @@
+"""
+Benchmarks for the Auto Clicker engine.
+Run from the project root, e.g. `python -m benchmarks.bench_clicker`.
+"""
@@ -0,0 +1,225 @@
+"""
+Clicker engine benchmark.
+
+Drives the hot paths of the clicker engine (core.engine) against an in-memory input backend and
+writes the results as JSON, so runs can be compared across releases:
+
+    python -m benchmarks.bench_clicker --out bench.json
+    python -m benchmarks.bench_clicker --compare bench.json
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+
+from core.engine import ClickerEngine, RunHandle, InputDispatcher, _do_click
+from core.async_engine import AsyncClickerEngine
+from core.backends import RecordingBackend
+from core.program import compile_sequence, CLICK_LEFT
+
+RATES = (1, 10, 100, 500)
+
+ENGINES = {"threads": ClickerEngine, "asyncio": AsyncClickerEngine}
+
+# Regression thresholds used by --compare
+MIN_CLICKS = 20            # runs shorter than this are too noisy to compare
+MAX_CPS_DROP = 0.05        # achieved/requested ratio may drop by 5 points
+MAX_LATENESS_GROWTH = 2.0  # p99 lateness may at most double (plus 0.5 ms slack)
+
+
+class FakeBackend(RecordingBackend):
+    """Recording backend that can also simulate the cost of a real injection call."""
+    name = "fake"
+
+    def __init__(self, call_latency=0.0):
+        super().__init__()
+        self.call_latency = call_latency
+
+    def _cost(self):
+        if self.call_latency:
+            end = time.perf_counter() + self.call_latency
+            while time.perf_counter() < end:
+                pass
+
+    def move(self, x, y):
+        self._cost()
+        super().move(x, y)
+
+    def click(self, button="left", clicks=1):
+        self._cost()
+        super().click(button, clicks)
+
+
+def _percentiles(samples, points=(50, 90, 99)):
+    if not samples:
+        return {f"p{p}": 0.0 for p in points} | {"max": 0.0}
+    s = sorted(samples)
+    out = {f"p{p}": s[min(len(s) - 1, int(len(s) * p / 100))] for p in points}
+    out["max"] = s[-1]
+    return out
+
+
+def _timed_run(engine, start, seconds):
+    """Starts a run, lets it play, then measures how long Stop takes to land."""
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    run = start()
+    time.sleep(seconds)
+    stop_at = time.perf_counter()
+    run.stop()
+    run.join()
+    stopped = time.perf_counter()
+    engine.shutdown()
+    wall = stopped - wall0
+    return run, {
+        "wall_s": wall,
+        "cpu_percent": (time.process_time() - cpu0) / wall * 100,
+        "stop_latency_ms": (stopped - stop_at) * 1000,
+    }
+
+
+def _sequence_program(steps):
+    locations = [{"name": f"Location {i}", "x": i % 1920, "y": i % 1080, "click_type": "Left", "action_type": "click"}
+                 for i in range(steps)]
+    return compile_sequence(locations)
+
+
+def bench_rapid(rate, seconds, backend, engine_cls=ClickerEngine):
+    engine = engine_cls(backend)
+    backend.clear()
+    run, result = _timed_run(engine, lambda: engine.start_rapid(rate), max(seconds, 5.0 / rate))
+    stats = run.scheduler.stats()
+    lateness = [x * 1000 for x in run.scheduler.lateness]
+    result.update({
+        "requested_cps": rate,
+        "achieved_cps": stats["achieved_cps"],
+        "clicks": backend.count("click"),
+        "missed_ticks": stats["missed"],
+        "lateness_ms": _percentiles(lateness),
+    })
+    return result
+
+
+def bench_sequence(steps, interval, seconds, backend, engine_cls=ClickerEngine):
+    engine = engine_cls(backend)
+    options = {"interval": interval, "repetitions": float("inf"), "move_duration": 0.0}
+    program = _sequence_program(steps)
+    backend.clear()
+    run, result = _timed_run(engine, lambda: engine.start_sequence(program, options), max(seconds, 5.0 * interval))
+
+    # Time between consecutive clicks beyond the configured cooldown
+    stamps = [e[0] for e in backend.events if e[1] == "click"]
+    overshoot = [max(0.0, (b - a - interval) * 1000) for a, b in zip(stamps, stamps[1:])]
+    result.update({
+        "steps": steps,
+        "interval_s": interval,
+        "actions": len(stamps),
+        "requested_aps": 1.0 / interval,
+        "achieved_aps": (len(stamps) - 1) / (stamps[-1] - stamps[0]) if len(stamps) > 1 else 0.0,
+        "step_overshoot_ms": _percentiles(overshoot),
+    })
+    return result
+
+
+def _stop_during_wait(backend, engine_cls=ClickerEngine):
+    engine = engine_cls(backend)
+    options = {"interval": 5.0, "repetitions": float("inf"), "move_duration": 0.0}
+    program = _sequence_program(1)
+    return _timed_run(engine, lambda: engine.start_sequence(program, options), 0.5)[1]
+
+
+def bench_do_click(iterations, move_duration, backend):
+    """Per-call overhead of _do_click with instant moves (engine cost only)."""
+    run = RunHandle("sequence", "bench", InputDispatcher(backend))
+    backend.clear()
+    t0, cpu0 = time.perf_counter(), time.process_time()
+    for i in range(iterations):
+        _do_click(run, i % 500, i % 300, CLICK_LEFT, 0.0, 0, move_duration)
+    wall = time.perf_counter() - t0
+    return {
+        "iterations": iterations,
+        "move_duration_s": move_duration,
+        "per_call_us": wall / iterations * 1e6,
+        "cpu_percent": (time.process_time() - cpu0) / wall * 100,
+    }
+
+
+def run_all(seconds, call_latency, engine="threads"):
+    engine_cls = ENGINES[engine]
+    backend = FakeBackend(call_latency)
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "call_latency_us": call_latency * 1e6,
+            "engine": engine,
+        },
+        "rapid": {},
+        "sequence": {},
+    }
+    for rate in RATES:
+        results["rapid"][str(rate)] = bench_rapid(rate, seconds, backend, engine_cls)
+    for rate in RATES:
+        results["sequence"][str(rate)] = bench_sequence(100, 1.0 / rate, seconds, backend, engine_cls)
+    results["do_click"] = bench_do_click(20000, 0.0, backend)
+    # A long cooldown shows how quickly Stop lands in the middle of a wait
+    results["stop_during_wait"] = _stop_during_wait(backend, engine_cls)
+    return results
+
+
+def compare(current, baseline):
+    """Returns a list of human-readable regressions against a previous results file."""
+    problems = []
+    for rate, cur in current["rapid"].items():
+        base = baseline.get("rapid", {}).get(rate)
+        if not base or base["clicks"] < MIN_CLICKS:
+            continue
+        cur_ratio = cur["achieved_cps"] / cur["requested_cps"]
+        base_ratio = base["achieved_cps"] / base["requested_cps"]
+        if cur_ratio < base_ratio - MAX_CPS_DROP:
+            problems.append(f"rapid {rate} CPS: achieved ratio {cur_ratio:.3f} < baseline {base_ratio:.3f}")
+        cur_p99, base_p99 = cur["lateness_ms"]["p99"], base["lateness_ms"]["p99"]
+        if cur_p99 > base_p99 * MAX_LATENESS_GROWTH + 0.5:
+            problems.append(f"rapid {rate} CPS: p99 lateness {cur_p99:.2f} ms vs baseline {base_p99:.2f} ms")
+    return problems
+
+
+def _print_summary(results):
+    for rate, r in results["rapid"].items():
+        print(f"rapid    {rate:>4} CPS  achieved {r['achieved_cps']:8.2f}  "
+              f"late p99 {r['lateness_ms']['p99']:6.2f} ms  stop {r['stop_latency_ms']:6.2f} ms  cpu {r['cpu_percent']:5.1f}%")
+    for rate, r in results["sequence"].items():
+        print(f"sequence {rate:>4} APS  achieved {r['achieved_aps']:8.2f}  "
+              f"over p99 {r['step_overshoot_ms']['p99']:6.2f} ms  stop {r['stop_latency_ms']:6.2f} ms  cpu {r['cpu_percent']:5.1f}%")
+    print(f"_do_click overhead: {results['do_click']['per_call_us']:.2f} us/call")
+    print(f"stop during 5s cooldown: {results['stop_during_wait']['stop_latency_ms']:.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the clicker engine against a fake input backend.")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Duration of each timed run")
+    parser.add_argument("--call-latency-us", type=float, default=0.0, help="Simulated cost of each backend call")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="threads", help="Engine to drive")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON; exit 1 on regressions")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.seconds, args.call_latency_us / 1e6, args.engine)
+    _print_summary(results)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            problems = compare(results, json.load(f))
+        for p in problems:
+            print(f"REGRESSION: {p}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+GUI startup benchmark and time-to-first-paint budget.
+
+Launches `main.py --quit-after-startup` a few times in fresh interpreters and
+checks the median time to first paint against a budget. It also checks that
+importing the app doesn't pull in the input libraries or asyncio, which
+should only load once they're used:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --budget-ms 300 --out startup.json
+
+Exits 1 when a budget is blown or a lazy import has become eager. Needs a
+display; see `python main.py --profile-startup` for a per-phase/per-import
+breakdown of a single launch. tests/test_startup.py enforces the same budgets
+under pytest (first paint only where there's a display).
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_PAINT_BUDGET_MS = 400     # Launch -> window drawn (median)
+IMPORT_BUDGET_MS = 150          # `import app` in a fresh interpreter (median)
+
+# Must not be imported until first use (see core.recorder, utils.hotkeys, core.clicker)
+LAZY_MODULES = ("pynput", "pyautogui", "pydirectinput", "asyncio", "numpy")
+
+_IMPORT_PROBE = """
+import sys, time, json
+t = time.perf_counter()
+import app
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({"import_ms": ms, "modules": sorted(sys.modules)}))
+"""
+
+
+def _last_json_line(output):
+    for line in reversed(output.splitlines()):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    raise ValueError("no JSON result in output")
+
+
+def _run(args, timeout=30):
+    proc = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, timeout=timeout)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited {proc.returncode}:\n{proc.stderr.strip()}")
+    return _last_json_line(proc.stdout)
+
+
+def bench_imports(runs):
+    samples = [_run(["-c", _IMPORT_PROBE]) for _ in range(runs)]
+    eager = sorted({m.split(".")[0] for s in samples for m in s["modules"]} & set(LAZY_MODULES))
+    return {"import_ms": median(s["import_ms"] for s in samples), "eager_modules": eager}
+
+
+def bench_launch(runs):
+    phases = [_run(["main.py", "--quit-after-startup"])["phases"] for _ in range(runs)]
+    names = [name for name in phases[0] if all(name in p for p in phases)]
+    return {name: median(p[name] for p in phases) for name in names}
+
+
+def check(results, paint_budget, import_budget):
+    problems = []
+    if results["imports"]["import_ms"] > import_budget:
+        problems.append(f"import app: {results['imports']['import_ms']:.1f} ms > {import_budget} ms")
+    for m in results["imports"]["eager_modules"]:
+        problems.append(f"{m} is imported at startup")
+    paint = results.get("phases", {}).get("first paint")
+    if paint is not None and paint > paint_budget:
+        problems.append(f"first paint: {paint:.1f} ms > {paint_budget} ms")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure GUI startup and enforce the first-paint budget.")
+    parser.add_argument("--runs", type=int, default=5, help="Launches to take the median of")
+    parser.add_argument("--budget-ms", type=float, default=FIRST_PAINT_BUDGET_MS, help="First paint budget")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS, help="`import app` budget")
+    parser.add_argument("--imports-only", action="store_true", help="Skip the launches (no display needed)")
+    parser.add_argument("--out", help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    results = {"imports": bench_imports(args.runs)}
+    print(f"import app: {results['imports']['import_ms']:.1f} ms")
+    if not args.imports_only:
+        results["phases"] = bench_launch(args.runs)
+        for name, ms in results["phases"].items():
+            print(f"{ms:8.1f} ms  {name}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    problems = check(results, args.budget_ms, args.import_budget_ms)
+    for p in problems:
+        print(f"OVER BUDGET: {p}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Headless runner: plays a Grimoire profile (or rapid fire) without any GUI.
+
+Nothing here imports tkinter, so it works from scripts, scheduled jobs and
+sessions without a display server:
+
+    python cli.py Data/click_locations.json --group Farming --repetitions 5
+    python cli.py Data/click_locations.json --infinite --interval 0.5 --jitter 3
+    python cli.py --cps 20 --duration 10
+    python cli.py macro.btcg --timing recorded --speed 2 --json
+
+Settings come from app_settings.json (default_interval, default_repetitions,
+mouse_move_duration) and are overridden by flags. Ctrl+C stops the run and
+still prints the summary.
+"""
+import time
+_T_START = time.perf_counter()
+
+import os
+import sys
+import json
+import argparse
+
+from core.settings import load_settings, load_profile, _DEFAULT_APP_SETTINGS_PATH
+from core.backends import InputBackend, BACKENDS, DEFAULT_BACKEND, create_backend
+from core.engine import ClickerEngine, DEFAULT_SEQUENCE_OPTIONS, BURST_SPACING, rapid_config
+from core.program import compile_sequence
+from core.trajectory import CURVES
+from core.timing import SPEED_RANGE
+from core.humanize import PROFILES
+
+ENGINES = ("threads", "asyncio")
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+
+class FirstActionProbe(InputBackend):
+    """Wraps a backend and stamps the moment the first input is injected."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+        self.first_action = None
+
+    def _stamp(self):
+        if self.first_action is None:
+            self.first_action = time.perf_counter()
+
+    def move(self, x, y):
+        self._stamp()
+        self.inner.move(x, y)
+
+    def click(self, button="left", clicks=1):
+        self._stamp()
+        self.inner.click(button, clicks)
+
+    def burst(self, clicks, spacing=0.0, button="left"):
+        self._stamp()
+        self.inner.burst(clicks, spacing, button)
+
+    def press(self, key):
+        self._stamp()
+        self.inner.press(key)
+
+    def mouse_down(self, button="left"):
+        self._stamp()
+        self.inner.mouse_down(button)
+
+    def mouse_up(self, button="left"):
+        self.inner.mouse_up(button)
+
+    def scroll(self, amount):
+        self._stamp()
+        self.inner.scroll(amount)
+
+    def position(self):
+        return self.inner.position()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run a Grimoire profile or rapid fire without the GUI.")
+    parser.add_argument("profile", nargs="?", help="Profile to play (.json or .btcg). Omit with --cps.")
+    parser.add_argument("--settings", default=_DEFAULT_APP_SETTINGS_PATH, help="app_settings.json to take defaults from")
+
+    seq = parser.add_argument_group("sequence")
+    seq.add_argument("--group", default="All Groups", help="Only play this group")
+    seq.add_argument("--interval", type=float, help="Cooldown between steps (s)")
+    seq.add_argument("--repetitions", type=int, help="Times to play the sequence")
+    seq.add_argument("--infinite", action="store_true", help="Repeat until stopped (Eternal Chant)")
+    seq.add_argument("--random-delay", action="store_true", help="Add ±0.5s to every cooldown")
+    seq.add_argument("--jitter", type=int, default=0, help="Spirit Jitter radius in pixels")
+    seq.add_argument("--move-duration", type=float, help="Mouse glide time per step (s)")
+    seq.add_argument("--curve", choices=CURVES, default="linear", help="Mouse path shape")
+    seq.add_argument("--timing", choices=("interval", "recorded"), default="interval",
+                     help="'recorded' replays the steps' own timestamps")
+    seq.add_argument("--speed", type=float, default=1.0,
+                     help=f"Recorded timing speed ({SPEED_RANGE[0]:g}x-{SPEED_RANGE[1]:g}x)")
+    seq.add_argument("--max-gap", type=float, help="Recorded timing: cut idle gaps to this (s)")
+    seq.add_argument("--stream", action="store_true", help="Read steps from the file as playback goes")
+
+    rapid = parser.add_argument_group("rapid fire")
+    rapid.add_argument("--cps", type=float, help="Rapid fire at this many clicks/second instead of a profile")
+    rapid.add_argument("--burst", type=int,
+                       help="Clicks sent per scheduler tick (1 = single clicks); default picks by CPS")
+    rapid.add_argument("--burst-spacing", type=float, help="Gap between the clicks of a burst (s)")
+    rapid.add_argument("--duration", type=float, help="Stop after this many seconds (any mode)")
+
+    parser.add_argument("--humanize", choices=sorted(PROFILES),
+                        help="Humanization profile for random delays, jitter and offsets (default from settings)")
+    parser.add_argument("--seed", type=int, help="Humanization seed, for a reproducible run")
+    parser.add_argument("--backend", choices=sorted(BACKENDS),
+                        help=f"Input backend (default from settings, else {DEFAULT_BACKEND})")
+    parser.add_argument("--engine", choices=ENGINES, help="Playback engine (default from settings, else threads)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    out = parser.add_argument_group("metrics")
+    out.add_argument("--metrics-json", help="Write engine metrics (core.metrics) to this JSON file")
+    out.add_argument("--metrics-prom", help="Write engine metrics in Prometheus text format to this file")
+    out.add_argument("--metrics-interval", type=float, default=0,
+                     help="Also re-write the metrics files every N seconds during the run")
+    out.add_argument("--trace", help="Write a Chrome trace of sequence playback to this file (chrome://tracing, Perfetto)")
+    return parser
+
+
+def sequence_options(args, settings):
+    """Sequence options dict from app_settings.json, overridden by flags."""
+    opts = dict(DEFAULT_SEQUENCE_OPTIONS)
+    opts.update({
+        "interval": args.interval if args.interval is not None else settings.get("default_interval", 1.0),
+        "repetitions": (float("inf") if args.infinite else
+                        args.repetitions if args.repetitions is not None else settings.get("default_repetitions", 1)),
+        "random_delay": args.random_delay,
+        "jitter": args.jitter,
+        "move_duration": (args.move_duration if args.move_duration is not None
+                          else settings.get("mouse_move_duration", DEFAULT_SEQUENCE_OPTIONS["move_duration"])),
+        "move_curve": args.curve,
+        "timing": args.timing,
+        "speed": args.speed,
+        "max_gap": args.max_gap,
+    })
+    opts.update(humanization(args, settings))
+    return opts
+
+
+def humanization(args, settings):
+    """Humanization profile and seed from app_settings.json, overridden by flags."""
+    return {
+        "humanize": args.humanize or settings.get("humanize_profile", DEFAULT_SEQUENCE_OPTIONS["humanize"]),
+        "seed": args.seed if args.seed is not None else settings.get("humanize_seed"),
+    }
+
+
+def load_program(args):
+    """Compiled (or streamed) Program for the requested group. Raises ValueError if it's empty."""
+    if not os.path.exists(args.profile):
+        raise ValueError(f"No such profile: {args.profile}")
+    if args.stream:
+        from core.stream import StreamedProgram
+        return StreamedProgram(args.profile, args.group)
+
+    profile = load_profile(args.profile)
+    try:
+        program = compile_sequence(profile, args.group)
+    finally:
+        close = getattr(profile, "close", None)
+        if close:
+            close()
+    if not len(program):
+        where = "" if args.group == "All Groups" else f" in group '{args.group}'"
+        raise ValueError(f"No steps{where} in {args.profile}")
+    return program
+
+
+def _make_engine(kind, backend):
+    if kind == "asyncio":
+        from core.async_engine import AsyncClickerEngine
+        return AsyncClickerEngine(backend)
+    return ClickerEngine(backend)
+
+
+def run(args):
+    """Runs to completion (or --duration / Ctrl+C). Returns (exit code, summary dict)."""
+    if args.cps is None and not args.profile:
+        raise ValueError("Give a profile to play, or --cps for rapid fire")
+
+    settings = load_settings(args.settings)
+    engine_mode = args.engine or settings.get("engine_mode", "threads")
+    if engine_mode not in ENGINES:
+        raise ValueError(f"Unknown engine_mode '{engine_mode}' in settings. Choose from: {', '.join(ENGINES)}")
+    probe = FirstActionProbe(create_backend(args.backend or settings.get("input_backend", DEFAULT_BACKEND)))
+    engine = _make_engine(engine_mode, probe)
+    exporter = None
+    if args.metrics_json or args.metrics_prom:
+        from core.metrics import MetricsExporter
+        exporter = MetricsExporter(args.metrics_json, args.metrics_prom, args.metrics_interval)
+        if args.metrics_interval > 0:
+            exporter.start()
+
+    if args.trace and args.cps is None:
+        from core.tracing import Tracer
+        engine.tracer = Tracer()
+
+    if args.cps is not None:
+        spacing = args.burst_spacing if args.burst_spacing is not None else settings.get("burst_spacing", BURST_SPACING)
+        human = humanization(args, settings)
+        handle = engine.start_rapid(rapid_config(args.cps, args.burst, spacing, human["humanize"], human["seed"]))
+    else:
+        handle = engine.start_sequence(load_program(args), sequence_options(args, settings))
+    started = time.perf_counter()
+
+    interrupted = False
+    deadline = started + args.duration if args.duration else None
+    try:
+        while not handle.join(0.1):
+            if deadline is not None and time.perf_counter() >= deadline:
+                handle.stop()
+    except KeyboardInterrupt:
+        interrupted = True
+        handle.stop()
+    handle.join(2.0)
+    engine.shutdown()
+    if exporter:
+        exporter.stop() # Writes the final numbers
+    trace = engine.tracer.write(args.trace) if engine.tracer else None
+
+    summary = handle.stats()
+    summary.update({
+        "outcome": handle.outcome,
+        "error": str(handle.error) if handle.error else None,
+        "backend": probe.name,
+        "engine": engine_mode,
+        "elapsed_s": time.perf_counter() - started,
+        "startup_ms": (started - _T_START) * 1000,
+        "first_action_ms": (probe.first_action - _T_START) * 1000 if probe.first_action else None,
+    })
+    if trace:
+        summary["trace"] = trace
+    if handle.outcome == "failed":
+        return EXIT_FAILED, summary
+    return (EXIT_INTERRUPTED if interrupted else EXIT_OK), summary
+
+
+def print_summary(summary):
+    first = summary["first_action_ms"]
+    print(f"{summary['label']}: {summary['outcome']} after {summary['elapsed_s']:.2f}s, "
+          f"{summary['actions']} actions, {summary['repetition']} repetitions")
+    print(f"  first action {first:.1f} ms after launch" if first is not None else "  no input was injected")
+    if "achieved_cps" in summary:
+        print(f"  {summary['achieved_cps']:.2f} CPS achieved (target {summary['target_cps']:.2f}), "
+              f"late p99 {summary['late_p99_ms']:.2f} ms")
+        if summary["batch"] > 1:
+            print(f"  bursts of {summary['batch']} at {summary['tick_hz']:.1f} Hz")
+    if "behind_ms" in summary:
+        print(f"  {summary['speed']:g}x replay, behind the recording by {summary['late_max_ms']:.1f} ms at worst")
+    if summary["error"]:
+        print(f"  error: {summary['error']}")
+    if "trace" in summary:
+        from core.tracing import format_summary
+        print(format_summary(summary["trace"]))
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        code, summary = run(args)
+    except (ValueError, ImportError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+    if args.json:
+        print(json.dumps(summary, indent=2, default=str))
+    else:
+        print_summary(summary)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,4 +3,4 @@ Core functionality module for the Auto Clicker application.
 This package contains all core functionality modules.
 """
 
-__all__ = ['settings', 'clicker', 'recorder', 'groups']
\ No newline at end of file
+__all__ = ['settings', 'clicker', 'recorder', 'groups', 'timing', 'backends', 'program', 'trajectory', 'engine', 'async_engine', 'autosave', 'journal', 'binprofile', 'stream', 'capture', 'uiqueue', 'store', 'startup', 'metrics', 'tracing', 'runconfig', 'humanize']
\ No newline at end of file
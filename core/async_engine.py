@@ -0,0 +1,315 @@
+"""
+asyncio playback engine.
+
+Every run is a coroutine on one shared event loop (and therefore one timer
+heap), and all blocking backend calls go to a single injection thread. Dozens
+of concurrent sequences cost two OS threads in total instead of one each.
+The handles it returns behave like core.engine.RunHandle and are safe to
+drive from the Tk thread.
+"""
+import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.timing import DeadlineScheduler
+from core.engine import (InputDispatcher, RunHandle, CLICK_COUNTERS, SCHEDULE_LATENESS, sequence_config, rapid_config,
+                         burst_plan, _SequencePlayback, _jittered, _plan_move, _moved, _land_and_click, _clicked, _lap)
+from core.tracing import SPAN_MOVE, SPAN_HOLD, SPAN_KEY, SPAN_SCROLL
+from core.program import OP_CLICK, OP_KEY, OP_SCROLL, CLICK_MOVE_ONLY, CLICK_LEFT, CLICK_HOLD
+from core.metrics import ERRORS
+
+# The loop's timers are only as good as the OS tick (~15.6 ms on Windows), so the last
+# stretch before a deadline is covered by yielding to the loop rather than by a timer.
+YIELD_MARGIN = 0.02 if sys.platform == "win32" else 0.001
+
+
+class AsyncRunHandle(RunHandle):
+    """RunHandle whose body is a coroutine on the engine's event loop."""
+
+    def __init__(self, kind, label, dispatcher, loop, inject):
+        super().__init__(kind, label, dispatcher)
+        self.loop = loop
+        self.inject = inject  # Coroutine running a blocking call on the injection thread
+        self.future = None
+        self._wake = None  # asyncio.Event, created on the loop thread
+
+    @property
+    def status(self):
+        if self.outcome:
+            return self.outcome
+        if self.future is None:
+            return "pending"
+        return "paused" if self.control.paused else "running"
+
+    def is_alive(self):
+        return self.future is not None and not self.future.done()
+
+    def stop(self):
+        self.control.stop()
+        self._poke()
+
+    def pause(self):
+        self.control.pause()
+        self._poke()
+
+    def resume(self):
+        self.control.resume()
+        self._poke()
+
+    def join(self, timeout=None):
+        if self.future is not None:
+            try:
+                self.future.result(timeout)
+            except Exception:
+                pass
+        return not self.is_alive()
+
+    def _poke(self):
+        """Wakes the run's pending sleep so it re-checks stop/pause (thread-safe)."""
+        if self._wake is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self, body, args):
+        self._wake = asyncio.Event()
+        self._start_metrics()
+        try:
+            await body(self, *args)
+            self.outcome = "stopped" if self.control.stopped else "finished"
+        except Exception as e:
+            self.error = e
+            self.outcome = "failed"
+            ERRORS.inc(where="run")
+            print(f"{self.label} run failed: {e}")
+        finally:
+            self.ended_at = time.perf_counter()
+
+
+class AsyncClickerEngine:
+    """ClickerEngine counterpart running every run on one asyncio loop."""
+
+    def __init__(self, backend=None):
+        self.input = InputDispatcher(backend or "null")
+        self.tracer = None          # Set to a core.tracing.Tracer to trace runs started from now on
+        self._runs = []
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread = None
+        self._injector = None
+
+    def use_backend(self, backend):
+        self.input.use(backend)
+
+    def start_sequence(self, program, options=None, label=None):
+        return self._start("sequence", label or program.group, sequence_config(options), _perform_sequence, (program,))
+
+    def start_rapid(self, cps, label="Rapid Fire"):
+        return self._start("rapid", label, rapid_config(cps), _perform_rapid, ())
+
+    def _start(self, kind, label, config, body, args):
+        self._ensure_loop()
+        run = AsyncRunHandle(kind, label, self.input, self._loop, self._inject)
+        run.configure(config)
+        run.trace(self.tracer)
+        with self._lock:
+            self._runs = [r for r in self._runs if r.is_alive()]
+            self._runs.append(run)
+        run.future = asyncio.run_coroutine_threadsafe(run._run(body, args), self._loop)
+        return run
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._injector = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clicker-inject")
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, name="clicker-loop")
+            self._loop_thread.daemon = True
+            self._loop_thread.start()
+
+    async def _inject(self, fn, *args):
+        """Runs a blocking backend call on the injection thread."""
+        return await self._loop.run_in_executor(self._injector, fn, *args)
+
+    def runs(self):
+        with self._lock:
+            return [r for r in self._runs if r.is_alive()]
+
+    def stop_all(self):
+        for run in self.runs():
+            run.stop()
+
+    def pause_all(self):
+        for run in self.runs():
+            run.pause()
+
+    def resume_all(self):
+        for run in self.runs():
+            run.resume()
+
+    def join_all(self, timeout=None):
+        return all(run.join(timeout) for run in self.runs())
+
+    def shutdown(self):
+        """Stops every run and tears down the loop and injection threads."""
+        self.stop_all()
+        self.join_all(1.0)
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            self._loop_thread.join(1.0)
+            loop.close()
+            self._injector.shutdown(wait=False)
+
+
+# --- Run Bodies (coroutines on the engine loop) ---
+
+async def _wait_until(run, deadline):
+    """Async wait_until on run.control.clock(). Returns False if stopped first."""
+    control, wake = run.control, run._wake
+    while True:
+        if control.stopped:
+            return False
+        if control.paused:
+            wake.clear()
+            if control.paused and not control.stopped:
+                await wake.wait()
+            continue
+        remaining = deadline - control.clock()
+        if remaining <= 0:
+            return True
+        if remaining <= YIELD_MARGIN:
+            await asyncio.sleep(0) # Let the other runs go, then look at the clock again
+            continue
+        wake.clear()
+        try:
+            await asyncio.wait_for(wake.wait(), remaining - YIELD_MARGIN)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _checkpoint(run):
+    """Parks while paused. Returns False if the run has been stopped."""
+    return await _wait_until(run, float("-inf"))
+
+
+async def _sleep(run, duration):
+    return await _wait_until(run, run.control.clock() + duration)
+
+
+async def _perform_rapid(run):
+    control, inp, live = run.control, run.input, run.config
+    cfg = live.current
+    batch, spacing = burst_plan(cfg["cps"], cfg["burst"], cfg["burst_spacing"])
+    run.scheduler = scheduler = DeadlineScheduler(cfg["cps"], jitter=0.1, control=control, batch=batch,
+                                                  sample=run.humanizer.sampler("tick"))
+
+    while not control.stopped:
+        if batch == 1:
+            await run.inject(inp.click)
+        else:
+            await run.inject(inp.burst, batch, spacing) # The loop stays free while a burst plays
+        CLICK_COUNTERS[CLICK_LEFT].inc(batch)
+        scheduler.fired(batch)
+        run.count_action(batch)
+        if live.current is not cfg: # CPS changed in the UI
+            cfg = live.current
+            batch, spacing = burst_plan(cfg["cps"], cfg["burst"], cfg["burst_spacing"])
+            scheduler.retarget(cfg["cps"], batch)
+        target = scheduler.next_target()
+        if not await _wait_until(run, target):
+            scheduler.ticks -= 1
+            break
+        scheduler.settle(target)
+        SCHEDULE_LATENESS["rapid"].observe(scheduler.lateness[-1])
+
+
+async def _perform_sequence(run, program):
+    playback = _SequencePlayback(run, program)
+    for (op, x, y, kind, hold, key), offset in playback.steps():
+        # Parks here while paused, so Resume picks up at this very step
+        if not await _checkpoint(run): break
+        playback.begin_step()
+        if playback.replay and not await _await_step(run, playback, offset, op, x, y): break
+
+        if op == OP_CLICK:
+            await _do_click(run, x, y, kind, hold, playback.jitter, playback.duration, playback.curve)
+        elif op == OP_KEY:
+            await _do_keystroke(run, key)
+        elif op == OP_SCROLL:
+            await _do_scroll(run, x, y, key, playback.jitter, playback.duration, playback.curve)
+        run.count_action()
+
+        # Sequence Delays
+        deadline = playback.cooldown()
+        playback.end_step(deadline, deadline is not None and await _wait_until(run, deadline))
+
+
+async def _await_step(run, playback, offset, op, x, y):
+    """Waits for a step's deadline on the recorded timeline, gliding toward its
+    position meanwhile. Returns False if stopped first."""
+    target, glide = playback.replay_target(offset, op)
+    if glide:
+        xs, ys, ts = _plan_move(run, await run.inject(run.input.position), (x, y), glide, playback.curve)
+        t0 = target - glide
+        for px, py, t in zip(xs, ys, ts):
+            if not await _wait_until(run, t0 + t):
+                return False
+            await run.inject(run.input.move, px, py)
+        _lap(run, SPAN_MOVE)
+    if not await _wait_until(run, target):
+        return False
+    playback.replay_reached(target)
+    return True
+
+
+async def _do_click(run, x, y, kind, hold_duration=0.0, jitter=0, duration=0.5, curve="linear"):
+    control, inp = run.control, run.input
+    try:
+        # --- SPIRIT JITTER LOGIC ---
+        final_x, final_y = _jittered(run, x, y, jitter)
+
+        # Move Sequence, every point against its absolute timestamp
+        if duration > 0:
+            xs, ys, ts = _plan_move(run, await run.inject(inp.position), (final_x, final_y), duration, curve)
+            t0 = control.clock()
+            for px, py, t in zip(xs, ys, ts):
+                if not await _wait_until(run, t0 + t):
+                    return # Break out immediately
+                await run.inject(inp.move, px, py)
+            _moved(run, control.clock() - t0 - (ts[-1] if ts else 0.0))
+        if control.stopped: return
+
+        # The injection thread is single, so landing + click can't be interleaved
+        await run.inject(_land_and_click, inp, final_x, final_y, kind)
+        _clicked(run, kind)
+        if kind == CLICK_HOLD:
+            await _sleep(run, hold_duration or 1.0)
+            await run.inject(inp.mouse_up) # Always release, even if stopped mid-hold
+            _lap(run, SPAN_HOLD)
+
+    except Exception as e:
+        ERRORS.inc(where="click")
+        print(f"Click execution failed: {e}")
+
+
+async def _do_scroll(run, x, y, amount, jitter=0, duration=0.5, curve="linear"):
+    await _do_click(run, x, y, CLICK_MOVE_ONLY, 0.0, jitter, duration, curve)
+    if run.control.stopped: return
+    try:
+        await run.inject(run.input.scroll, amount)
+        _lap(run, SPAN_SCROLL)
+    except Exception as e:
+        ERRORS.inc(where="scroll")
+        print(f"Scroll execution failed: {e}")
+
+
+async def _do_keystroke(run, key):
+    if run.control.stopped: return
+    try:
+        await run.inject(run.input.press, key)
+        _lap(run, SPAN_KEY)
+    except Exception:
+        ERRORS.inc(where="keystroke")
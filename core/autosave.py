@@ -0,0 +1,109 @@
+"""
+Write-behind saving for the Grimoire.
+
+Edits only mark the profile dirty. After a short quiet period one snapshot is
+taken on the caller's (Tk) thread and handed to a background writer, which
+serializes it and writes it atomically. A burst of edits costs one write.
+"""
+import threading
+
+from core.settings import save_locations
+
+# Quiet period after the last edit before a snapshot is taken
+DEFAULT_DELAY_MS = 500
+
+
+class WriteBehindSaver:
+    """Debounces saves and writes them off the UI thread.
+
+    `snapshot` returns the data to save and is always called on the thread
+    that owns it: via `after` (e.g. root.after) when given, otherwise directly.
+    `write` defaults to core.settings.save_locations.
+    """
+
+    def __init__(self, snapshot, after=None, after_cancel=None, delay_ms=DEFAULT_DELAY_MS, write=save_locations):
+        self.snapshot = snapshot
+        self.after = after
+        self.after_cancel = after_cancel
+        self.delay_ms = delay_ms
+        self.write = write
+
+        self._timer = None
+        self._path = None
+        self._pending = None        # (data, path) waiting for the writer
+        self._writing = False
+        self._cond = threading.Condition()
+        self._closed = False
+        self.writes = 0             # Completed writes, for diagnostics
+        self.coalesced = 0          # Edits absorbed into an already pending save
+
+        self._thread = threading.Thread(target=self._writer, name="grimoire-writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def mark_dirty(self, path):
+        """Schedules a save of the current data to `path`."""
+        self._path = path
+        if self.after is None:
+            self._take_snapshot()
+            return
+        if self._timer is not None:
+            self.coalesced += 1
+            return
+        self._timer = self.after(self.delay_ms, self._take_snapshot)
+
+    def flush(self):
+        """Synchronously saves any pending changes (e.g. on exit)."""
+        if self._timer is not None:
+            if self.after_cancel is not None:
+                self.after_cancel(self._timer)
+            self._timer = None
+            self._queue(self.snapshot(), self._path)
+
+        with self._cond:
+            # Let an in-flight write finish, then take over whatever is still queued
+            while self._writing:
+                self._cond.wait()
+            job, self._pending = self._pending, None
+        if job is not None:
+            self._write(*job)
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _take_snapshot(self):
+        self._timer = None
+        self._queue(self.snapshot(), self._path)
+
+    def _queue(self, data, path):
+        with self._cond:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = (data, path)  # Only the latest snapshot matters
+            self._cond.notify_all()
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job, self._pending = self._pending, None
+                self._writing = True
+            try:
+                self._write(*job)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self, data, path):
+        try:
+            self.write(data, path)
+            self.writes += 1
+        except Exception as e:
+            print(f"Auto-save failed: {e}")
@@ -0,0 +1,169 @@
+import time
+
+from core.timing import wait_until
+
+# --- Input Backends ---
+# Everything the clicker injects goes through one of these, so the engine can run
+# against the real OS (pyautogui/pydirectinput) or a headless in-memory stand-in.
+
+
+class InputBackend:
+    """Interface every input backend implements."""
+    name = "base"
+
+    def move(self, x, y):
+        raise NotImplementedError
+
+    def click(self, button="left", clicks=1):
+        raise NotImplementedError
+
+    def burst(self, clicks, spacing=0.0, button="left"):
+        """`clicks` separate clicks in one call, `spacing` seconds apart (rapid fire's batches).
+
+        Played through click() by default; backends that can batch natively override it.
+        """
+        due = time.perf_counter()
+        for i in range(clicks):
+            if i and spacing > 0:
+                due += spacing
+                wait_until(due)
+            self.click(button)
+
+    def press(self, key):
+        raise NotImplementedError
+
+    def mouse_down(self, button="left"):
+        raise NotImplementedError
+
+    def scroll(self, amount):
+        """Turns the wheel at the current position; positive is up."""
+        raise NotImplementedError
+
+    def mouse_up(self, button="left"):
+        raise NotImplementedError
+
+    def position(self):
+        raise NotImplementedError
+
+
+class DirectInputBackend(InputBackend):
+    """Real OS injection: pydirectinput for the mouse, pyautogui for keys and position."""
+    name = "directinput"
+
+    def __init__(self):
+        try:
+            import pyautogui
+            import pydirectinput
+        except ImportError:
+            raise ImportError("Mouse modules missing. Please run: pip install pyautogui pydirectinput")
+        self._gui = pyautogui
+        self._direct = pydirectinput
+
+    # _pause=False everywhere: both libraries otherwise sleep 0.1s after every call,
+    # which would swamp the engine's own timing.
+    def move(self, x, y):
+        self._direct.moveTo(x, y, _pause=False)
+
+    def click(self, button="left", clicks=1):
+        self._direct.click(button=button, clicks=clicks, interval=0.0, _pause=False)
+
+    def burst(self, clicks, spacing=0.0, button="left"):
+        self._direct.click(button=button, clicks=clicks, interval=spacing, _pause=False)
+
+    def press(self, key):
+        self._gui.press(key, _pause=False)
+
+    def mouse_down(self, button="left"):
+        self._direct.mouseDown(button=button, _pause=False)
+
+    def scroll(self, amount):
+        self._gui.scroll(amount, _pause=False) # pydirectinput has no wheel support
+
+    def mouse_up(self, button="left"):
+        self._direct.mouseUp(button=button, _pause=False)
+
+    def position(self):
+        x, y = self._gui.position()
+        return int(x), int(y)
+
+
+class NullBackend(InputBackend):
+    """Pure-Python backend that injects nothing. Only the cursor position is tracked."""
+    name = "null"
+
+    def __init__(self):
+        self._pos = (0, 0)
+
+    def move(self, x, y):
+        self._pos = (int(x), int(y))
+
+    def click(self, button="left", clicks=1):
+        pass
+
+    def press(self, key):
+        pass
+
+    def mouse_down(self, button="left"):
+        pass
+
+    def scroll(self, amount):
+        pass
+
+    def mouse_up(self, button="left"):
+        pass
+
+    def position(self):
+        return self._pos
+
+
+class RecordingBackend(NullBackend):
+    """Headless backend that logs every call as (perf_counter, kind, args) in memory."""
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def move(self, x, y):
+        super().move(x, y)
+        self.events.append((time.perf_counter(), "move", (int(x), int(y))))
+
+    def click(self, button="left", clicks=1):
+        self.events.append((time.perf_counter(), "click", (button, clicks)))
+
+    def press(self, key):
+        self.events.append((time.perf_counter(), "press", (key,)))
+
+    def mouse_down(self, button="left"):
+        self.events.append((time.perf_counter(), "mouse_down", (button,)))
+
+    def scroll(self, amount):
+        self.events.append((time.perf_counter(), "scroll", (amount,)))
+
+    def mouse_up(self, button="left"):
+        self.events.append((time.perf_counter(), "mouse_up", (button,)))
+
+    def count(self, kind):
+        return sum(1 for e in self.events if e[1] == kind)
+
+    def clear(self):
+        self.events.clear()
+
+
+BACKENDS = {
+    DirectInputBackend.name: DirectInputBackend,
+    NullBackend.name: NullBackend,
+    RecordingBackend.name: RecordingBackend,
+}
+
+DEFAULT_BACKEND = DirectInputBackend.name
+
+
+def create_backend(backend=None):
+    """Returns a backend instance from a registered name, an instance, or None for the default."""
+    if isinstance(backend, InputBackend):
+        return backend
+    name = backend or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown input backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,283 @@
+"""
+Compact binary Grimoire format (.btcg) with memory-mapped loading.
+
+Layout (little-endian):
+    header   magic "BTCG", version u16, record size u16, step count u32,
+             string count u32, string table offset u64
+    records  one fixed-size record per step (see RECORD)
+    strings  u32 offsets[count + 1], then the UTF-8 blob they index
+
+Names, groups, keys and leftover fields share one deduplicated string table.
+Coordinates, click/action types, hold durations, ids, timestamps and delays
+are packed into the record. Any field that doesn't fit its packed column
+exactly (a float x, an unknown click type, an extra key, ...) is kept in a
+per-step JSON "extras" string, so conversion to and from JSON is lossless.
+"""
+import os
+import json
+import mmap
+import struct
+
+from core.settings import atomic_write, load_locations, atomic_write_json
+from core.program import Program, compile_step, step_offsets, step_timing, OP_CLICK, OP_KEY, CLICK_KINDS, CLICK_MOVE_ONLY, CLICK_HOLD
+
+MAGIC = b"BTCG"
+VERSION = 1
+BINARY_SUFFIX = ".btcg"
+
+HEADER = struct.Struct("<4sHHIIQ")
+# flags, action, click, x, y, id, name, group, key, extras, hold, timestamp, delay
+RECORD = struct.Struct("<HBBiiIIIIIddd")
+OFFSET = struct.Struct("<I")
+
+# Presence flags: a packed column is only meaningful when its bit is set
+F_X, F_Y, F_HOLD, F_ID = 1, 2, 4, 8
+F_NAME, F_GROUP, F_KEY, F_EXTRAS = 16, 32, 64, 128
+F_TIMESTAMP, F_DELAY = 256, 512
+
+# Enum columns: 0 means "field absent"
+ACTION_TYPES = ("click", "keystroke", "scroll")
+CLICK_TYPES = ("Left", "Right", "Double", "Hold", "Move")
+
+_INT32 = (-2**31, 2**31 - 1)
+
+# Decoded strings kept per open profile. Groups and keys repeat and stay hot;
+# names are mostly unique, so the cache is bounded to keep streaming flat.
+STRING_CACHE_SIZE = 1024
+
+
+def is_binary_profile(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(4) == MAGIC
+    except OSError:
+        return False
+
+
+# --- Writing ---
+
+def _pack_step(loc, intern):
+    """Returns the packed record for one step; fields that don't fit go to extras."""
+    rest = dict(loc)
+    flags = 0
+    values = {"action": 0, "click": 0, "x": 0, "y": 0, "id": 0, "name": 0, "group": 0, "key": 0,
+              "extras": 0, "hold": 0.0, "timestamp": 0.0, "delay": 0.0}
+
+    for field, enum in (("action_type", ("action", ACTION_TYPES)), ("click_type", ("click", CLICK_TYPES))):
+        column, choices = enum
+        if field in rest and rest[field] in choices and type(rest[field]) is str:
+            values[column] = choices.index(rest.pop(field)) + 1
+
+    for field, flag in (("x", F_X), ("y", F_Y)):
+        v = rest.get(field)
+        if type(v) is int and _INT32[0] <= v <= _INT32[1]:
+            values[field] = rest.pop(field)
+            flags |= flag
+    v = rest.get("id")
+    if type(v) is int and 0 <= v < 2**32:
+        values["id"] = rest.pop("id")
+        flags |= F_ID
+
+    for field, column, flag in (("hold_duration", "hold", F_HOLD), ("timestamp", "timestamp", F_TIMESTAMP),
+                                ("delay", "delay", F_DELAY)):
+        if type(rest.get(field)) is float:
+            values[column] = rest.pop(field)
+            flags |= flag
+
+    for field, column, flag in (("name", "name", F_NAME), ("group", "group", F_GROUP), ("key", "key", F_KEY)):
+        if type(rest.get(field)) is str:
+            values[column] = intern(rest.pop(field))
+            flags |= flag
+
+    if rest:
+        values["extras"] = intern(json.dumps(rest, separators=(",", ":")))
+        flags |= F_EXTRAS
+
+    return RECORD.pack(flags, values["action"], values["click"], values["x"], values["y"], values["id"],
+                       values["name"], values["group"], values["key"], values["extras"],
+                       values["hold"], values["timestamp"], values["delay"])
+
+
+def encode(locations):
+    """Encodes a list of step dicts into the binary format."""
+    strings, lookup = [], {}
+
+    def intern(text):
+        idx = lookup.get(text)
+        if idx is None:
+            idx = lookup[text] = len(strings)
+            strings.append(text)
+        return idx
+
+    records = bytearray()
+    count = 0
+    for loc in locations:
+        records += _pack_step(loc, intern)
+        count += 1
+
+    blobs = [s.encode("utf-8") for s in strings]
+    offsets = bytearray()
+    pos = 0
+    for b in blobs:
+        offsets += OFFSET.pack(pos)
+        pos += len(b)
+    offsets += OFFSET.pack(pos)
+
+    table_offset = HEADER.size + len(records)
+    header = HEADER.pack(MAGIC, VERSION, RECORD.size, count, len(strings), table_offset)
+    return b"".join([header, bytes(records), bytes(offsets)] + blobs)
+
+
+def write_binary(locations, path):
+    """Atomically writes `locations` as a .btcg profile."""
+    data = encode(locations)
+    atomic_write(path, lambda f: f.write(data), binary=True)
+
+
+# --- Reading ---
+
+class BinaryProfile:
+    """Read-only, memory-mapped view of a .btcg profile.
+
+    Behaves like a sequence of step dicts (built on access), and can compile a
+    playback Program or yield raw records without materializing any dicts.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if size < HEADER.size:
+            self.close()
+            raise ValueError("Truncated binary profile")
+
+        magic, version, rec_size, count, n_strings, table_offset = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION or rec_size != RECORD.size:
+            self.close()
+            raise ValueError(f"Unsupported binary profile (version {version})")
+        self.count = count
+        self._n_strings = n_strings
+        self._table = table_offset
+        self._blob = table_offset + (n_strings + 1) * OFFSET.size
+        self._strings = {}
+
+    def close(self):
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _raw(self, idx):
+        start, end = struct.unpack_from("<II", self._buf, self._table + idx * OFFSET.size)
+        return bytes(self._buf[self._blob + start:self._blob + end])
+
+    def string(self, idx):
+        s = self._strings.get(idx)
+        if s is None:
+            s = self._raw(idx).decode("utf-8")
+            if len(self._strings) >= STRING_CACHE_SIZE:
+                self._strings.clear() # Whatever is still in use comes straight back
+            self._strings[idx] = s
+        return s
+
+    def record(self, i):
+        """Raw record tuple for step i (see RECORD for the field order)."""
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return RECORD.unpack_from(self._buf, HEADER.size + i * RECORD.size)
+
+    def iter_records(self, start=0):
+        """Yields raw record tuples straight out of the map."""
+        return RECORD.iter_unpack(memoryview(self._buf)[HEADER.size + start * RECORD.size:self._table])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        return self.to_dict(self.record(i))
+
+    def __iter__(self):
+        for rec in self.iter_records():
+            yield self.to_dict(rec)
+
+    def to_dict(self, rec):
+        """Rebuilds the original step dict from a raw record."""
+        flags, action, click, x, y, step_id, name, group, key, extras, hold, ts, delay = rec
+        loc = {}
+        if flags & F_ID: loc["id"] = step_id
+        if flags & F_NAME: loc["name"] = self.string(name)
+        if action: loc["action_type"] = ACTION_TYPES[action - 1]
+        if flags & F_X: loc["x"] = x
+        if flags & F_Y: loc["y"] = y
+        if click: loc["click_type"] = CLICK_TYPES[click - 1]
+        if flags & F_HOLD: loc["hold_duration"] = hold
+        if flags & F_KEY: loc["key"] = self.string(key)
+        if flags & F_GROUP: loc["group"] = self.string(group)
+        if flags & F_TIMESTAMP: loc["timestamp"] = ts
+        if flags & F_DELAY: loc["delay"] = delay
+        if flags & F_EXTRAS: loc.update(json.loads(self.string(extras)))
+        return loc
+
+    def iter_compiled(self, group="All Groups", names=True):
+        """Yields (op tuple, name, (timestamp, delay)) per step, compiled straight from the records.
+
+        Only steps with extras (non-standard fields) are rebuilt as dicts; everything
+        else goes from packed columns straight to op tuples. With `names` False the
+        names aren't decoded ("" instead), for playback that has no use for them.
+        """
+        group_idx = None
+        if group != "All Groups":
+            wanted = group.encode("utf-8")
+            group_idx = next((i for i in range(self._n_strings) if self._raw(i) == wanted), -1)
+
+        for rec in self.iter_records():
+            flags, action, click, x, y, _, name, grp, key, _, hold, ts, delay = rec
+            if group_idx is not None and not (flags & F_GROUP and grp == group_idx):
+                # Slow path: a group kept in the extras, or no group at all (the "" bucket)
+                if flags & F_EXTRAS:
+                    own = self.to_dict(rec).get("group", "")
+                else:
+                    own = self.string(grp) if flags & F_GROUP else ""
+                if own != group:
+                    continue
+            if flags & F_EXTRAS:
+                loc = self.to_dict(rec)
+                yield compile_step(loc), loc.get("name", ""), step_timing(loc)
+                continue
+            name = self.string(name) if names and flags & F_NAME else ""
+            timing = (ts if flags & F_TIMESTAMP else None, delay if flags & F_DELAY else None)
+            if action == 2:
+                yield (OP_KEY, 0, 0, CLICK_MOVE_ONLY, 0.0, self.string(key) if flags & F_KEY else None), name, timing
+            elif action in (0, 1):
+                kind = CLICK_KINDS[CLICK_TYPES[click - 1]] if click else CLICK_KINDS["Left"]
+                x = x if flags & F_X else 0
+                y = y if flags & F_Y else 0
+                hold = (hold if flags & F_HOLD else 1.0) or 1.0
+                yield (OP_CLICK, x, y, kind, hold if kind == CLICK_HOLD else 0.0, None), name, timing
+            else:
+                yield compile_step(self.to_dict(rec)), name, timing
+
+    def compile_program(self, group="All Groups"):
+        """Compiles a playback Program directly from the records."""
+        compiled = list(self.iter_compiled(group))
+        return Program((c[0] for c in compiled), (c[1] for c in compiled), group,
+                       step_offsets(c[2] for c in compiled))
+
+
+# --- Conversion ---
+
+def json_to_binary(json_path, bin_path):
+    write_binary(load_locations(json_path), bin_path)
+
+
+def binary_to_json(bin_path, json_path):
+    with BinaryProfile(bin_path) as profile:
+        atomic_write_json(list(profile), json_path)
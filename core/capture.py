@@ -0,0 +1,211 @@
+"""
+Continuous macro capture: a preallocated event ring buffer and the path
+simplification that turns raw input into a compact list of Grimoire steps.
+
+Listener threads only append (timestamp, kind, x, y, data) records to the
+ring; everything else (click classification, time decimation,
+Ramer-Douglas-Peucker) happens once, after recording stops.
+"""
+import math
+import threading
+from array import array
+
+# --- Event kinds ---
+EV_MOVE = 0
+EV_DOWN = 1     # data: button name
+EV_UP = 2       # data: button name
+EV_SCROLL = 3   # data: wheel amount (positive is up)
+EV_KEY = 4      # data: key name, as the backends' press() expects it
+
+DEFAULT_CAPACITY = 1 << 18      # ~45 min of 100 Hz mouse movement
+
+# --- Simplification defaults ---
+SIMPLIFY_EPSILON = 3.0          # Max pixel deviation RDP may remove
+MIN_MOVE_INTERVAL = 1 / 30      # Time decimation of path points (s)
+HOLD_THRESHOLD = 0.35           # Press longer than this records a Hold (s)
+DOUBLE_CLICK_TIME = 0.3         # Two left clicks this close become a Double (s)
+DOUBLE_CLICK_SLOP = 4           # ...if they're also within this many pixels
+SCROLL_MERGE_TIME = 0.25        # Wheel ticks this close at one spot merge into one step (s)
+
+
+class EventRing:
+    """Fixed-size ring of input events, allocated once up front.
+
+    Safe to append from several listener threads. When full, the oldest
+    events are overwritten and counted in `dropped`.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._t = array('d', bytes(8 * capacity))
+        self._kind = bytearray(capacity)
+        self._x = array('i', bytes(4 * capacity))
+        self._y = array('i', bytes(4 * capacity))
+        self._data = [None] * capacity
+        self._next = 0          # Total events ever appended
+        self._lock = threading.Lock()
+
+    def append(self, t, kind, x=0, y=0, data=None):
+        with self._lock:
+            i = self._next % self.capacity
+            self._t[i] = t
+            self._kind[i] = kind
+            self._x[i] = int(x)
+            self._y[i] = int(y)
+            self._data[i] = data
+            self._next += 1
+
+    def __len__(self):
+        return min(self._next, self.capacity)
+
+    @property
+    def dropped(self):
+        return max(0, self._next - self.capacity)
+
+    def clear(self):
+        with self._lock:
+            self._next = 0
+
+    def snapshot(self):
+        """Events in the order they were recorded, as (t, kind, x, y, data) tuples."""
+        with self._lock:
+            n, end = len(self), self._next
+        start = end - n
+        out = []
+        for j in range(start, end):
+            i = j % self.capacity
+            out.append((self._t[i], self._kind[i], self._x[i], self._y[i], self._data[i]))
+        return out
+
+
+# --- Path Simplification ---
+
+def decimate(points, min_dt=MIN_MOVE_INTERVAL):
+    """Drops (t, x, y) points closer than min_dt to the last kept one. Endpoints are always kept."""
+    if len(points) <= 2:
+        return list(points)
+    kept = [points[0]]
+    for p in points[1:-1]:
+        if p[0] - kept[-1][0] >= min_dt:
+            kept.append(p)
+    kept.append(points[-1])
+    return kept
+
+
+def simplify_path(points, epsilon=SIMPLIFY_EPSILON):
+    """Ramer-Douglas-Peucker over (t, x, y) points, in pixel space.
+
+    Iterative (no recursion limit on long drags); keeps the endpoints and every
+    point that deviates from the simplified line by more than `epsilon`.
+    """
+    n = len(points)
+    if n <= 2:
+        return list(points)
+    keep = bytearray(n)
+    keep[0] = keep[-1] = 1
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        _, ax, ay = points[first]
+        _, bx, by = points[last]
+        dx, dy = bx - ax, by - ay
+        length = math.hypot(dx, dy)
+        worst, index = -1.0, -1
+        for i in range(first + 1, last):
+            _, px, py = points[i]
+            if length:
+                d = abs(dy * (px - ax) - dx * (py - ay)) / length
+            else:
+                d = math.hypot(px - ax, py - ay)
+            if d > worst:
+                worst, index = d, i
+        if worst > epsilon:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+# --- Events -> Steps ---
+
+def build_steps(events, epsilon=SIMPLIFY_EPSILON, min_dt=MIN_MOVE_INTERVAL, ignore_click=None):
+    """Turns recorded events into Grimoire step dicts (without id/name/group).
+
+    Every step carries a "timestamp" in seconds from the first event. Mouse
+    paths between actions become "Move" click steps after time decimation and
+    RDP; presses become Left/Right/Double/Hold clicks; wheel ticks become
+    "scroll" steps. `ignore_click(x, y)` can veto clicks (e.g. on the app itself).
+    """
+    if not events:
+        return []
+    t0 = events[0][0]
+    steps = []
+    moves = []
+    cursor = None           # Where the cursor was at the last emitted action
+    downs = {}              # button -> (t, x, y) of an unreleased press
+    last_scroll_t = None
+
+    def flush_moves(keep_last):
+        nonlocal cursor
+        if not moves:
+            return
+        path = ([cursor] if cursor else []) + moves
+        path = simplify_path(decimate(path, min_dt), epsilon)
+        # The anchor is where the cursor already was; the last point is where the
+        # next action moves to anyway, unless that action doesn't move the mouse
+        start = 1 if cursor else 0
+        end = len(path) if keep_last else len(path) - 1
+        for t, x, y in path[start:end]:
+            steps.append({"action_type": "click", "click_type": "Move", "x": x, "y": y,
+                          "timestamp": round(t - t0, 4)})
+        cursor = moves[-1]
+        moves.clear()
+
+    for t, kind, x, y, data in events:
+        if kind == EV_MOVE:
+            moves.append((t, x, y))
+        elif kind == EV_DOWN:
+            flush_moves(keep_last=False)
+            downs[data] = (t, x, y)
+            cursor = (t, x, y)
+        elif kind == EV_UP:
+            press = downs.pop(data, None)
+            if press is None:
+                continue
+            pt, px, py = press
+            if data not in ("left", "right") or (ignore_click and ignore_click(px, py)):
+                continue
+            if data == "right":
+                ctype = "Right"
+            elif t - pt >= HOLD_THRESHOLD:
+                ctype = "Hold"
+            else:
+                ctype = "Left"
+                prev = steps[-1] if steps else None
+                if (prev and prev.get("click_type") == "Left" and prev.get("action_type") == "click"
+                        and pt - t0 - prev["timestamp"] <= DOUBLE_CLICK_TIME
+                        and abs(prev["x"] - px) <= DOUBLE_CLICK_SLOP and abs(prev["y"] - py) <= DOUBLE_CLICK_SLOP):
+                    prev["click_type"] = "Double"
+                    continue
+            step = {"action_type": "click", "click_type": ctype, "x": px, "y": py,
+                    "timestamp": round(pt - t0, 4)}
+            if ctype == "Hold":
+                step["hold_duration"] = round(t - pt, 3)
+            steps.append(step)
+        elif kind == EV_SCROLL:
+            flush_moves(keep_last=False)
+            prev = steps[-1] if steps else None
+            if (prev and prev.get("action_type") == "scroll" and (prev["x"], prev["y"]) == (x, y)
+                    and t - last_scroll_t <= SCROLL_MERGE_TIME):
+                prev["amount"] += data
+            else:
+                steps.append({"action_type": "scroll", "x": x, "y": y, "amount": data,
+                              "timestamp": round(t - t0, 4)})
+            last_scroll_t = t
+            cursor = (t, x, y)
+        elif kind == EV_KEY:
+            flush_moves(keep_last=True)
+            steps.append({"action_type": "keystroke", "key": data, "timestamp": round(t - t0, 4)})
+
+    flush_moves(keep_last=True)
+    return steps
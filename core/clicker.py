@@ -1,160 +1,219 @@
-import threading
-import time
-import random
 from tkinter import messagebox
 
-try:
-    import pyautogui
-    import pydirectinput
-except ImportError:
-    print("Mouse modules missing. Please run: pip install pyautogui pydirectinput")
+from core.engine import ClickerEngine, BURST_SPACING, sequence_config, rapid_config
+from core.humanize import DEFAULT_PROFILE
+from core.groups import get_all_groups
+from core.program import compile_sequence
+from core.stream import StreamedProgram
+from core.tracing import Tracer
 
-# Use a global Event to safely and instantly stop background threads
-_stop_event = threading.Event()
+# The app's engines, by state["engine_mode"]. Every Start creates a new run handle on one.
+_engines = {"threads": ClickerEngine()}
+_ENGINE_MODES = ("threads", "asyncio")
 
-def start_sequence_clicking(state):
-    """Executes the planned out Grimoire Scrolls."""
+# Most recent rapid-fire run and sequence runs, kept around for their stats
+_last_rapid = None
+_last_sequence = []
+
+# Opt-in span tracing of sequence playback (see core.tracing); each Start gets a fresh trace
+_tracing = False
+_last_trace = None
+TRACE_JOIN_TIMEOUT = 2.0
+
+def start_sequence_clicking(state, backend=None):
+    """Executes the planned out Grimoire Scrolls. Returns the started run handles (empty if none)."""
+    global _last_sequence
     if not state.get("saved_locations"):
         messagebox.showinfo("Empty Scroll", "Your Grimoire is empty! Record or add locations first.")
-        # We assume app.py handles resetting the UI buttons if this fails
-        return
-        
-    _stop_event.clear()
-    thread = threading.Thread(target=_perform_sequence, args=(state,))
-    thread.daemon = True
-    thread.start()
-
-def start_rapid_clicking(cps_var):
-    """Executes extremely fast, on-the-spot clicking based on CPS."""
-    _stop_event.clear()
-    
-    # Extract the raw float value from the Tkinter DoubleVar
-    try:
-        cps = float(cps_var.get())
-    except:
-        cps = 10.0
+        return []
+    engine = _select_engine(state, backend)
+    if engine is None:
+        return []
 
-    thread = threading.Thread(target=_perform_rapid, args=(cps,))
-    thread.daemon = True
-    thread.start()
+    # Snapshot taken here on the Tk thread; the runs never read Tk variables.
+    # Every run of this Start follows the same config, so UI edits reach them all.
+    config = sequence_config(_sequence_options(state))
+    grp = state.get("group_filter").get()
+    parallel_var = state.get("parallel_groups")
 
-def stop_clicking():
-    """Instantly flags all clicking threads to halt."""
-    _stop_event.set()
+    # Streaming reads the saved profile file step by step instead of the in-memory list
+    source = state.get("stream_source")
+    if source:
+        build = lambda g: StreamedProgram(source, g)
+    else:
+        # Compile once, up front, so the playback loop does no dict or string work.
+        # The store hands over just the group's steps via its group index.
+        build = lambda g: compile_sequence(state["saved_locations"], g)
 
-# --- Internal Thread Logic ---
+    if grp == "All Groups" and parallel_var and parallel_var.get():
+        # One independent run per group, each with its own cooldown clock
+        store = state["saved_locations"]
+        groups = get_all_groups(state)
+        if store.group_size(""):
+            groups = [""] + groups # Ungrouped steps get their own run too
+        programs = [build(g) for g in groups if store.group_size(g)]
+        if not programs:
+            messagebox.showinfo("Empty Scroll", "None of your groups have any locations to run.")
+            return []
+    else:
+        programs = [build(grp)]
 
-def _perform_rapid(cps):
+    global _last_trace
+    if _tracing:
+        _last_trace = Tracer()
+    engine.tracer = _last_trace if _tracing else None
     try:
-        # Prevent division by zero
-        target_delay = 1.0 / max(0.1, cps) 
-        
-        while not _stop_event.is_set():
-            pydirectinput.click()
-            
-            # Anti-Ban Micro-Jitter: Fluctuates the delay by ±10% 
-            # so it isn't flagged as perfect robotic input
-            humanized_delay = target_delay + random.uniform(-target_delay * 0.1, target_delay * 0.1)
-            
-            # Sleep in tiny chunks so we can interrupt it instantly if stop is pressed
-            _interruptible_sleep(humanized_delay)
-            
-    except Exception as e:
-        print(f"Rapid fire interrupted: {e}")
-
-def _perform_sequence(state):
+        _last_sequence = [engine.start_sequence(p, config, label=p.group or "Ungrouped") for p in programs]
+    except ValueError as e: # Unknown humanization profile
+        stop_clicking()
+        messagebox.showerror("Humanization", str(e))
+        return []
+    return _last_sequence
+
+def start_rapid_clicking(cps_var, backend=None, engine_mode="threads", burst_spacing=BURST_SPACING,
+                         humanize=DEFAULT_PROFILE, seed=None):
+    """Executes extremely fast, on-the-spot clicking based on CPS. Returns the run handle, or None.
+
+    Above MAX_TICK_HZ the clicks go out in bursts, `burst_spacing` seconds apart.
+    The click timing jitter is drawn from the `humanize` profile (core.humanize).
+    """
+    global _last_rapid
+    engine = _select_engine({"engine_mode": engine_mode}, backend)
+    if engine is None:
+        return None
+
+    engine.tracer = None # Only sequences are traced
     try:
-        interval = state.get("interval").get()
-        is_infinite = state.get("infinite").get()
-        reps = state.get("repetitions").get() if not is_infinite else float('inf')
-        
-        # Safely fetch optional state variables
-        random_delay_var = state.get("random_delay_var")
-        has_random_delay = random_delay_var.get() if random_delay_var else False
-        
-        grp = state.get("group_filter").get()
-        actions = state.get("saved_locations", [])
-        
-        if grp != "All Groups":
-            actions = [x for x in actions if x.get("group") == grp]
-            
-        count = 0
-        while not _stop_event.is_set() and count < reps:
-            for loc in actions:
-                if _stop_event.is_set(): break
-                
-                atype = loc.get("action_type", "click")
-                if atype == "click":
-                    hold = loc.get("hold_duration", 1.0) if "Hold" in loc.get("click_type") else None
-                    _do_click(state, loc.get("x", 0), loc.get("y", 0), loc.get("click_type", "Left"), hold)
-                elif atype == "keystroke":
-                    _do_keystroke(loc.get("key"))
-                
-                # Sequence Delays
-                wait = interval
-                if has_random_delay: 
-                    wait += random.uniform(-0.5, 0.5)
-                _interruptible_sleep(max(0.01, wait))
-                
-            count += 1
-            
-    except Exception as e:
-        print(f"Sequence error: {e}")
-
-def _do_click(state, x, y, click_type, hold_duration=None):
+        _last_rapid = engine.start_rapid(rapid_config(_read_cps(cps_var), None, burst_spacing, humanize, seed))
+    except ValueError as e: # Unknown humanization profile
+        messagebox.showerror("Humanization", str(e))
+        return None
+    return _last_rapid
+
+def publish_run_changes(state):
+    """Hands the UI's current settings to the runs still going (call on the Tk thread).
+
+    Runs pick them up between steps; settings fixed at Start (timing mode,
+    replay speed, group, ...) are left alone. Returns the config version now
+    in effect per run kind, e.g. {"sequence": 3}.
+    """
+    versions = {}
+    if _last_rapid is not None and _last_rapid.is_alive():
+        versions["rapid"] = _last_rapid.config.publish(cps=_read_cps(state["cps"]))
+    live = [run for run in _last_sequence if run.is_alive()]
+    if live:
+        versions["sequence"] = live[0].config.publish(**_sequence_options(state))
+    return versions
+
+def stop_clicking():
+    """Instantly flags all clicking threads to halt. Safe from any thread (the hotkey
+    listener calls it directly). Returns the runs that were still going."""
+    runs = active_runs()
+    for engine in list(_engines.values()):
+        engine.stop_all()
+    return runs
+
+def pause_clicking():
+    """Freezes every run in place: the current step and its remaining delay are kept."""
+    for engine in list(_engines.values()):
+        engine.pause_all()
+
+def resume_clicking():
+    """Continues paused runs exactly where they left off."""
+    for engine in list(_engines.values()):
+        engine.resume_all()
+
+def is_paused():
+    runs = active_runs()
+    return bool(runs) and all(r.control.paused for r in runs)
+
+def active_runs():
+    """Run handles that are still executing, across all engines."""
+    return [run for engine in list(_engines.values()) for run in engine.runs()]
+
+def get_rapid_stats():
+    """Achieved CPS and schedule lateness of the current/last rapid-fire run."""
+    if _last_rapid is None or _last_rapid.scheduler is None:
+        return None
+    return _last_rapid.scheduler.stats()
+
+def get_replay_stats():
+    """How far the last recorded-timing replay fell behind its timeline (worst run), or None."""
+    stats = [run.scheduler.stats() for run in _last_sequence if run.scheduler is not None]
+    if not stats:
+        return None
+    return max(stats, key=lambda s: s["late_max_ms"])
+
+def set_tracing(enabled):
+    """Turns span tracing on or off for sequences started from now on."""
+    global _tracing
+    _tracing = bool(enabled)
+
+def write_trace(path):
+    """Waits for the traced runs to exit, then writes the last trace as Chrome Trace JSON.
+
+    Blocks (up to TRACE_JOIN_TIMEOUT per run), so call it off the Tk thread.
+    Returns the per-group summary, or None if nothing was traced.
+    """
+    trace, runs = _last_trace, list(_last_sequence)
+    if trace is None:
+        return None
+    for run in runs:
+        run.join(TRACE_JOIN_TIMEOUT)
+    return trace.write(path)
+
+# --- Internal Helpers ---
+
+def _select_engine(state, backend):
+    """Resolves the engine and input backend for the next run, reporting failures to the user."""
+    mode = state.get("engine_mode", "threads")
+    if mode not in _ENGINE_MODES:
+        messagebox.showerror("Engine", f"Unknown engine mode '{mode}'. Choose from: {', '.join(_ENGINE_MODES)}")
+        return None
+    engine = _engines.get(mode)
+    if engine is None:
+        # Only the asyncio engine is made on demand: importing asyncio alone costs ~60 ms at startup
+        from core.async_engine import AsyncClickerEngine
+        engine = _engines[mode] = AsyncClickerEngine()
     try:
-        final_x, final_y = int(x), int(y)
-        
-        # --- SPIRIT JITTER LOGIC ---
-        jitter_var = state.get("jitter_enabled")
-        if jitter_var and jitter_var.get():
-            r_var = state.get("jitter_range")
-            r = r_var.get() if r_var else 3
-            final_x += random.randint(-r, r)
-            final_y += random.randint(-r, r)
-            
-        # Move Sequence
-        move_var = state.get("mouse_move_duration")
-        duration = move_var.get() if move_var else 0.5
-        
-        if duration > 0:
-            cur_x, cur_y = pyautogui.position()
-            steps = int(max(5, duration * 20))
-            
-            for i in range(steps):
-                if _stop_event.is_set(): return # Break out immediately
-                nx = int(cur_x + (final_x - cur_x) * ((i+1)/steps))
-                ny = int(cur_y + (final_y - cur_y) * ((i+1)/steps))
-                pydirectinput.moveTo(nx, ny)
-                time.sleep(duration/steps)
-                
-        pydirectinput.moveTo(final_x, final_y)
-        if _stop_event.is_set(): return
-        
-        # Click Execution
-        if click_type == "Left": pydirectinput.click()
-        elif click_type == "Right": pydirectinput.rightClick()
-        elif click_type == "Double": pydirectinput.doubleClick()
-        elif click_type == "Hold":
-            pydirectinput.mouseDown()
-            _interruptible_sleep(hold_duration or 1.0)
-            pydirectinput.mouseUp()
-            
-    except Exception as e:
-        print(f"Click execution failed: {e}")
-
-def _do_keystroke(key):
-    if _stop_event.is_set(): return
+        engine.use_backend(backend)
+        return engine
+    except (ImportError, ValueError) as e:
+        messagebox.showerror("Input Backend", str(e))
+        return None
+
+def _read_cps(cps_var):
+    # Extract the raw float value from the Tkinter DoubleVar
     try:
-        pyautogui.press(key)
+        return float(cps_var.get())
     except:
-        pass
-
-def _interruptible_sleep(duration):
-    """Sleeps in 0.05s chunks so the thread can exit instantly if Stop is pressed."""
-    elapsed = 0
-    while elapsed < duration:
-        if _stop_event.is_set(): break
-        sleep_chunk = min(0.05, duration - elapsed)
-        time.sleep(sleep_chunk)
-        elapsed += sleep_chunk
\ No newline at end of file
+        return 10.0
+
+def _sequence_options(state):
+    """Reads the sequence settings out of the Tk variables (on the Tk thread)."""
+    is_infinite = state.get("infinite").get()
+
+    # Safely fetch optional state variables
+    random_delay_var = state.get("random_delay_var")
+    jitter_var = state.get("jitter_enabled")
+    r_var = state.get("jitter_range")
+    move_var = state.get("mouse_move_duration")
+    curve_var = state.get("move_curve")
+    timed_var = state.get("replay_timing")
+    speed_var = state.get("replay_speed")
+    compress_var = state.get("compress_idle")
+    gap_var = state.get("max_idle_gap")
+
+    return {
+        "interval": state.get("interval").get(),
+        "repetitions": state.get("repetitions").get() if not is_infinite else float('inf'),
+        "random_delay": random_delay_var.get() if random_delay_var else False,
+        "jitter": (r_var.get() if r_var else 3) if jitter_var and jitter_var.get() else 0,
+        "move_duration": move_var.get() if move_var else 0.5,
+        "move_curve": curve_var.get() if curve_var else "linear",
+        "timing": "recorded" if timed_var and timed_var.get() else "interval",
+        "speed": speed_var.get() if speed_var else 1.0,
+        "max_gap": gap_var.get() if compress_var and compress_var.get() and gap_var else None,
+        "humanize": state.get("humanize_profile", DEFAULT_PROFILE),
+        "seed": state.get("humanize_seed"),
+    }
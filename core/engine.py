@@ -0,0 +1,561 @@
+"""
+Clicker engine: owns the background runs and the input dispatcher.
+
+Every start_* call returns a RunHandle with its own RunControl, so runs can be
+stopped, paused and joined individually, and several can play side by side
+(e.g. one per group). All runs inject through one InputDispatcher.
+"""
+import time
+import math
+import itertools
+import threading
+
+from core.runconfig import LiveConfig
+from core.humanize import Humanizer, DEFAULT_PROFILE
+from core.timing import DeadlineScheduler, ReplayClock, RunControl, wait_until
+from core.backends import create_backend
+from core.trajectory import plan_path, play_path, HUMANIZED_VARIANTS
+from core.program import OP_CLICK, OP_KEY, OP_SCROLL, CLICK_MOVE_ONLY, CLICK_LEFT, CLICK_RIGHT, CLICK_DOUBLE, CLICK_HOLD, CLICK_NAMES
+from core.metrics import ACTIONS, CLICKS, RATE, LATENESS, OVERSHOOT, BACKEND_LATENCY, ERRORS
+from core.tracing import (SPAN_STEP, SPAN_POSITION, SPAN_PLAN, SPAN_MOVE, SPAN_CLICK, SPAN_HOLD,
+                          SPAN_KEY, SPAN_SCROLL, SPAN_SLEEP, SPAN_WAIT)
+
+# Defaults for the sequence options dict (see ClickerEngine.start_sequence)
+DEFAULT_SEQUENCE_OPTIONS = {
+    "interval": 1.0,
+    "repetitions": 1,          # float('inf') for Eternal Chant
+    "random_delay": False,     # ±0.5s on every cooldown
+    "jitter": 0,               # Pixel radius, 0 disables Spirit Jitter
+    "move_duration": 0.5,
+    "move_curve": "linear",
+    "timing": "interval",      # "recorded" replays the steps' own timestamps/delays instead
+    "speed": 1.0,              # Recorded timing only: 0.25x-20x
+    "max_gap": None,           # Recorded timing only: longer idle gaps are cut to this (s)
+    "humanize": DEFAULT_PROFILE, # core.humanize profile the random delays/offsets come from
+    "seed": None,              # Humanization seed for reproducible runs (None: the profile's, or random)
+}
+
+RANDOM_DELAY = 0.5          # Spread of the Random Delay on each cooldown (s)
+
+def humanize_streams(kind, opts):
+    """The core.humanize streams a run of this kind draws from with these options."""
+    if kind == "rapid":
+        return ("tick",)
+    used = (("offset", opts.get("jitter")), ("delay", opts.get("random_delay")),
+            ("variant", opts.get("move_curve") == "humanized"))
+    return tuple(name for name, on in used if on)
+
+
+# Options the UI can change while a run is going (see core.runconfig); the rest are fixed at Start
+LIVE_SEQUENCE_OPTIONS = ("interval", "repetitions", "random_delay", "jitter", "move_duration", "move_curve")
+LIVE_RAPID_OPTIONS = ("cps", "burst", "burst_spacing")
+
+# --- Rapid fire bursts ---
+# Past MAX_TICK_HZ the per-click loop overhead (wait, jitter, bookkeeping) is what
+# caps the rate, so rapid fire sends several clicks per tick in one backend call.
+MAX_TICK_HZ = 100.0
+BURST_SPACING = 0.001       # Default gap between the clicks of a burst (s)
+
+
+def sequence_config(options=None):
+    """LiveConfig for a sequence Start: the defaults overlaid with `options` (a LiveConfig passes through)."""
+    if isinstance(options, LiveConfig):
+        return options
+    opts = dict(DEFAULT_SEQUENCE_OPTIONS)
+    opts.update(options or {})
+    return LiveConfig(opts, LIVE_SEQUENCE_OPTIONS)
+
+
+def rapid_config(cps, burst=None, burst_spacing=BURST_SPACING, humanize=DEFAULT_PROFILE, seed=None):
+    """LiveConfig for a rapid-fire Start at `cps` (a LiveConfig passes through).
+
+    `burst` fixes the clicks per tick; None switches between single clicks and
+    bursts by rate (see burst_plan).
+    """
+    if isinstance(cps, LiveConfig):
+        return cps
+    return LiveConfig({"cps": float(cps), "burst": burst, "burst_spacing": burst_spacing,
+                       "humanize": humanize, "seed": seed}, LIVE_RAPID_OPTIONS)
+
+
+def burst_plan(cps, burst=None, spacing=BURST_SPACING):
+    """(clicks per tick, seconds between them) for rapid fire at `cps`.
+
+    Single clicks up to MAX_TICK_HZ, then just enough per burst to keep the
+    ticks under it. The spacing is capped so a burst always fits in its tick.
+    """
+    cps = max(0.1, cps)
+    n = max(1, int(burst) if burst else math.ceil(cps / MAX_TICK_HZ))
+    return n, (min(max(0.0, spacing), 1.0 / cps) if n > 1 else 0.0)
+
+
+class InputDispatcher:
+    """Serializes injection from concurrent runs onto one backend.
+
+    Single calls are locked individually; `exclusive` can be held across a
+    group of calls (final move + click) that must not be interleaved. Every
+    call's time in the backend (not waiting for the lock) goes to BACKEND_LATENCY.
+    """
+
+    def __init__(self, backend=None):
+        self.exclusive = threading.RLock()
+        self.backend = create_backend(backend)
+
+    def use(self, backend):
+        with self.exclusive:
+            self.backend = create_backend(backend)
+
+    def _call(self, call, *args):
+        with self.exclusive:
+            start = time.perf_counter()
+            try:
+                return getattr(self.backend, call)(*args)
+            finally:
+                _CALL_LATENCY[call].observe(time.perf_counter() - start)
+
+    def move(self, x, y):
+        self._call("move", x, y)
+
+    def click(self, button="left", clicks=1):
+        self._call("click", button, clicks)
+
+    def burst(self, clicks, spacing=0.0, button="left"):
+        self._call("burst", clicks, spacing, button)
+
+    def press(self, key):
+        self._call("press", key)
+
+    def mouse_down(self, button="left"):
+        self._call("mouse_down", button)
+
+    def mouse_up(self, button="left"):
+        self._call("mouse_up", button)
+
+    def scroll(self, amount):
+        self._call("scroll", amount)
+
+    def position(self):
+        return self._call("position")
+
+
+# Label sets bound once, so the hot paths don't rebuild them per call
+_CALL_LATENCY = {call: BACKEND_LATENCY.labels(call=call)
+                 for call in ("move", "click", "burst", "press", "mouse_down", "mouse_up", "scroll", "position")}
+CLICK_COUNTERS = {kind: CLICKS.labels(type=name) for kind, name in CLICK_NAMES.items()}
+SCHEDULE_LATENESS = {schedule: LATENESS.labels(schedule=schedule) for schedule in ("rapid", "interval", "recorded")}
+
+
+class RunHandle:
+    """One background run: its cancellation, status, progress counters and thread."""
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, label, dispatcher):
+        self.id = next(self._ids)
+        self.kind = kind            # "sequence" or "rapid"
+        self.label = label          # Group name or "Rapid Fire"
+        self.input = dispatcher
+        self.control = RunControl()
+        self.thread = None
+        self.outcome = None         # "finished", "stopped" or "failed" once the thread exits
+        self.error = None
+        self.started = None         # control.clock() when the run began
+        self.ended_at = None        # perf_counter() when the run stopped injecting
+        self.scheduler = None       # DeadlineScheduler (rapid) or ReplayClock (recorded timing)
+        self.tracer = None          # core.tracing.Tracer when playback is being traced
+        self.config = None          # core.runconfig.LiveConfig the run follows
+        self.humanizer = Humanizer() # Random delays/offsets (set from the config at Start)
+        self._lap = 0.0             # Start of the phase being traced
+
+        # Progress counters, written only by the run's own thread
+        self.actions = 0
+        self.repetition = 0
+        self.step = 0
+
+    @property
+    def status(self):
+        if self.outcome:
+            return self.outcome
+        if self.thread is None:
+            return "pending"
+        return "paused" if self.control.paused else "running"
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def stop(self):
+        self.control.stop()
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def join(self, timeout=None):
+        """Waits for the thread to exit. Returns True if it has."""
+        if self.thread is not None:
+            self.thread.join(timeout)
+        return not self.is_alive()
+
+    def stats(self):
+        out = {
+            "id": self.id, "kind": self.kind, "label": self.label, "status": self.status,
+            "actions": self.actions, "repetition": self.repetition, "step": self.step,
+        }
+        if self.config is not None:
+            out["config_version"] = self.config.version
+        if self.scheduler is not None:
+            out.update(self.scheduler.stats())
+        return out
+
+    def count_action(self, n=1):
+        """Bumps the action counters and this run's achieved-rate gauge."""
+        self.actions += n
+        self._actions_metric.inc(n)
+        elapsed = self.control.clock() - self.started
+        if elapsed > 0:
+            self._rate_metric.set(self.actions / elapsed)
+
+    def configure(self, config):
+        """Follows `config` (a LiveConfig), humanized by its profile and seed."""
+        self.config = config
+        opts = config.current
+        self.humanizer = Humanizer(opts.get("humanize", DEFAULT_PROFILE), opts.get("seed"), key=self.label)
+        # The streams it starts out drawing from get their first samples now, before its clock starts
+        self.humanizer.prepare(*humanize_streams(self.kind, opts))
+
+    def trace(self, tracer):
+        """Records this run's spans into `tracer` (None to stop tracing), on its own lane."""
+        self.tracer = tracer
+        if tracer is not None:
+            tracer.lane(self.id, self.label)
+
+    def _start_metrics(self):
+        self.started = self.control.clock()
+        self._actions_metric = ACTIONS.labels(kind=self.kind)
+        self._rate_metric = RATE.labels(run=self.label)
+
+    def _run(self, target, args):
+        self._start_metrics()
+        try:
+            target(self, *args)
+            self.outcome = "stopped" if self.control.stopped else "finished"
+        except Exception as e:
+            self.error = e
+            self.outcome = "failed"
+            ERRORS.inc(where="run")
+            print(f"{self.label} run failed: {e}")
+        finally:
+            self.ended_at = time.perf_counter()
+
+
+class ClickerEngine:
+    """Starts and tracks runs. Safe to call from any thread."""
+
+    def __init__(self, backend=None):
+        self.input = InputDispatcher(backend or "null")
+        self.tracer = None          # Set to a core.tracing.Tracer to trace runs started from now on
+        self._runs = []
+        self._lock = threading.Lock()
+
+    def use_backend(self, backend):
+        """Switches the backend for subsequent injection (resolved now, so errors surface at Start)."""
+        self.input.use(backend)
+
+    def start_sequence(self, program, options=None, label=None):
+        """`options` is a dict over DEFAULT_SEQUENCE_OPTIONS, or a LiveConfig shared with other runs."""
+        return self._start("sequence", label or program.group, sequence_config(options), _perform_sequence, (program,))
+
+    def start_rapid(self, cps, label="Rapid Fire"):
+        """`cps` is a number, or a LiveConfig from rapid_config() to change it mid-run."""
+        return self._start("rapid", label, rapid_config(cps), _perform_rapid, ())
+
+    def _start(self, kind, label, config, target, args):
+        run = RunHandle(kind, label, self.input)
+        run.configure(config)
+        run.trace(self.tracer)
+        run.thread = threading.Thread(target=run._run, args=(target, args), name=f"clicker-{kind}-{run.id}")
+        run.thread.daemon = True
+        with self._lock:
+            self._runs = [r for r in self._runs if r.is_alive()]
+            self._runs.append(run)
+        run.thread.start()
+        return run
+
+    def runs(self):
+        """Runs whose threads are still alive."""
+        with self._lock:
+            return [r for r in self._runs if r.is_alive()]
+
+    def stop_all(self):
+        for run in self.runs():
+            run.stop()
+
+    def pause_all(self):
+        for run in self.runs():
+            run.pause()
+
+    def resume_all(self):
+        for run in self.runs():
+            run.resume()
+
+    def join_all(self, timeout=None):
+        """Waits for every run to exit. Returns True if they all have."""
+        return all(run.join(timeout) for run in self.runs())
+
+    def shutdown(self):
+        """Stops every run and waits briefly for the threads to exit."""
+        self.stop_all()
+        self.join_all(1.0)
+
+
+# --- Run Bodies (executed on each run's own thread) ---
+
+def _perform_rapid(run):
+    control, inp, live = run.control, run.input, run.config
+    cfg = live.current
+    batch, spacing = burst_plan(cfg["cps"], cfg["burst"], cfg["burst_spacing"])
+    # Anti-Ban Micro-Jitter: each click (or burst) lands within ±10% of its deadline
+    # so it isn't flagged as perfect robotic input. Deadlines are absolute,
+    # so neither the jitter nor the click call latency accumulates as drift.
+    run.scheduler = scheduler = DeadlineScheduler(cfg["cps"], jitter=0.1, control=control, batch=batch,
+                                                  sample=run.humanizer.sampler("tick"))
+
+    while control.checkpoint():
+        if batch == 1:
+            inp.click()
+        else:
+            inp.burst(batch, spacing)
+        CLICK_COUNTERS[CLICK_LEFT].inc(batch)
+        scheduler.fired(batch)
+        run.count_action(batch)
+        if live.current is not cfg: # CPS changed in the UI
+            cfg = live.current
+            batch, spacing = burst_plan(cfg["cps"], cfg["burst"], cfg["burst_spacing"])
+            scheduler.retarget(cfg["cps"], batch)
+        if not scheduler.wait_next():
+            break
+        SCHEDULE_LATENESS["rapid"].observe(scheduler.lateness[-1])
+
+
+def _sequence_settings(opts, replay):
+    """The live sequence options the playback follows:
+    (interval, repetitions, random_delay, jitter, move_duration, move_curve)."""
+    duration = opts["move_duration"]
+    if replay is not None:
+        replay.fallback = opts["interval"]
+        duration = 0 # The glide toward each step fills the gap before it instead
+    return (opts["interval"], opts["repetitions"], opts["random_delay"],
+            opts["jitter"], duration, opts["move_curve"])
+
+
+class _SequencePlayback:
+    """Everything about playing a sequence that doesn't wait or inject: the step
+    order, live options, replay deadlines, cooldowns and per-step bookkeeping.
+
+    Both engines drive one of these and only do the waiting and injecting
+    themselves (blocking on the run's thread, or awaiting on the event loop).
+    """
+
+    def __init__(self, run, program):
+        self.run = run
+        self.program = program
+        opts = run.config.current
+        # Recorded timing: each step is due at its (scaled) place on the recorded timeline
+        self.replay = None
+        if opts["timing"] == "recorded":
+            run.scheduler = self.replay = ReplayClock(opts["speed"], opts["max_gap"], opts["interval"], run.control)
+        self._apply(opts)
+        self._step_start = 0.0
+
+    def _apply(self, opts):
+        self.opts = opts
+        (self.interval, self.repetitions, self.random_delay,
+         self.jitter, self.duration, self.curve) = _sequence_settings(opts, self.replay)
+
+    def steps(self):
+        """Yields (op tuple, recorded offset) for every step of every repetition.
+
+        The engine stops iterating to end the run early (stopped mid-pass).
+        """
+        run, control, replay = self.run, self.run.control, self.replay
+        # Iterating the program (not .steps) lets a StreamedProgram re-read its file each pass
+        while not control.stopped and run.repetition < self.repetitions:
+            played = run.actions
+            if replay: replay.restart()
+            steps = self.program.timeline() if replay else ((step, None) for step in self.program)
+            for run.step, step in enumerate(steps):
+                yield step
+            if control.stopped or run.actions == played: break # Stopped, or nothing to play
+            run.repetition += 1
+
+    def begin_step(self):
+        """Call once the step may go ahead (past the pause checkpoint)."""
+        run = self.run
+        if run.config.current is not self.opts: # Settings changed in the UI: applied from this step on
+            self._apply(run.config.current)
+        if run.tracer: self._step_start = run._lap = time.perf_counter()
+
+    def replay_target(self, offset, op):
+        """The step's deadline on the recorded timeline, and how long to glide toward it (0: no glide)."""
+        target = self.replay.target(offset)
+        glide = round(target - self.run.control.clock(), 3)
+        return target, glide if op in (OP_CLICK, OP_SCROLL) and glide > 0 else 0
+
+    def replay_reached(self, target):
+        """Records that the step due at `target` is starting."""
+        _lap(self.run, SPAN_WAIT)
+        self.replay.settle(target)
+        SCHEDULE_LATENESS["recorded"].observe(self.replay.behind)
+
+    def cooldown(self):
+        """Deadline of the cooldown after the step just played (None on recorded timing)."""
+        if self.replay:
+            return None
+        wait = self.interval
+        if self.random_delay:
+            wait += self.run.humanizer.delay(RANDOM_DELAY)
+        return self.run.control.clock() + max(0.01, wait)
+
+    def end_step(self, deadline=None, reached=False):
+        """Closes the step; `deadline` is its cooldown's, `reached` whether the wait ran out (not stopped)."""
+        run = self.run
+        if deadline is not None:
+            if reached:
+                SCHEDULE_LATENESS["interval"].observe(max(0.0, run.control.clock() - deadline))
+            _lap(run, SPAN_SLEEP)
+        if run.tracer: run.tracer.add(SPAN_STEP, self._step_start, time.perf_counter(), run.id, run.step)
+
+
+# Shared by both engines' step bodies
+
+def _jittered(run, x, y, jitter):
+    """Where a step actually lands: (x, y) moved by a Spirit Jitter offset."""
+    if jitter:
+        dx, dy = run.humanizer.offset(jitter)
+        return x + dx, y + dy
+    return x, y
+
+
+def _plan_move(run, start, end, duration, curve):
+    """plan_path() from `start` (just read off the backend), with the humanized
+    variant drawn from the run's Humanizer so seeded runs repeat."""
+    _lap(run, SPAN_POSITION)
+    variant = run.humanizer.variant(HUMANIZED_VARIANTS) if curve == "humanized" else 0
+    path = plan_path(start, end, duration, curve, variant)
+    _lap(run, SPAN_PLAN)
+    return path
+
+
+def _moved(run, overshoot):
+    _lap(run, SPAN_MOVE)
+    OVERSHOOT.observe(max(0.0, overshoot))
+
+
+def _land_and_click(inp, x, y, kind):
+    """Lands and clicks without another run moving the cursor in between."""
+    with inp.exclusive:
+        inp.move(x, y)
+        if kind == CLICK_LEFT: inp.click()
+        elif kind == CLICK_RIGHT: inp.click(button="right")
+        elif kind == CLICK_DOUBLE: inp.click(clicks=2)
+        elif kind == CLICK_HOLD: inp.mouse_down()
+
+
+def _clicked(run, kind):
+    CLICK_COUNTERS[kind].inc()
+    _lap(run, SPAN_CLICK)
+
+
+def _lap(run, span):
+    """Traces the phase that ran since the run's previous lap (no-op unless tracing)."""
+    tracer = run.tracer
+    if tracer is not None:
+        now = time.perf_counter()
+        tracer.add(span, run._lap, now, run.id, run.step)
+        run._lap = now
+
+
+def _perform_sequence(run, program):
+    control = run.control
+    playback = _SequencePlayback(run, program)
+    for (op, x, y, kind, hold, key), offset in playback.steps():
+        # Blocks here while paused, so Resume picks up at this very step
+        if not control.checkpoint(): break
+        playback.begin_step()
+        if playback.replay and not _await_step(run, playback, offset, op, x, y): break
+
+        if op == OP_CLICK:
+            _do_click(run, x, y, kind, hold, playback.jitter, playback.duration, playback.curve)
+        elif op == OP_KEY:
+            _do_keystroke(run, key)
+        elif op == OP_SCROLL:
+            _do_scroll(run, x, y, key, playback.jitter, playback.duration, playback.curve)
+        run.count_action()
+
+        # Sequence Delays
+        deadline = playback.cooldown()
+        playback.end_step(deadline, deadline is not None and wait_until(deadline, control))
+
+
+def _await_step(run, playback, offset, op, x, y):
+    """Waits for a step's deadline on the recorded timeline, gliding toward its
+    position meanwhile. Returns False if stopped first."""
+    target, glide = playback.replay_target(offset, op)
+    if glide:
+        path = _plan_move(run, run.input.position(), (x, y), glide, playback.curve)
+        moved = play_path(run.input, path, run.control, t0=target - glide)
+        _lap(run, SPAN_MOVE)
+        if moved is None:
+            return False
+    if not wait_until(target, run.control):
+        return False
+    playback.replay_reached(target)
+    return True
+
+
+def _do_click(run, x, y, kind, hold_duration=0.0, jitter=0, duration=0.5, curve="linear"):
+    control, inp = run.control, run.input
+    try:
+        # --- SPIRIT JITTER LOGIC ---
+        final_x, final_y = _jittered(run, x, y, jitter)
+
+        # Move Sequence
+        if duration > 0:
+            path = _plan_move(run, inp.position(), (final_x, final_y), duration, curve)
+            overshoot = play_path(inp, path, control)
+            if overshoot is None:
+                return # Break out immediately
+            _moved(run, overshoot)
+        if control.stopped: return
+
+        _land_and_click(inp, final_x, final_y, kind)
+        _clicked(run, kind)
+        if kind == CLICK_HOLD:
+            control.sleep(hold_duration or 1.0)
+            inp.mouse_up() # Always release, even if stopped mid-hold
+            _lap(run, SPAN_HOLD)
+
+    except Exception as e:
+        ERRORS.inc(where="click")
+        print(f"Click execution failed: {e}")
+
+
+def _do_scroll(run, x, y, amount, jitter=0, duration=0.5, curve="linear"):
+    _do_click(run, x, y, CLICK_MOVE_ONLY, 0.0, jitter, duration, curve)
+    if run.control.stopped: return
+    try:
+        run.input.scroll(amount)
+        _lap(run, SPAN_SCROLL)
+    except Exception as e:
+        ERRORS.inc(where="scroll")
+        print(f"Scroll execution failed: {e}")
+
+
+def _do_keystroke(run, key):
+    if run.control.stopped: return
+    try:
+        run.input.press(key)
+        _lap(run, SPAN_KEY)
+    except Exception:
+        ERRORS.inc(where="keystroke")
@@ -5,15 +5,13 @@ def init_groups(state):
 
 def get_all_groups(state):
     """Returns a clean, sorted list of all active and empty groups."""
-    groups = set()
-    for loc in state.get("saved_locations", []):
-        if loc.get("group"):
-            groups.add(loc["group"])
+    store = state.get("saved_locations")
+    groups = set(store.group_names()) if store else set()
     
     if "empty_groups" in state:
         groups.update(state["empty_groups"])
         
-    return sorted(list(groups))
+    return sorted(groups)
 
 def create_new_group(state, group_name):
     """Data logic for creating a group. Returns True if successful."""
@@ -27,13 +25,12 @@ def create_new_group(state, group_name):
     state["empty_groups"].add(group_name)
     return True
 
-def assign_to_group(state, location_names, group_name):
-    """Assigns a list of location names to a specific group."""
-    count = 0
-    for loc in state.get("saved_locations", []):
-        if loc["name"] in location_names:
-            loc["group"] = group_name
-            count += 1
+def assign_to_group(state, step_ids, group_name):
+    """Assigns the steps with these ids to a specific group. Returns how many there were."""
+    store = state["saved_locations"]
+    ids = [i for i in step_ids if i in store]
+    store.set_group(ids, group_name)
+    count = len(ids)
             
     # If the group now has items, it is no longer empty
     if count > 0 and group_name in state.get("empty_groups", set()):
@@ -43,15 +40,10 @@ def assign_to_group(state, location_names, group_name):
 
 def remove_from_group(state, location_names):
     """Strips the group assignment from the provided locations."""
-    groups_to_check = set()
-    
-    # Remove groups
-    for loc in state.get("saved_locations", []):
-        if loc["name"] in location_names and loc.get("group"):
-            groups_to_check.add(loc["group"])
-            loc["group"] = "" # Clear the group
+    store = state["saved_locations"]
+    groups_to_check = store.set_group(store.ids_for_names(location_names), "")
             
     # Check if we accidentally emptied a group, and preserve it
     for group in groups_to_check:
-        if not any(loc.get("group") == group for loc in state.get("saved_locations", [])):
-            state["empty_groups"].add(group)
\ No newline at end of file
+        if group and not store.group_size(group):
+            state["empty_groups"].add(group)
@@ -0,0 +1,325 @@
+"""
+Humanization: the random offsets and delays that keep playback from looking robotic.
+
+Every run draws from its own Humanizer, which hands out pre-generated
+samples from a few named streams:
+
+    delay    sequence cooldowns (Random Delay)
+    tick     rapid fire's deadline jitter
+    offset   Spirit Jitter's pixel offsets (two per click)
+    variant  which cached path a "humanized" mouse move takes
+
+Samples are generated a block at a time, vectorized with NumPy when it is
+installed (plain `random` otherwise), and the next block is filled on a
+background thread while the current one is used up. A stream's small first
+block is made in plain Python as the stream is created, so a run never waits
+on the refill thread (or on NumPy's import) for its first samples. Taking a
+sample is a list index, so humanization costs the hot paths next to nothing.
+
+What each stream draws from is set by a humanization profile: a distribution
+per stream, plus an optional default seed. Seeded runs are reproducible: the
+same seed, run label and profile give the same samples, refills or not (with
+the same NumPy-or-not setup). Profiles and distributions are pluggable:
+
+    register_distribution("bimodal", lambda draw, n, gap=0.5: ...)
+    register_profile("mine", {"offset": {"dist": "bimodal"}, "seed": 7})
+    Humanizer("mine").offset(3)
+"""
+import queue
+import random
+import threading
+import zlib
+
+DEFAULT_PROFILE = "classic"
+BLOCK_SIZE = 4096           # Samples generated per stream per refill
+FIRST_BLOCK = 1024          # Samples in the first block, made synchronously (~1 ms in plain Python)
+STREAMS = ("delay", "tick", "offset", "variant")
+
+_np = None
+
+
+def _numpy():
+    """The numpy module, imported on first use, or False if it isn't installed."""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = False
+    return _np
+
+
+# --- Random primitives ---
+# Distributions are written once against these; each returns n floats (a NumPy
+# array or a list) and `draw.rng` is the underlying generator for anything else.
+
+class _NumpyDraw:
+    def __init__(self, np, seed):
+        self.np = np
+        self.rng = np.random.default_rng(seed)
+
+    def uniform(self, n, low=-1.0, high=1.0):
+        return self.rng.uniform(low, high, n)
+
+    def normal(self, n, sigma=1.0, mu=0.0):
+        return self.rng.normal(mu, sigma, n)
+
+    def lognormal(self, n, sigma=1.0):
+        return self.rng.lognormal(0.0, sigma, n)
+
+    def affine(self, values, scale=1.0, shift=0.0):
+        return values * scale + shift
+
+    def clip(self, values, low, high):
+        return self.np.clip(values, low, high)
+
+    def tolist(self, values):
+        return values.tolist()
+
+
+class _PyDraw:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def uniform(self, n, low=-1.0, high=1.0):
+        u = self.rng.uniform
+        return [u(low, high) for _ in range(n)]
+
+    def normal(self, n, sigma=1.0, mu=0.0):
+        g = self.rng.gauss
+        return [g(mu, sigma) for _ in range(n)]
+
+    def lognormal(self, n, sigma=1.0):
+        g = self.rng.lognormvariate
+        return [g(0.0, sigma) for _ in range(n)]
+
+    def affine(self, values, scale=1.0, shift=0.0):
+        return [v * scale + shift for v in values]
+
+    def clip(self, values, low, high):
+        return [low if v < low else high if v > high else v for v in values]
+
+    def tolist(self, values):
+        return list(values)
+
+
+def _make_draw(seed, vectorized=True):
+    """Generator for a _stream_seed() (None: fresh entropy), on NumPy when it's installed and `vectorized`."""
+    np = _numpy() if vectorized else False
+    if np:
+        return _NumpyDraw(np, list(seed) if seed is not None else None)
+    return _PyDraw("/".join(map(str, seed)) if seed is not None else None)
+
+
+# --- Distributions ---
+# Samples are on a unit scale, mostly within [-1, 1]; callers multiply them by
+# their own range (±0.5 s, ±10% of a tick, the jitter radius in pixels).
+
+def _uniform(draw, n):
+    return draw.uniform(n)
+
+
+def _gaussian(draw, n, sigma=0.4):
+    return draw.normal(n, sigma)
+
+
+def _lognormal(draw, n, sigma=0.5, scale=0.5, limit=1.0):
+    # exp(N) - 1 has its median at 0 and a long positive tail: mostly on time,
+    # now and then noticeably late, like a person's reaction time
+    return draw.clip(draw.affine(draw.lognormal(n, sigma), scale, -scale), -1.0, limit)
+
+
+def _clamped(draw, n, sigma=0.5, limit=1.0):
+    return draw.clip(draw.normal(n, sigma), -limit, limit)
+
+
+def _drifting(draw, n, low=0.2, high=0.6, bias=0.1):
+    # The spread and centre wander from block to block, so no single window of
+    # samples has the same statistics as the next one
+    sigma = draw.rng.uniform(low, high)
+    centre = draw.rng.uniform(-bias, bias)
+    return draw.clip(draw.normal(n, sigma, centre), -1.0, 1.0)
+
+
+DISTRIBUTIONS = {
+    "uniform": _uniform,
+    "gaussian": _gaussian,
+    "lognormal": _lognormal,
+    "clamped": _clamped,
+    "drifting": _drifting,
+}
+
+# Stream -> {"dist": name, **params}; streams left out draw uniformly. "seed" is the
+# profile's own default seed (None: fresh entropy every run).
+PROFILES = {
+    "classic": {}, # What the engines always did: uniform everywhere
+    "natural": {
+        "delay": {"dist": "lognormal"},
+        "tick": {"dist": "clamped", "sigma": 0.4},
+        "offset": {"dist": "gaussian", "sigma": 0.4},
+    },
+    "drifting": {
+        "delay": {"dist": "drifting", "bias": 0.2},
+        "tick": {"dist": "drifting"},
+        "offset": {"dist": "drifting", "low": 0.25, "high": 0.7},
+    },
+}
+
+
+def register_distribution(name, fn):
+    """Adds a distribution: fn(draw, n, **params) -> n unit-scale samples.
+
+    `draw` offers uniform(n, low, high), normal(n, sigma, mu), lognormal(n, sigma),
+    affine(values, scale, shift) and clip(values, low, high) over whichever
+    backend is in use, and `draw.rng` for anything else.
+    """
+    DISTRIBUTIONS[name] = fn
+
+
+def register_profile(name, streams):
+    """Adds (or replaces) a humanization profile: {stream: {"dist": ..., **params}, "seed": ...}."""
+    for stream, spec in streams.items():
+        if stream != "seed" and spec.get("dist", "uniform") not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution '{spec['dist']}' for stream '{stream}'")
+    PROFILES[name] = dict(streams)
+
+
+# --- Sample streams ---
+
+class _Stream:
+    """Pre-generated samples of one stream: the block in use and the next one, filled in the background."""
+
+    def __init__(self, spec, seed, block_size):
+        spec = dict(spec)
+        self._dist = DISTRIBUTIONS[spec.pop("dist", "uniform")]
+        self._params = spec
+        self._seed = seed
+        self._draw = None           # Made on the refill thread, which also pays for importing NumPy
+        self._block_size = block_size
+        # The first block is made here, in plain Python and from a seed of its own
+        # (so the refills don't repeat it when NumPy is missing)
+        first = _make_draw(seed + ("first",) if seed is not None else None, vectorized=False)
+        self._block = first.tolist(self._dist(first, min(FIRST_BLOCK, block_size), **self._params))
+        self._i = 0
+        self._next = None
+        self._ready = threading.Event()
+        _refill(self)
+
+    def _generate(self):
+        if self._draw is None:
+            self._draw = _make_draw(self._seed)
+        return self._draw.tolist(self._dist(self._draw, self._block_size, **self._params))
+
+    def _fill(self):
+        self._next = self._generate()
+        self._ready.set()
+
+    def take(self):
+        i = self._i
+        if i >= len(self._block):
+            # Blocks are produced strictly in order from the one generator,
+            # so seeded runs see the same samples however the refills are timed
+            self._ready.wait()
+            self._ready.clear()
+            self._block, self._next = self._next, None
+            _refill(self)
+            i = 0
+        self._i = i + 1
+        return self._block[i]
+
+
+_pending = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _refill(stream):
+    """Queues `stream` for its next block on the shared refill thread."""
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_refill_loop, name="humanize-refill", daemon=True)
+                _worker.start()
+    _pending.put(stream)
+
+
+def _refill_loop():
+    while True:
+        stream = _pending.get()
+        try:
+            stream._fill()
+        except Exception as e:
+            print(f"Humanization refill failed: {e}")
+            stream._next = [0.0] * stream._block_size # Keep the run going, unhumanized
+            stream._ready.set()
+
+
+def warm_up():
+    """Imports NumPy in the background, so the first humanized run doesn't wait for it."""
+    threading.Thread(target=_numpy, name="humanize-warmup", daemon=True).start()
+
+
+def _stream_seed(seed, key, stream):
+    """A stable per-stream seed (None stays None: fresh entropy)."""
+    if seed is None:
+        return None
+    return (int(seed) & 0xFFFFFFFF, zlib.crc32(str(key).encode()), zlib.crc32(stream.encode()))
+
+
+class Humanizer:
+    """One run's source of humanized delays and offsets.
+
+    `key` (e.g. the run label) keeps runs sharing a seed from drawing
+    identical samples. `seed` None uses the profile's own seed, if it has one.
+    """
+
+    def __init__(self, profile=DEFAULT_PROFILE, seed=None, key="", block_size=BLOCK_SIZE):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown humanization profile '{profile}'. Choose from: {', '.join(PROFILES)}")
+        spec = PROFILES[profile]
+        self.profile = profile
+        self.seed = seed if seed is not None else spec.get("seed")
+        self._block_size = block_size
+        self._streams = {}          # Stream name -> its take()
+        self._specs = {name: spec.get(name, {"dist": "uniform"}) for name in STREAMS}
+        self._key = key
+
+    def sampler(self, name):
+        """The stream's next-sample function, for hot loops (e.g. sampler("tick") per rapid-fire tick)."""
+        take = self._streams.get(name)
+        if take is None:
+            # Made on first use: a rapid run never pays for the offset/delay blocks
+            stream = _Stream(self._specs[name], _stream_seed(self.seed, self._key, name), self._block_size)
+            take = self._streams[name] = stream.take
+        return take
+
+    def prepare(self, *names):
+        """Creates these streams now (first block included), e.g. before a run's clock starts."""
+        for name in names:
+            self.sampler(name)
+
+    def delay(self, spread):
+        """A cooldown adjustment of about ±spread seconds."""
+        return self.sampler("delay")() * spread
+
+    def offset(self, radius):
+        """(dx, dy) pixel offset, each within ±radius."""
+        take = self.sampler("offset")
+        # Scaled to ±(radius + 0.5) so rounding gives every pixel an equal share under "uniform"
+        scale = radius + 0.5
+        dx = round(take() * scale)
+        dy = round(take() * scale)
+        if not (-radius <= dx <= radius):
+            dx = radius if dx > 0 else -radius
+        if not (-radius <= dy <= radius):
+            dy = radius if dy > 0 else -radius
+        return dx, dy
+
+    def variant(self, n):
+        """An index in range(n), e.g. which of core.trajectory's humanized paths to take."""
+        i = int((self.sampler("variant")() + 1.0) * 0.5 * n)
+        if not (0 <= i < n):
+            i = n - 1 if i > 0 else 0
+        return i
@@ -0,0 +1,198 @@
+"""
+Journaled Grimoire profiles.
+
+A profile is its normal JSON array (the base snapshot) plus an append-only
+JSONL journal next to it (`<profile>.journal`). Each edit appends one small
+operation instead of rewriting the whole file; loading replays the journal on
+top of the base, and compaction folds it back in once it grows too long.
+The base file is always a plain Grimoire (JSON, or the binary .btcg format if
+the path says so), so other tools can still read it.
+
+Operations reference steps by their stable "id":
+    {"op": "add", "step": {...}}
+    {"op": "add", "steps": [{...}, ...]}          (a batch, e.g. a recorded macro)
+    {"op": "update", "id": 7, "fields": {"name": "...", ...}}
+    {"op": "delete", "ids": [3, 4]}
+    {"op": "group", "ids": [5, 6], "group": "Farming"}
+    {"op": "clear"}
+"""
+import os
+import json
+import threading
+
+from core.settings import load_locations, load_profile, save_profile, atomic_write_json
+
+JOURNAL_SUFFIX = ".journal"
+DEFAULT_COMPACT_THRESHOLD = 500
+
+
+def ensure_step_ids(locations, next_id=1):
+    """Gives every step without an "id" a fresh one. Returns (next free id, number assigned)."""
+    assigned = 0
+    for loc in locations:
+        if isinstance(loc.get("id"), int):
+            next_id = max(next_id, loc["id"] + 1)
+    for loc in locations:
+        if not isinstance(loc.get("id"), int):
+            loc["id"] = next_id
+            next_id += 1
+            assigned += 1
+    return next_id, assigned
+
+
+def apply_op(locations, op, index=None):
+    """Applies one journal operation in place. Returns the (possibly new) list of steps.
+
+    `index` maps id -> step dict and is kept up to date; pass the same dict across
+    a replay to keep every op O(1) (delete is O(n)). "add" is an upsert, so replaying
+    ops the base already includes (a crash mid-compaction) converges to the same state.
+    """
+    if index is None:
+        index = {loc.get("id"): loc for loc in locations}
+    kind = op.get("op")
+    if kind == "add":
+        for step in op["steps"] if "steps" in op else (op["step"],):
+            existing = index.get(step.get("id"))
+            if existing is not None:
+                existing.clear()
+                existing.update(step)
+            else:
+                loc = dict(step)
+                locations.append(loc)
+                index[loc.get("id")] = loc
+    elif kind == "update":
+        loc = index.get(op["id"])
+        if loc is not None:
+            loc.update(op["fields"])
+    elif kind == "delete":
+        ids = set(op["ids"])
+        locations = [loc for loc in locations if loc.get("id") not in ids]
+        for i in ids:
+            index.pop(i, None)
+    elif kind == "group":
+        for i in op["ids"]:
+            loc = index.get(i)
+            if loc is not None:
+                loc["group"] = op["group"]
+    elif kind == "clear":
+        locations = []
+        index.clear()
+    else:
+        print(f"Ignoring unknown journal op: {kind}")
+    return locations
+
+
+def _as_list(profile):
+    """Editable list of step dicts from whatever load_profile returned."""
+    if isinstance(profile, list):
+        return profile
+    try:
+        return list(profile)
+    finally:
+        profile.close()
+
+
+class JournaledProfile:
+    """Base snapshot + append-only journal for one profile path."""
+
+    def __init__(self, path, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.compact_threshold = compact_threshold
+        # Ops are numbered as they are appended; the base includes everything up to base_seq
+        self.seq = 0
+        self.base_seq = 0
+        self._lock = threading.Lock()          # Appends, and swapping in a new base
+        self._compact_lock = threading.Lock()  # One compaction at a time
+
+    def load(self):
+        """Base snapshot with the journal replayed on top."""
+        locations = _as_list(load_profile(self.path))
+        self.seq = self.base_seq = 0
+        if not os.path.exists(self.journal_path):
+            return locations
+
+        index = {loc.get("id"): loc for loc in locations}
+        good_bytes = 0
+        with open(self.journal_path, 'rb') as f:
+            for raw in f:
+                try:
+                    op = json.loads(raw) if raw.endswith(b"\n") else None
+                except ValueError:
+                    op = None
+                if op is None:
+                    break
+                locations = apply_op(locations, op, index)
+                self.seq += 1
+                good_bytes += len(raw)
+
+        if good_bytes < os.path.getsize(self.journal_path):
+            # A torn final entry from a crash mid-append; cut it so new appends start clean
+            print("Journal ends in a partial entry; discarding it.")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good_bytes)
+        return locations
+
+    def append(self, op):
+        """Appends one operation. O(1) in the size of the profile."""
+        line = json.dumps(op, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.journal_path, 'a') as f:
+                f.write(line)
+            self.seq += 1
+
+    @property
+    def pending_ops(self):
+        """Operations in the journal that the base doesn't include yet."""
+        return self.seq - self.base_seq
+
+    @property
+    def needs_compaction(self):
+        return self.pending_ops >= self.compact_threshold
+
+    def compact(self, locations, upto_seq=None):
+        """Writes `locations` as the new base and drops the journal ops it includes.
+
+        `locations` must reflect every op up to `upto_seq` (default: all of them, i.e.
+        the current `seq`); ops appended after that snapshot stay in the journal.
+        The snapshot is written outside the append lock, so edits (append) only
+        wait for the rename and the journal trim, not for the whole write.
+        """
+        with self._compact_lock:
+            if upto_seq is None:
+                upto_seq = self.seq
+            root, ext = os.path.splitext(self.path)
+            tmp_base = root + ".compacting" + ext # Same suffix, so save_profile picks the same format
+            save_profile(locations, tmp_base)
+            with self._lock:
+                os.replace(tmp_base, self.path)
+                drop = upto_seq - self.base_seq
+                remaining = []
+                if upto_seq < self.seq and os.path.exists(self.journal_path):
+                    with open(self.journal_path, 'r') as f:
+                        remaining = f.readlines()[drop:]
+                if remaining:
+                    tmp = self.journal_path + ".tmp"
+                    with open(tmp, 'w') as f:
+                        f.writelines(remaining)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp, self.journal_path)
+                elif os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                self.base_seq = upto_seq
+
+    # --- Plain JSON interchange ---
+
+    def export_json(self, out_path):
+        """Writes the current profile as a plain JSON array."""
+        atomic_write_json(self.load(), out_path)
+
+    def import_json(self, in_path):
+        """Replaces the profile with a plain JSON array file and clears the journal."""
+        locations = load_locations(in_path)
+        ensure_step_ids(locations)
+        with self._lock:
+            self.base_seq = self.seq
+        self.compact(locations)
+        return locations
@@ -0,0 +1,278 @@
+"""
+Run metrics: counters, gauges and histograms the engines update as they play,
+exportable as JSON or Prometheus text format.
+
+Every metric takes a short lock per update, so any thread can read a
+consistent snapshot while runs are going. Labels are passed as keyword
+arguments (CLICKS.inc(type="left")); each distinct label set is its own series.
+Hot paths bind a label set once with labels() to skip the per-call key build.
+
+    from core import metrics
+    metrics.export(json_path="metrics.json", prom_path="metrics.prom")
+    exporter = metrics.MetricsExporter("metrics.json", "metrics.prom", interval=10).start()
+"""
+import json
+import time
+import threading
+from bisect import bisect_left
+
+from core.settings import atomic_write
+
+# Seconds; covers backend calls (~10 µs) up to long overshoots
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+EXPORT_INTERVAL = 10.0      # Default period of MetricsExporter (s)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _prom_escape(value):
+    """Label value escaped as the text exposition format requires (\\, \" and \n)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_prom_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def labels(self, **labels):
+        """This metric with its labels bound: .inc()/.set()/.observe() without keywords."""
+        return _Bound(self, _label_key(labels))
+
+
+class _Bound:
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric, key):
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount=1):
+        self._metric._inc(self._key, amount)
+
+    def set(self, value):
+        self._metric._set(self._key, value)
+
+    def observe(self, value):
+        self._metric._observe(self._key, value)
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        self._inc(_label_key(labels), amount)
+
+    def _inc(self, key, amount):
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._series.get(_label_key(labels), 0)
+
+    def snapshot(self):
+        with self._lock:
+            return [{"labels": dict(k), "value": v} for k, v in self._series.items()]
+
+    def prometheus(self):
+        lines = self._header()
+        for series in self.snapshot():
+            lines.append(f"{self.name}{_prom_labels(series['labels'].items())} {series['value']}")
+        return lines
+
+
+class Gauge(Counter):
+    """Last value set per label set."""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self._set(_label_key(labels), value)
+
+    def _set(self, key, value):
+        with self._lock:
+            self._series[key] = value
+
+
+class Histogram(_Metric):
+    """Bucketed distribution per label set (counts are per bucket; exports are cumulative)."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        self._observe(_label_key(labels), value)
+
+    def _observe(self, key, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count, max]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+            if value > series[3]:
+                series[3] = value
+
+    def snapshot(self):
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2], s[3]) for k, s in self._series.items()]
+        out = []
+        for key, counts, total, n, peak in items:
+            out.append({
+                "labels": dict(key), "count": n, "sum": total, "max": peak,
+                "mean": total / n if n else 0.0,
+                "p50": self._quantile(counts, n, 0.5), "p99": self._quantile(counts, n, 0.99),
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], counts)),
+            })
+        return out
+
+    def _quantile(self, counts, n, q):
+        """Upper bound of the bucket holding the q-quantile (approximate, like Prometheus)."""
+        if not n:
+            return 0.0
+        rank, seen = q * n, 0
+        for bound, c in zip(self.buckets, counts):
+            seen += c
+            if seen >= rank:
+                return bound
+        return None # Past the last bucket
+
+    def prometheus(self):
+        lines = self._header()
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2]) for k, s in self._series.items()]
+        for key, counts, total, n in items:
+            cumulative = 0
+            for bound, c in zip([str(b) for b in self.buckets] + ["+Inf"], counts):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_prom_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_prom_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_prom_labels(key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    """A named set of metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+        self.started = time.time()
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text):
+        return self._add(Counter(name, help_text))
+
+    def gauge(self, name, help_text):
+        return self._add(Gauge(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, buckets))
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.clear()
+        self.started = time.time()
+
+    def snapshot(self):
+        return {
+            "timestamp": time.time(),
+            "uptime_s": time.time() - self.started,
+            "metrics": {name: {"type": m.kind, "help": m.help, "series": m.snapshot()}
+                        for name, m in self._metrics.items()},
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.prometheus())
+        return "\n".join(lines) + "\n"
+
+
+# --- The engines' metrics ---
+
+REGISTRY = MetricsRegistry()
+
+ACTIONS = REGISTRY.counter("bustclicker_actions_total", "Actions executed, by run kind")
+CLICKS = REGISTRY.counter("bustclicker_clicks_total", "Mouse actions injected, by click type")
+RATE = REGISTRY.gauge("bustclicker_achieved_rate", "Actions per second each run has sustained so far")
+LATENESS = REGISTRY.histogram("bustclicker_schedule_lateness_seconds", "How late actions fired against their deadline")
+OVERSHOOT = REGISTRY.histogram("bustclicker_move_overshoot_seconds", "How far mouse glides ran past their planned duration")
+BACKEND_LATENCY = REGISTRY.histogram("bustclicker_backend_call_seconds", "Time spent in input backend calls, by call")
+ERRORS = REGISTRY.counter("bustclicker_errors_total", "Errors caught and swallowed during playback, by where")
+
+
+def export(json_path=None, prom_path=None, registry=REGISTRY):
+    """Writes the current metrics to either or both files (atomically)."""
+    if json_path:
+        text = registry.to_json()
+        atomic_write(json_path, lambda f: f.write(text))
+    if prom_path:
+        text = registry.to_prometheus()
+        atomic_write(prom_path, lambda f: f.write(text))
+
+
+class MetricsExporter:
+    """Re-exports the metrics every `interval` seconds on a daemon thread."""
+
+    def __init__(self, json_path=None, prom_path=None, interval=EXPORT_INTERVAL, registry=REGISTRY):
+        self.json_path = json_path
+        self.prom_path = prom_path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="metrics-export", daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.export_now()
+
+    def export_now(self):
+        try:
+            export(self.json_path, self.prom_path, self.registry)
+        except OSError as e:
+            print(f"Metrics export failed: {e}")
+
+    def stop(self, final_export=True):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        if final_export:
+            self.export_now()
@@ -0,0 +1,119 @@
+"""
+Compiles Grimoire locations into a flat action program before playback,
+so the playback loop never touches the location dicts or compares strings.
+
+Steps may carry timing for recorded-timeline replay: "timestamp" is the
+step's offset in seconds from the start of the recording, "delay" the
+seconds since the previous step. A timestamp wins when both are present.
+"""
+from itertools import repeat
+
+# --- Op codes ---
+OP_NOP = 0      # Unknown/broken step: keeps its place (and its delay) but does nothing
+OP_CLICK = 1
+OP_KEY = 2
+OP_SCROLL = 3    # Key slot carries the wheel amount
+
+# --- Click kinds ---
+CLICK_MOVE_ONLY = 0
+CLICK_LEFT = 1
+CLICK_RIGHT = 2
+CLICK_DOUBLE = 3
+CLICK_HOLD = 4
+
+CLICK_KINDS = {
+    "Left": CLICK_LEFT,
+    "Right": CLICK_RIGHT,
+    "Double": CLICK_DOUBLE,
+    "Hold": CLICK_HOLD,
+    "Move": CLICK_MOVE_ONLY, # Path points from continuous recording
+}
+CLICK_NAMES = {kind: name for name, kind in CLICK_KINDS.items()}
+
+
+class Program:
+    """Immutable compiled sequence.
+
+    `steps` is a tuple of (op, x, y, click_kind, hold_duration, key) tuples,
+    ready to be unpacked straight into the playback loop. `times` holds each
+    step's offset on the recorded timeline (None where a step has no timing).
+    """
+    __slots__ = ("steps", "names", "group", "times")
+
+    def __init__(self, steps, names, group, times=None):
+        object.__setattr__(self, "steps", tuple(steps))
+        object.__setattr__(self, "names", tuple(names))
+        object.__setattr__(self, "group", group)
+        object.__setattr__(self, "times", tuple(times) if times is not None else None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Program is immutable")
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def timeline(self):
+        """(step, offset) pairs for recorded-timeline replay."""
+        return zip(self.steps, self.times if self.times is not None else repeat(None))
+
+
+def compile_step(loc):
+    """Turns a single location dict into its op tuple."""
+    atype = loc.get("action_type", "click")
+    if atype == "click":
+        try:
+            x, y = int(loc.get("x", 0)), int(loc.get("y", 0))
+        except (TypeError, ValueError):
+            print(f"Skipping '{loc.get('name')}': bad coordinates")
+            return (OP_NOP, 0, 0, CLICK_MOVE_ONLY, 0.0, None)
+        kind = CLICK_KINDS.get(loc.get("click_type", "Left"), CLICK_MOVE_ONLY)
+        hold = float(loc.get("hold_duration", 1.0) or 1.0) if kind == CLICK_HOLD else 0.0
+        return (OP_CLICK, x, y, kind, hold, None)
+    if atype == "keystroke":
+        return (OP_KEY, 0, 0, CLICK_MOVE_ONLY, 0.0, loc.get("key"))
+    if atype == "scroll":
+        try:
+            x, y, amount = int(loc.get("x", 0)), int(loc.get("y", 0)), int(loc.get("amount", 0))
+        except (TypeError, ValueError):
+            print(f"Skipping '{loc.get('name')}': bad scroll step")
+            return (OP_NOP, 0, 0, CLICK_MOVE_ONLY, 0.0, None)
+        return (OP_SCROLL, x, y, CLICK_MOVE_ONLY, 0.0, amount)
+    return (OP_NOP, 0, 0, CLICK_MOVE_ONLY, 0.0, None)
+
+
+def step_offsets(timings):
+    """Yields each step's offset on the recorded timeline from its (timestamp, delay) pair.
+
+    Steps with neither yield None; a delay counts from the last timed step.
+    """
+    last = None
+    for ts, delay in timings:
+        if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+            last = float(ts)
+        elif isinstance(delay, (int, float)) and not isinstance(delay, bool):
+            last = (last or 0.0) + float(delay)
+        else:
+            yield None
+            continue
+        yield last
+
+
+def step_timing(loc):
+    return loc.get("timestamp"), loc.get("delay")
+
+
+def compile_sequence(locations, group="All Groups"):
+    """Filters locations by group and compiles them into a Program."""
+    if hasattr(locations, "compile_program"):
+        return locations.compile_program(group) # BinaryProfile: straight from the records
+    if group != "All Groups":
+        locations = [x for x in locations if x.get("group", "") == group]
+    return Program(
+        (compile_step(loc) for loc in locations),
+        (loc.get("name", "") for loc in locations),
+        group,
+        step_offsets(step_timing(loc) for loc in locations),
+    )
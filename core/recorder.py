@@ -1,12 +1,19 @@
+import time
+import importlib.util
 from tkinter import messagebox
 
-try:
-    from pynput import mouse
-    HAS_PYNPUT = True
-except ImportError:
-    HAS_PYNPUT = False
+from core.capture import EventRing, build_steps, EV_MOVE, EV_DOWN, EV_UP, EV_SCROLL, EV_KEY
+
+# pynput is imported on the first recording rather than at startup
+HAS_PYNPUT = importlib.util.find_spec("pynput") is not None
+if not HAS_PYNPUT:
     print("pynput module not found. Recording will be disabled.")
 
+def _pynput():
+    """(mouse, keyboard) from pynput, importing it on first use."""
+    from pynput import mouse, keyboard
+    return mouse, keyboard
+
 def setup_recorder(app):
     """Set up the recorder functionality"""
     if not HAS_PYNPUT:
@@ -18,6 +25,9 @@ def start_recording(app):
     if not HAS_PYNPUT:
         messagebox.showinfo("Info", "Recording requires pynput. Run: pip install pynput")
         return
+    continuous_var = app.state.get("continuous_record")
+    if continuous_var and continuous_var.get():
+        return _start_continuous(app)
         
     app.state["status_msg"].set("Recording mode active. Click on screen to capture location.")
     
@@ -27,10 +37,11 @@ def start_recording(app):
             return True  # Continue listening
         
         # Route the data back to the main thread securely
-        app.root.after(0, lambda: _save_recorded_location(app, x, y))
+        app.ui_queue.post(_save_recorded_location, app, x, y)
         return False  # Stop the listener thread entirely
         
     # Start the background listener
+    mouse, _ = _pynput()
     app.record_listener = mouse.Listener(on_click=on_click)
     app.record_listener.daemon = True
     app.record_listener.start()
@@ -43,6 +54,7 @@ def _save_recorded_location(app, x, y):
     grp = state.get("group_filter").get()
     
     new_location = {
+        "id": app.next_step_id(),
         "name": f"Location {state['location_counter']}",
         "x": int(x),  # Ensure x/y are clean integers
         "y": int(y),
@@ -53,14 +65,117 @@ def _save_recorded_location(app, x, y):
     }
     
     # Update State
-    state["saved_locations"].append(new_location)
+    state["saved_locations"].add(new_location)
     state["location_counter"] += 1
     state["is_recording"] = False
     
     # Trigger App-level callbacks to handle the UI and Saving
     app.ui.update_record_button(recording=False)
     app.ui.refresh_location_list()
-    app.auto_save()
+    app.commit_change({"op": "add", "step": new_location})
     
     # Update the status bar
-    state["status_msg"].set(f"Scribed Location at X: {int(x)}, Y: {int(y)}")
\ No newline at end of file
+    state["status_msg"].set(f"Scribed Location at X: {int(x)}, Y: {int(y)}")
+
+def stop_recording(app):
+    """Ends recording. A continuous session is simplified and saved as a new group."""
+    session = getattr(app, "record_session", None)
+    if session is None:
+        app.state["status_msg"].set("Recording stopped.")
+        return
+    app.record_session = None
+    for listener in session["listeners"]:
+        listener.stop()
+
+    ring = session["ring"]
+    steps = build_steps(ring.snapshot(), ignore_click=_inside_window(app))
+    if not steps:
+        app.state["status_msg"].set("Recording stopped. Nothing was captured.")
+        return
+    _save_recorded_macro(app, steps, len(ring), ring.dropped)
+
+# --- Continuous Recording ---
+
+# pynput key names that differ from the names pyautogui.press() expects
+_KEY_NAMES = {
+    "alt_l": "altleft", "alt_r": "altright", "alt_gr": "altright",
+    "ctrl_l": "ctrlleft", "ctrl_r": "ctrlright",
+    "shift_l": "shiftleft", "shift_r": "shiftright",
+    "cmd": "win", "cmd_l": "winleft", "cmd_r": "winright",
+    "caps_lock": "capslock", "num_lock": "numlock", "scroll_lock": "scrolllock",
+    "page_up": "pageup", "page_down": "pagedown", "print_screen": "printscreen",
+    "media_play_pause": "playpause", "media_next": "nexttrack", "media_previous": "prevtrack",
+    "media_volume_up": "volumeup", "media_volume_down": "volumedown", "media_volume_mute": "volumemute",
+}
+
+def _key_name(key):
+    """(backend key name, hotkey-style name) for a pynput key, or (None, None)."""
+    if getattr(key, "char", None) is not None:
+        return key.char, key.char.upper()
+    name = getattr(key, "name", None)
+    if name is None:
+        return None, None
+    return _KEY_NAMES.get(name, name), name.upper()
+
+def _start_continuous(app):
+    """Captures moves, clicks, scrolls and keys until recording is stopped."""
+    ring = EventRing()
+    clock = time.perf_counter
+    hotkeys = set(app.state.get("hotkeys", {}).values())
+
+    def on_move(x, y):
+        ring.append(clock(), EV_MOVE, x, y)
+
+    def on_click(x, y, button, pressed):
+        ring.append(clock(), EV_DOWN if pressed else EV_UP, x, y, button.name)
+
+    def on_scroll(x, y, dx, dy):
+        ring.append(clock(), EV_SCROLL, x, y, int(dy))
+
+    def on_press(key):
+        name, hotkey_name = _key_name(key)
+        if name and hotkey_name not in hotkeys: # The app's own hotkeys aren't part of the macro
+            ring.append(clock(), EV_KEY, data=name)
+
+    mouse, keyboard = _pynput()
+    listeners = [
+        mouse.Listener(on_move=on_move, on_click=on_click, on_scroll=on_scroll),
+        keyboard.Listener(on_press=on_press),
+    ]
+    for listener in listeners:
+        listener.daemon = True
+        listener.start()
+    app.record_session = {"ring": ring, "listeners": listeners}
+    app.state["status_msg"].set("Continuous recording... Press Record again to finish the macro.")
+
+def _inside_window(app):
+    """Click filter that drops clicks on the clicker's own window (e.g. the Stop Rec button)."""
+    try:
+        x0, y0 = app.root.winfo_rootx(), app.root.winfo_rooty()
+        w, h = app.root.winfo_width(), app.root.winfo_height()
+    except Exception:
+        return None
+    return lambda x, y: x0 <= x < x0 + w and y0 <= y < y0 + h
+
+def _save_recorded_macro(app, steps, raw_events, dropped):
+    """Names the recorded steps, files them under a new group and saves them."""
+    state = app.state
+    taken = set(state["saved_locations"].group_names()) | state.get("empty_groups", set())
+    n = 1
+    while f"Macro {n}" in taken:
+        n += 1
+    group = f"Macro {n}"
+
+    for step in steps:
+        step["id"] = app.next_step_id()
+        step["name"] = f"Location {state['location_counter']}"
+        step["group"] = group
+        state["location_counter"] += 1
+    # One store update and one journal entry for the whole macro, however long it is
+    state["saved_locations"].extend(steps)
+    app.commit_change({"op": "add", "steps": steps})
+
+    app.ui.refresh_groups_dropdown()
+    app.ui.refresh_location_list()
+    note = f" ({dropped} oldest events overflowed)" if dropped else ""
+    state["status_msg"].set(f"Scribed {group}: {len(steps)} steps from {raw_events} events{note}")
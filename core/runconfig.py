@@ -0,0 +1,76 @@
+"""
+Run configuration handed from the UI to the engines.
+
+Start reads the Tk variables once, on the Tk thread, into an immutable
+RunConfig; runs never touch Tk. Settings changed while runs are going are
+published through the run's LiveConfig, which swaps in a new RunConfig with
+a higher version. Runs pick it up between steps (or rapid-fire ticks) with a
+single identity check, so nothing is read mid-step or locked on the hot path.
+
+    live = LiveConfig({"interval": 1.0, "jitter": 0}, live_keys=("interval",))
+    live.publish(interval=0.5)      # Any thread; returns the new version
+    opts = live.current             # Run side: RunConfig, version 1
+"""
+import threading
+from collections.abc import Mapping
+
+
+class RunConfig(Mapping):
+    """Read-only options mapping with the version it was published as."""
+    __slots__ = ("_values", "version")
+
+    def __init__(self, values, version=0):
+        object.__setattr__(self, "_values", dict(values))
+        object.__setattr__(self, "version", version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RunConfig is immutable")
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"RunConfig(v{self.version}, {self._values})"
+
+    def replace(self, **changes):
+        """A new RunConfig with `changes` applied and the next version."""
+        values = dict(self._values)
+        values.update(changes)
+        return RunConfig(values, self.version + 1)
+
+
+class LiveConfig:
+    """The current RunConfig of one Start, shared by all of its runs.
+
+    Only `live_keys` can change after Start; everything else (timing mode,
+    replay speed, ...) is fixed for the run's lifetime.
+    """
+
+    def __init__(self, options, live_keys=()):
+        self.current = RunConfig(options)
+        self.live_keys = frozenset(live_keys)
+        self._lock = threading.Lock() # Serializes publishers; readers never take it
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def publish(self, **changes):
+        """Applies the live keys among `changes` (others are ignored). Safe from any thread.
+
+        Returns the version now current; it only goes up if something actually changed.
+        """
+        with self._lock:
+            current = self.current
+            changes = {k: v for k, v in changes.items()
+                       if k in self.live_keys and (k not in current or current[k] != v)}
+            if changes:
+                # One reference assignment: a run sees either the old snapshot or the new one
+                self.current = current.replace(**changes)
+            return self.current.version
@@ -1,5 +1,6 @@
 import os
 import json
+import tempfile
 
 # --- Path setup ---
 _CORE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,17 +23,71 @@ def load_locations(config_file):
 def save_locations(locations, config_file): 
     """Save locations to file, creating directories if needed."""
     try:
-        data_dir = os.path.dirname(config_file) 
-        if data_dir:
-            os.makedirs(data_dir, exist_ok=True)
-            
-        with open(config_file, 'w') as f:
-            json.dump(locations, f, indent=2)
+        atomic_write_json(locations, config_file)
     except Exception as e:
         print(f"Failed to save locations: {e}")
         # We raise here so app.py's auto_save can catch it if it wants to
         raise 
         
+def atomic_write_json(data, path, indent=2):
+    """Writes JSON via temp file + fsync + rename, so a crash never leaves a truncated file."""
+    atomic_write(path, lambda f: json.dump(data, f, indent=indent))
+
+def atomic_write(path, write_fn, binary=False):
+    """Calls write_fn(file) on a temp file next to `path`, fsyncs it and renames it into place."""
+    data_dir = os.path.dirname(path) or "."
+    os.makedirs(data_dir, exist_ok=True)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=data_dir, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+    # Persist the rename itself (not supported for directories on Windows)
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            dir_fd = os.open(data_dir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+# --- Format-aware profile I/O ---
+
+def load_profile(path):
+    """Loads a profile in whichever format it is stored.
+    
+    JSON profiles come back as a list of dicts; binary ones (core.binprofile) as a
+    read-only, memory-mapped BinaryProfile. Call list() on it for editable dicts.
+    """
+    from core.binprofile import is_binary_profile, BinaryProfile
+    if is_binary_profile(path):
+        try:
+            return BinaryProfile(path)
+        except Exception as e:
+            print(f"Failed to load binary profile: {e}")
+            return []
+    return load_locations(path)
+
+def save_profile(locations, path):
+    """Atomically saves a profile, in the binary format if the path ends in .btcg."""
+    from core.binprofile import BINARY_SUFFIX, write_binary
+    if path.lower().endswith(BINARY_SUFFIX):
+        write_binary(locations, path)
+    else:
+        atomic_write_json(locations, path)
+        
 def load_settings(settings_file=None): 
     """Load core application settings."""
     if settings_file is None:
@@ -43,7 +98,16 @@ def load_settings(settings_file=None):
         "transparency": 0.9,
         "mouse_move_duration": 1.0,
         "default_interval": 1.0,
-        "default_repetitions": 1
+        "default_repetitions": 1,
+        "journaled_profiles": False,
+        "stream_playback": False,
+        "metrics_interval": 0, # Seconds between metrics exports to Data/metrics.json/.prom, 0 for off
+        "trace_playback": False, # Write a Chrome trace of each sequence to Data/playback_trace.json
+        "burst_spacing": 0.001, # Gap between the clicks rapid fire batches per tick above 100 CPS (s)
+        "humanize_profile": "classic", # Where random delays/offsets come from (see core.humanize.PROFILES)
+        "humanize_seed": None, # Fixed seed for reproducible runs, None for fresh randomness
+        "engine_mode": "threads", # "threads" (one per run) or "asyncio" (every run on one shared loop)
+        "input_backend": "directinput" # How clicks reach the OS (see core.backends.BACKENDS)
     } 
     
     if os.path.exists(settings_file):
@@ -0,0 +1,126 @@
+"""
+Startup profiling: where the time goes between launch and a usable window.
+
+Phases are recorded with mark() as the app comes up (always on; a mark is
+one perf_counter() call). `python main.py --profile-startup` also installs
+an import timer before anything else is imported and prints both reports
+once the Grimoire has loaded.
+"""
+import sys
+import time
+
+T0 = time.perf_counter()     # Reset by begin() at the very top of main.py
+
+_marks = []         # (phase, perf_counter)
+_imports = []       # (module, self seconds, total seconds, depth)
+
+
+def begin(t0=None):
+    """Restarts the clock (pass main.py's own first timestamp to include its imports)."""
+    global T0
+    T0 = time.perf_counter() if t0 is None else t0
+    _marks.clear()
+
+
+def mark(phase):
+    _marks.append((phase, time.perf_counter()))
+
+
+def elapsed_ms(phase):
+    """Milliseconds from launch to the first mark of `phase`, or None if it hasn't happened."""
+    for name, t in _marks:
+        if name == phase:
+            return (t - T0) * 1000
+    return None
+
+
+# --- Import Timing ---
+
+class _TimedLoader:
+    """Wraps a module loader to time exec_module, minus the time spent in nested imports."""
+
+    def __init__(self, loader, finder):
+        self._loader = loader
+        self._finder = finder
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        finder = self._finder
+        depth = len(finder.stack)
+        finder.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - start
+            children = finder.stack.pop()
+            if finder.stack:
+                finder.stack[-1] += total
+            _imports.append((module.__name__, total - children, total, depth))
+
+
+class ImportTimer:
+    """sys.meta_path hook that times every module imported while it's installed."""
+
+    def __init__(self):
+        self.stack = []     # Per nesting level: seconds spent in child imports so far
+        self._busy = False
+
+    def find_spec(self, name, path=None, target=None):
+        if self._busy:
+            return None
+        self._busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._busy = False
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+# --- Reports ---
+
+def report(top=15):
+    """Human-readable phase timeline plus the slowest imports by self time."""
+    lines = ["Startup profile (ms since launch):"]
+    last = T0
+    for phase, t in _marks:
+        lines.append(f"  {(t - T0) * 1000:8.1f}  {phase:<22} (+{(t - last) * 1000:.1f})")
+        last = t
+    if _imports:
+        total = sum(i[1] for i in _imports) * 1000
+        lines.append(f"Imports: {len(_imports)} modules, {total:.1f} ms. Slowest (self / cumulative):")
+        for name, self_s, total_s, _ in sorted(_imports, key=lambda i: -i[1])[:top]:
+            lines.append(f"  {self_s * 1000:8.1f}  {total_s * 1000:8.1f}  {name}")
+    return "\n".join(lines)
+
+
+def as_dict():
+    """The same data, for benchmarks/bench_startup.py."""
+    phases = {}
+    for phase, t in _marks:
+        phases.setdefault(phase, (t - T0) * 1000)
+    return {
+        "phases": phases,
+        "imports_ms": sum(i[1] for i in _imports) * 1000,
+        "modules": sorted(sys.modules),
+    }
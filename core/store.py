@@ -0,0 +1,155 @@
+"""
+Indexed, order-preserving store for the Grimoire's steps.
+
+state["saved_locations"] is a LocationStore. It iterates like the old list
+(in Grimoire order) and keeps id, name and group indexes up to date, so
+lookups and edits cost O(1) per step touched instead of a scan of the
+whole Grimoire. Step dicts must be changed through the store (update,
+set_group, remove) so the indexes stay right.
+"""
+from itertools import count
+
+from core.program import compile_sequence
+
+
+class LocationStore:
+    """Steps keyed by their stable "id", with name -> steps and group -> steps indexes."""
+
+    def __init__(self, locations=()):
+        self._by_id = {}        # id -> step, in Grimoire order (dicts keep insertion order)
+        self._pos = {}          # id -> position key, for ordering group members
+        self._by_name = {}      # name -> {id: step}
+        self._by_group = {}     # group -> {id: step}; groups with no steps are dropped
+        self._sorted = {}       # group -> cached list of its steps in Grimoire order
+        self._positions = count()
+        for loc in locations:
+            self.add(loc)
+
+    # --- Sequence protocol (read-only) ---
+
+    def __iter__(self):
+        return iter(list(self._by_id.values()))
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __bool__(self):
+        return bool(self._by_id)
+
+    def __contains__(self, step_id):
+        return step_id in self._by_id
+
+    # --- Lookups ---
+
+    def get(self, step_id):
+        return self._by_id.get(step_id)
+
+    def find_by_name(self, name):
+        """First step with this name, or None."""
+        return next(iter(self._by_name.get(name, {}).values()), None)
+
+    def ids_for_names(self, names):
+        """Ids of every step whose name is in `names`, in Grimoire order. O(len(names) + matches)."""
+        ids = [i for name in set(names) for i in self._by_name.get(name, ())]
+        ids.sort(key=self._pos.__getitem__)
+        return ids
+
+    def in_group(self, group):
+        """Steps of one group in Grimoire order ("All Groups" for every step)."""
+        if group == "All Groups":
+            return list(self._by_id.values())
+        steps = self._sorted.get(group)
+        if steps is None:
+            members = self._by_group.get(group, {})
+            steps = sorted(members.values(), key=lambda loc: self._pos[loc["id"]])
+            self._sorted[group] = steps
+        return list(steps)
+
+    def group_names(self):
+        """Groups that currently have at least one step (not including "")."""
+        return [g for g in self._by_group if g]
+
+    def group_size(self, group):
+        return len(self._by_group.get(group, ()))
+
+    def compile_program(self, group="All Groups"):
+        """Program for one group, without scanning the other groups' steps."""
+        return compile_sequence(self.in_group(group), group)
+
+    # --- Mutations ---
+
+    def add(self, loc):
+        """Appends a step (it must have an "id"). Re-adding an existing id replaces it in place."""
+        step_id = loc["id"]
+        if step_id in self._by_id:
+            self._unindex(self._by_id[step_id])
+        else:
+            self._pos[step_id] = next(self._positions)
+        self._by_id[step_id] = loc
+        self._index(loc)
+        return loc
+
+    def extend(self, locs):
+        """Appends several steps in one go (see add). Returns them as a list."""
+        locs = list(locs)
+        for loc in locs:
+            self.add(loc)
+        return locs
+
+    def update(self, step_id, fields):
+        """Applies `fields` to one step, re-indexing its name/group if they change."""
+        loc = self._by_id.get(step_id)
+        if loc is None:
+            return None
+        self._unindex(loc)
+        loc.update(fields)
+        self._index(loc)
+        return loc
+
+    def set_group(self, step_ids, group):
+        """Moves steps into `group` ("" for none). Returns the groups they left."""
+        left = set()
+        for step_id in step_ids:
+            loc = self._by_id.get(step_id)
+            if loc is None or loc.get("group", "") == group:
+                continue
+            left.add(loc.get("group", ""))
+            self.update(step_id, {"group": group})
+        return left
+
+    def remove(self, step_ids):
+        """Deletes steps by id. Returns the removed step dicts."""
+        removed = []
+        for step_id in step_ids:
+            loc = self._by_id.pop(step_id, None)
+            if loc is not None:
+                self._unindex(loc)
+                del self._pos[step_id]
+                removed.append(loc)
+        return removed
+
+    def clear(self):
+        self._by_id.clear()
+        self._pos.clear()
+        self._by_name.clear()
+        self._by_group.clear()
+        self._sorted.clear()
+
+    # --- Index upkeep ---
+
+    def _index(self, loc):
+        step_id = loc["id"]
+        self._by_name.setdefault(loc.get("name"), {})[step_id] = loc
+        group = loc.get("group", "")
+        self._by_group.setdefault(group, {})[step_id] = loc
+        self._sorted.pop(group, None)
+
+    def _unindex(self, loc):
+        step_id = loc["id"]
+        for index, key in ((self._by_name, loc.get("name")), (self._by_group, loc.get("group", ""))):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(step_id, None)
+                if not bucket:
+                    del index[key]
+        self._sorted.pop(loc.get("group", ""), None)
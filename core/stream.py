@@ -0,0 +1,167 @@
+"""
+Streaming playback straight from a profile file.
+
+Instead of compiling the whole Grimoire up front, a StreamedProgram pulls
+steps lazily through a generator pipeline:
+
+    file -> parse one step at a time -> group filter -> compile -> read-ahead
+
+Parsing and compilation run on a helper thread that keeps a bounded buffer
+of compiled steps ahead of playback, so the first step is ready in
+milliseconds and memory stays flat however long the profile is. Every
+repetition re-reads the file from the start.
+"""
+import json
+import queue
+import threading
+from itertools import tee
+
+from core.program import compile_step, step_offsets, step_timing
+
+READ_AHEAD = 256            # Compiled steps buffered ahead of playback
+CHUNK_SIZE = 64 * 1024      # Bytes read from a JSON profile at a time
+
+_WHITESPACE = " \t\r\n"
+
+
+def iter_json_steps(path, chunk_size=CHUNK_SIZE):
+    """Yields the step dicts of a JSON profile one at a time, without loading the whole array."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf, pos, eof = "", 0, False
+        expect = "open"     # open -> first -> (item -> sep)* -> done
+
+        while True:
+            # Skip whitespace, refilling the buffer when it runs out
+            while True:
+                while pos < len(buf) and buf[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+            if pos >= len(buf):
+                if expect == "open":
+                    return # Empty file
+                raise ValueError("Profile ends before its closing ']'")
+
+            ch = buf[pos]
+            if expect == "open":
+                if ch != "[":
+                    raise ValueError("Profile is not a JSON array")
+                pos, expect = pos + 1, "first"
+            elif ch == "]" and expect in ("first", "sep"):
+                return
+            elif expect == "sep":
+                if ch != ",":
+                    raise ValueError(f"Expected ',' in profile, found {ch!r}")
+                pos, expect = pos + 1, "item"
+            else:
+                # Decode one step; if it runs off the end of the buffer, read more and retry
+                while True:
+                    try:
+                        item, end = decoder.raw_decode(buf, pos)
+                        if end < len(buf) or eof:
+                            break
+                    except ValueError:
+                        if eof:
+                            raise
+                    more = f.read(chunk_size)
+                    buf, pos, eof = buf[pos:] + more, 0, not more
+                yield item
+                pos, expect = end, "sep"
+
+
+def iter_steps(path):
+    """Yields step dicts from a profile in either format."""
+    from core.binprofile import is_binary_profile, BinaryProfile
+    if is_binary_profile(path):
+        with BinaryProfile(path) as profile:
+            yield from profile
+    else:
+        yield from iter_json_steps(path)
+
+
+def filter_group(locations, group):
+    if group == "All Groups":
+        return locations
+    return (loc for loc in locations if loc.get("group", "") == group)
+
+
+def read_ahead(iterable, size=READ_AHEAD):
+    """Runs `iterable` on a helper thread, keeping up to `size` items buffered.
+
+    Errors on the producer side are re-raised to the consumer. Closing the
+    generator (or dropping it) stops the producer at its next item.
+    """
+    buffer = queue.Queue(size)
+    done = threading.Event()
+
+    def put(entry):
+        while not done.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        it = iter(iterable)
+        try:
+            for item in it:
+                if not put((True, item)):
+                    return
+            put((False, None))
+        except Exception as e:
+            put((False, e))
+        finally:
+            close = getattr(it, "close", None)
+            if close:
+                close()
+
+    threading.Thread(target=produce, name="profile-read-ahead", daemon=True).start()
+    try:
+        while True:
+            ok, item = buffer.get()
+            if not ok:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        done.set()
+
+
+class StreamedProgram:
+    """Program-like view of a profile file that compiles steps as playback reaches them.
+
+    Iterating it starts a fresh pass over the file, so the engines' repetition
+    loop re-reads from the top each time.
+    """
+
+    def __init__(self, path, group="All Groups", read_ahead_size=READ_AHEAD):
+        self.path = path
+        self.group = group
+        self.read_ahead_size = read_ahead_size
+
+    def _compiled(self):
+        """(step, (timestamp, delay)) pairs, read and compiled as they're needed."""
+        from core.binprofile import is_binary_profile, BinaryProfile
+        if is_binary_profile(self.path):
+            # Packed records compile without building dicts (or decoding names)
+            with BinaryProfile(self.path) as profile:
+                for step, _, timing in profile.iter_compiled(self.group, names=False):
+                    yield step, timing
+        else:
+            for loc in filter_group(iter_json_steps(self.path), self.group):
+                yield compile_step(loc), step_timing(loc)
+
+    def __iter__(self):
+        return read_ahead((step for step, _ in self._compiled()), self.read_ahead_size)
+
+    def timeline(self):
+        """(step, offset) pairs for recorded-timeline replay, streamed like __iter__."""
+        steps, timings = tee(self._compiled()) # Consumed in lockstep, so tee buffers one item
+        pairs = zip((step for step, _ in steps), step_offsets(timing for _, timing in timings))
+        return read_ahead(pairs, self.read_ahead_size)
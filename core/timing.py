@@ -0,0 +1,306 @@
+import sys
+import time
+import threading
+from collections import deque
+
+from core.humanize import Humanizer
+
+# --- Wait tuning ---
+# Event/lock timeouts are only accurate to the OS timer tick (~15.6 ms on Windows),
+# so the cancellable coarse wait stops this far short of the deadline...
+COARSE_MARGIN = 0.02 if sys.platform == "win32" else 0.002
+# ...fine sleeps cover the middle, and the final stretch is spun out on the clock.
+SPIN_THRESHOLD = 0.0005
+# A plain sleep can't be woken, so the middle is slept in slices this long,
+# checking for Stop/Pause between them (time.sleep is high-resolution on 3.11+)
+FINE_SLEEP = 0.001
+
+# How many lateness samples a scheduler keeps for percentile reporting
+LATENESS_SAMPLES = 10000
+
+
+class RunControl:
+    """Stop/pause state for a run, and the one primitive every wait in it is built on.
+
+    Waits block on a Condition, so they cost no CPU and wake the moment stop()
+    or pause() is called. clock() is perf_counter with paused time cut out, so a
+    deadline expressed on it keeps its remaining delay across a pause.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.reset()
+
+    def reset(self):
+        with self._cond:
+            self._stopped = False
+            self._paused_at = None
+            self._paused_total = 0.0
+            self._cond.notify_all()
+
+    def clock(self):
+        paused_at = self._paused_at
+        if paused_at is not None:
+            return paused_at - self._paused_total
+        return time.perf_counter() - self._paused_total
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    @property
+    def paused(self):
+        return self._paused_at is not None
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def pause(self):
+        with self._cond:
+            if self._paused_at is None and not self._stopped:
+                self._paused_at = time.perf_counter()
+                self._cond.notify_all()
+
+    def resume(self):
+        with self._cond:
+            if self._paused_at is not None:
+                self._paused_total += time.perf_counter() - self._paused_at
+                self._paused_at = None
+                self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """Blocks up to `timeout`, returning early on stop or pause. Returns True if stopped."""
+        with self._cond:
+            if not self._stopped and self._paused_at is None:
+                self._cond.wait(timeout)
+            return self._stopped
+
+    def checkpoint(self):
+        """Blocks while paused. Returns False if the run has been stopped."""
+        with self._cond:
+            while self._paused_at is not None and not self._stopped:
+                self._cond.wait()
+            return not self._stopped
+
+    def sleep(self, duration):
+        """Pause-aware sleep. Returns False if the run was stopped first."""
+        return wait_until(self.clock() + duration, self)
+
+
+def wait_until(deadline, control=None):
+    """Blocks until `deadline` and returns True, or returns False if stopped first.
+
+    With a RunControl the deadline is on control.clock(), otherwise on time.perf_counter().
+    """
+    if control is None:
+        remaining = deadline - time.perf_counter()
+        if remaining > SPIN_THRESHOLD:
+            time.sleep(remaining - SPIN_THRESHOLD)
+        while time.perf_counter() < deadline:
+            pass
+        return True
+
+    clock = control.clock
+    while True:
+        if not control.checkpoint():
+            return False
+        remaining = deadline - clock()
+        if remaining <= 0:
+            return True
+
+        if remaining > COARSE_MARGIN:
+            # Coarse phase: wakes immediately on Stop or Pause
+            if control.wait(remaining - COARSE_MARGIN):
+                return False
+        elif remaining > SPIN_THRESHOLD:
+            time.sleep(min(remaining - SPIN_THRESHOLD, FINE_SLEEP))
+        else:
+            # Spin phase: burn the last fraction of a millisecond on the clock
+            # (a pause freezes the clock, so drop back to the checkpoint if one lands)
+            while clock() < deadline:
+                if control.paused:
+                    break
+            else:
+                return True
+
+
+class DeadlineScheduler:
+    """Paces a loop against absolute deadlines on the monotonic clock.
+
+    Tick n is due at start + n * period. Jitter is applied around each deadline
+    rather than added to the previous wait, so it never compounds into drift.
+    With `batch` > 1 every tick stands for that many actions (rapid fire's
+    bursts), so ticks come batch times less often for the same rate.
+    `sample` supplies the jitter as unit-scale draws: the run's
+    Humanizer.sampler("tick"), or an unseeded classic one by default.
+    """
+
+    def __init__(self, rate, jitter=0.0, control=None, batch=1, sample=None):
+        if sample is None and jitter:
+            sample = Humanizer().sampler("tick")
+        self.sample = sample
+        self.batch = batch
+        self.period = batch / max(0.1, rate)
+        self.jitter = jitter  # Fraction of the period, e.g. 0.1 for ±10%
+        self.control = control
+        self.clock = control.clock if control is not None else time.perf_counter
+        self.lateness = deque(maxlen=LATENESS_SAMPLES)
+        self.start()
+
+    def start(self):
+        self.t0 = self.began = self.clock()
+        self.ticks = 0
+        self.sent = 0       # Actions reported through fired()
+        self.first_sent = 0 # ...and the first batch of them, with when it and the latest went out
+        self.first_at = self.last_at = self.began
+        self.missed = 0
+        self.late_total = 0.0
+        self.late_max = 0.0
+        self.lateness.clear()
+
+    def retarget(self, rate, batch=1):
+        """Changes the rate (and batch) from the next tick on, keeping that tick's deadline where it was."""
+        period = batch / max(0.1, rate)
+        # Shift t0 so t0 + ticks * period still lands on the current tick
+        self.t0 += self.ticks * (self.period - period)
+        self.period = period
+        self.batch = batch
+
+    def fired(self, actions):
+        """Counts actions actually sent this tick, for the achieved rate."""
+        now = self.clock()
+        if not self.sent:
+            self.first_sent, self.first_at = actions, now
+        self.sent += actions
+        self.last_at = now
+
+    def wait_next(self):
+        """Sleeps until the next tick is due. Returns False if the run was stopped."""
+        target = self.next_target()
+        if not wait_until(target, self.control):
+            self.ticks -= 1
+            return False
+        self.settle(target)
+        return True
+
+    # wait_next split in two, for callers that do their own waiting (e.g. the asyncio engine)
+    def next_target(self):
+        """Advances to the next tick and returns its (jittered) deadline."""
+        self.ticks += 1
+        target = self.t0 + self.ticks * self.period
+        if self.jitter:
+            target += self.sample() * self.jitter * self.period
+        return target
+
+    def settle(self, target):
+        """Records how late the tick due at `target` fired."""
+        late = self.clock() - target
+        self._record_lateness(late)
+
+        # Hopelessly behind (e.g. a slow click call): re-anchor instead of bursting to catch up
+        if late > self.period:
+            skipped = int(late / self.period)
+            self.missed += skipped
+            self.t0 += skipped * self.period
+
+    def _record_lateness(self, late):
+        late = max(0.0, late)
+        self.lateness.append(late)
+        self.late_total += late
+        if late > self.late_max:
+            self.late_max = late
+
+    def stats(self):
+        """Snapshot of how well the schedule was held so far."""
+        samples = sorted(self.lateness)
+        if self.sent:
+            # The first batch goes out at t=0, so it opens the window rather than counting in it
+            done, elapsed = self.sent - self.first_sent, self.last_at - self.first_at
+        else:
+            # Callers that don't report fired() get one per tick, each a period after the start
+            done, elapsed = self.ticks, self.clock() - self.began
+        return {
+            "target_cps": self.batch / self.period,
+            "achieved_cps": done / elapsed if elapsed > 0 else 0.0,
+            "batch": self.batch,
+            "tick_hz": 1.0 / self.period,
+            "ticks": self.ticks,
+            "missed": self.missed,
+            "late_mean_ms": (self.late_total / self.ticks * 1000) if self.ticks else 0.0,
+            "late_p99_ms": (samples[int(len(samples) * 0.99) - 1] * 1000) if samples else 0.0,
+            "late_max_ms": self.late_max * 1000,
+        }
+
+
+# Replay speed multipliers the UI offers
+SPEED_RANGE = (0.25, 20.0)
+
+
+class ReplayClock:
+    """Maps a recorded timeline (per-step offsets in seconds) onto absolute playback deadlines.
+
+    The gap between consecutive recorded steps is divided by `speed`; gaps longer
+    than `max_gap` (recorded seconds) are cut down to it first. Steps without
+    timing are spaced `fallback` seconds apart. Deadlines never re-anchor, so
+    stats() reports how far behind the recorded timeline playback fell.
+    """
+
+    def __init__(self, speed=1.0, max_gap=None, fallback=1.0, control=None):
+        self.speed = min(max(speed, SPEED_RANGE[0]), SPEED_RANGE[1])
+        self.max_gap = max_gap
+        self.fallback = fallback
+        self.control = control
+        self.clock = control.clock if control is not None else time.perf_counter
+        self.lateness = deque(maxlen=LATENESS_SAMPLES)
+        self.steps = 0
+        self.behind = 0.0           # Lateness of the most recent step
+        self.late_total = 0.0
+        self.late_max = 0.0
+        self.compressed = 0.0       # Recorded idle time cut by max_gap
+        self.restart()
+
+    def restart(self):
+        """Begins a new pass over the timeline, starting now."""
+        self.t0 = self.clock()
+        self._due = 0.0             # Playback seconds from t0 to the current step
+        self._last = None           # Recorded offset of the last timed step
+        self._first = True
+
+    def target(self, offset):
+        """Advances to the next step and returns its deadline. `offset` is None for untimed steps."""
+        if offset is None:
+            delta = 0.0 if self._first else self.fallback
+        else:
+            gap = 0.0 if self._last is None else max(0.0, offset - self._last)
+            if self.max_gap is not None and gap > self.max_gap:
+                self.compressed += gap - self.max_gap
+                gap = self.max_gap
+            self._last = offset
+            delta = 0.0 if self._first else gap / self.speed
+        self._first = False
+        self._due += delta
+        return self.t0 + self._due
+
+    def settle(self, target):
+        """Records how far behind its deadline the step at `target` started."""
+        late = max(0.0, self.clock() - target)
+        self.behind = late
+        self.steps += 1
+        self.lateness.append(late)
+        self.late_total += late
+        if late > self.late_max:
+            self.late_max = late
+
+    def stats(self):
+        samples = sorted(self.lateness)
+        return {
+            "speed": self.speed,
+            "steps": self.steps,
+            "behind_ms": self.behind * 1000,
+            "late_mean_ms": (self.late_total / self.steps * 1000) if self.steps else 0.0,
+            "late_p99_ms": (samples[int(len(samples) * 0.99) - 1] * 1000) if samples else 0.0,
+            "late_max_ms": self.late_max * 1000,
+            "compressed_s": self.compressed,
+        }
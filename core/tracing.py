@@ -0,0 +1,134 @@
+"""
+Opt-in span tracing of sequence playback, exported as Chrome Trace Event JSON
+(open in chrome://tracing or https://ui.perfetto.dev).
+
+Spans go into columns preallocated up front; recording one is a slot grab
+and five array stores, with no allocation. Runs trace on their own lane
+(tid = run id), one "step" span per Grimoire step with its phases
+(position, plan, move, click, ...) nested inside.
+"""
+import json
+import time
+import itertools
+from array import array
+
+from core.settings import atomic_write
+
+DEFAULT_CAPACITY = 1 << 17      # Spans kept; later ones are counted as dropped
+
+# --- Span names ---
+SPAN_STEP = 0       # One whole step, including its cooldown
+SPAN_POSITION = 1   # Reading the cursor position
+SPAN_PLAN = 2       # Path interpolation
+SPAN_MOVE = 3       # Playing the path
+SPAN_CLICK = 4      # Final move + click call
+SPAN_HOLD = 5       # Hold click's press duration
+SPAN_KEY = 6        # Keystroke call
+SPAN_SCROLL = 7     # Wheel call
+SPAN_SLEEP = 8      # Cooldown between steps
+SPAN_WAIT = 9       # Waiting for a step's deadline on the recorded timeline
+SPAN_NAMES = ("step", "position", "plan", "move", "click", "hold", "keystroke", "scroll", "sleep", "wait")
+
+
+class Tracer:
+    """Fixed-capacity span buffer shared by every traced run."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._start = array('d', bytes(8 * capacity))
+        self._end = array('d', bytes(8 * capacity))
+        self._name = bytearray(capacity)
+        self._tid = array('I', bytes(4 * capacity))
+        self._step = array('i', bytes(4 * capacity))
+        self._slots = itertools.count()     # next() is atomic under the GIL: no lock needed
+        self._used = None                   # Frozen slot count once export starts
+        self.lanes = {}                     # tid -> label (run group)
+        self.t0 = time.perf_counter()
+
+    def add(self, name, start, end, tid, step=-1):
+        i = next(self._slots)
+        if i < self.capacity:
+            self._start[i] = start
+            self._end[i] = end
+            self._name[i] = name
+            self._tid[i] = tid
+            self._step[i] = step
+
+    def lane(self, tid, label):
+        self.lanes[tid] = label
+
+    def _count(self):
+        if self._used is None:
+            self._used = next(self._slots)
+        return self._used
+
+    @property
+    def dropped(self):
+        return max(0, self._count() - self.capacity)
+
+    def spans(self):
+        """(name, start, end, tid, step) tuples of everything recorded, in recording order."""
+        n = min(self._count(), self.capacity)
+        names = SPAN_NAMES
+        return [(names[self._name[i]], self._start[i], self._end[i], self._tid[i], self._step[i])
+                for i in range(n)]
+
+    # --- Export ---
+
+    def chrome_events(self):
+        us = lambda t: round((t - self.t0) * 1e6, 3)
+        events = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": label}}
+                  for tid, label in self.lanes.items()]
+        for name, start, end, tid, step in self.spans():
+            event = {"name": name, "cat": "playback", "ph": "X", "pid": 1, "tid": tid,
+                     "ts": us(start), "dur": round((end - start) * 1e6, 3)}
+            if step >= 0:
+                event["args"] = {"step": step}
+            events.append(event)
+        return events
+
+    def summary(self, top=5):
+        """Per group: time by phase and the `top` slowest steps with their breakdown."""
+        pending = {}        # tid -> {phase: ms} recorded since that lane's last step span
+        groups = {}
+        for name, start, end, tid, step in self.spans():
+            ms = (end - start) * 1000
+            if name != "step":
+                # A run records its phases before the step span that encloses them
+                breakdown = pending.setdefault(tid, {})
+                breakdown[name] = breakdown.get(name, 0.0) + ms
+                continue
+            breakdown = pending.pop(tid, {})
+            g = groups.get(self.lanes.get(tid, str(tid)))
+            if g is None:
+                g = groups[self.lanes.get(tid, str(tid))] = {"steps": 0, "total_ms": 0.0, "phases_ms": {}, "slowest": []}
+            g["steps"] += 1
+            g["total_ms"] += ms
+            for phase, phase_ms in breakdown.items():
+                g["phases_ms"][phase] = g["phases_ms"].get(phase, 0.0) + phase_ms
+            g["slowest"].append((ms, step, breakdown))
+
+        for g in groups.values():
+            g["mean_step_ms"] = g["total_ms"] / g["steps"] if g["steps"] else 0.0
+            g["slowest"] = [{"step": step, "ms": ms, "phases_ms": breakdown}
+                            for ms, step, breakdown in sorted(g["slowest"], key=lambda s: -s[0])[:top]]
+        return {"spans": min(self._count(), self.capacity), "dropped": self.dropped, "groups": groups}
+
+    def write(self, path, top=5):
+        """Writes the Chrome trace (with the summary under "summary"). Returns the summary."""
+        summary = self.summary(top)
+        doc = {"traceEvents": self.chrome_events(), "displayTimeUnit": "ms", "summary": summary}
+        atomic_write(path, lambda f: json.dump(doc, f))
+        return summary
+
+
+def format_summary(summary):
+    """Short text report of Tracer.summary()."""
+    lines = [f"Trace: {summary['spans']} spans" + (f", {summary['dropped']} dropped" if summary["dropped"] else "")]
+    for group, g in summary["groups"].items():
+        phases = ", ".join(f"{name} {ms:.1f}" for name, ms in sorted(g["phases_ms"].items(), key=lambda p: -p[1]))
+        lines.append(f"{group}: {g['steps']} steps, mean {g['mean_step_ms']:.2f} ms ({phases} ms total)")
+        for s in g["slowest"]:
+            parts = ", ".join(f"{name} {ms:.2f}" for name, ms in sorted(s["phases_ms"].items(), key=lambda p: -p[1]))
+            lines.append(f"  step {s['step']}: {s['ms']:.2f} ms ({parts})")
+    return "\n".join(lines)
@@ -0,0 +1,117 @@
+"""
+Mouse trajectory planning and timed playback.
+
+Paths are generated in one vectorized pass (NumPy when available, for long
+moves) and cached per (start, end, duration, curve, variant), so repeated
+moves between the same Grimoire points cost a dictionary lookup instead of a
+fresh interpolation.
+"""
+import math
+import time
+import random
+from functools import lru_cache
+
+from core.timing import wait_until
+from core.humanize import _numpy
+
+# NumPy only pays off past this many points; shorter paths (moves under ~2s) use
+# plain Python, so NumPy isn't imported at all until a long move needs it
+NUMPY_MIN_STEPS = 120
+
+# Path points per second of move time (the old loop used 20)
+MOVE_HZ = 60
+MIN_STEPS = 5
+PATH_CACHE_SIZE = 512
+
+CURVES = ("linear", "ease", "bezier", "humanized")
+# Humanized paths are random, so a handful of variants per point pair are cached and rotated
+HUMANIZED_VARIANTS = 8
+
+
+def plan_path(start, end, duration, curve="linear", variant=0):
+    """Returns a cached (xs, ys, ts) path; ts are offsets in seconds from the move start.
+
+    `variant` (0 to HUMANIZED_VARIANTS - 1) picks which humanized path to take;
+    the engines draw it from the run's core.humanize.Humanizer.
+    """
+    if curve not in CURVES:
+        raise ValueError(f"Unknown curve '{curve}'. Choose from: {', '.join(CURVES)}")
+    variant = variant % HUMANIZED_VARIANTS if curve == "humanized" else 0
+    # Duration is keyed to the millisecond so float noise doesn't defeat the cache
+    return _plan_path(tuple(start), tuple(end), round(duration, 3), curve, variant)
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _plan_path(start, end, duration, curve, variant):
+    steps = int(max(MIN_STEPS, duration * MOVE_HZ))
+    (x0, y0), (x3, y3) = start, end
+
+    # Control points for the curved variants, pushed out perpendicular to the line
+    dx, dy = x3 - x0, y3 - y0
+    dist = math.hypot(dx, dy) or 1.0
+    nx, ny = -dy / dist, dx / dist
+    if curve == "humanized":
+        rng = random.Random(hash((start, end, variant)))
+        bend1, bend2 = rng.uniform(-0.25, 0.25) * dist, rng.uniform(-0.25, 0.25) * dist
+        along1, along2 = rng.uniform(0.2, 0.45), rng.uniform(0.55, 0.8)
+    else:
+        bend1 = bend2 = 0.15 * dist
+        along1, along2 = 1 / 3, 2 / 3
+    x1, y1 = x0 + dx * along1 + nx * bend1, y0 + dy * along1 + ny * bend1
+    x2, y2 = x0 + dx * along2 + nx * bend2, y0 + dy * along2 + ny * bend2
+
+    np = _numpy() if steps >= NUMPY_MIN_STEPS else False
+    if np:
+        u = np.arange(1, steps + 1, dtype=np.float64) / steps
+        ts = u * duration
+        s = u if curve == "linear" else u * u * (3.0 - 2.0 * u)
+        if curve in ("bezier", "humanized"):
+            a, b = (1 - s) ** 3, 3 * (1 - s) ** 2 * s
+            c, d = 3 * (1 - s) * s * s, s ** 3
+            xs = a * x0 + b * x1 + c * x2 + d * x3
+            ys = a * y0 + b * y1 + c * y2 + d * y3
+        else:
+            xs = x0 + dx * s
+            ys = y0 + dy * s
+        xs, ys = np.rint(xs).astype(int), np.rint(ys).astype(int)
+        return tuple(xs.tolist()), tuple(ys.tolist()), tuple(ts.tolist())
+
+    # Pure-Python fallback
+    us = [(i + 1) / steps for i in range(steps)]
+    ts = tuple(u * duration for u in us)
+    ss = us if curve == "linear" else [u * u * (3.0 - 2.0 * u) for u in us]
+    if curve in ("bezier", "humanized"):
+        pts = [((1 - s) ** 3, 3 * (1 - s) ** 2 * s, 3 * (1 - s) * s * s, s ** 3) for s in ss]
+        xs = tuple(round(a * x0 + b * x1 + c * x2 + d * x3) for a, b, c, d in pts)
+        ys = tuple(round(a * y0 + b * y1 + c * y2 + d * y3) for a, b, c, d in pts)
+    else:
+        xs = tuple(round(x0 + dx * s) for s in ss)
+        ys = tuple(round(y0 + dy * s) for s in ss)
+    return xs, ys, ts
+
+
+def play_path(backend, path, control=None, t0=None):
+    """Moves along `path` against absolute timestamps (on control.clock() if given).
+
+    Returns how far past its planned duration the move finished (seconds),
+    or None if it was stopped part way.
+    """
+    xs, ys, ts = path
+    move = backend.move
+    clock = control.clock if control is not None else time.perf_counter
+    if t0 is None:
+        t0 = clock()
+    for x, y, t in zip(xs, ys, ts):
+        if not wait_until(t0 + t, control):
+            return None
+        move(x, y)
+    return clock() - t0 - (ts[-1] if ts else 0.0)
+
+
+def cache_info():
+    """LRU statistics for the path cache."""
+    return _plan_path.cache_info()
+
+
+def clear_cache():
+    _plan_path.cache_clear()
@@ -0,0 +1,123 @@
+"""
+Batched hand-off from background threads (pynput listeners, runs) to the Tk thread.
+
+Instead of one root.after(0, ...) per event, producers post callbacks into a
+bounded queue and the Tk thread drains it in batches on a fixed cadence.
+Posts with a `key` coalesce: while one is waiting, newer posts with the same
+key replace its callback rather than queueing another (key repeat, status
+text, ...). Posting never blocks: plain posts take no lock (deque.append is
+atomic), keyed ones a short lock shared with the drain, so a newer post can't
+land in an entry the drain has already taken.
+"""
+import time
+import threading
+from collections import deque
+
+DRAIN_INTERVAL_MS = 15      # Tk-side drain cadence
+MAX_BATCH = 256             # Callbacks handled per drain, so a flood can't stall the UI
+DEFAULT_CAPACITY = 4096     # Pending callbacks before new posts are dropped
+LATENCY_SAMPLES = 1000
+
+
+class UIQueue:
+    """Bounded, coalescing callback queue drained by the Tk thread."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, interval_ms=DRAIN_INTERVAL_MS, max_batch=MAX_BATCH):
+        self.capacity = capacity
+        self.interval_ms = interval_ms
+        self.max_batch = max_batch
+        self._queue = deque()
+        self._keyed = {}            # key -> [fn, args] of a post still in the queue
+        self._key_lock = threading.Lock() # Guards _keyed and the entries in it
+        self._after = None
+        self._timer = None
+
+        # Diagnostics
+        self.posted = 0
+        self.handled = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.latency = deque(maxlen=LATENCY_SAMPLES)   # Seconds from post to handler start
+
+    # --- Producer side (any thread) ---
+
+    def post(self, fn, *args, key=None):
+        """Queues fn(*args) for the Tk thread. Returns False if it was dropped."""
+        if key is None:
+            return self._enqueue(None, [fn, args])
+        with self._key_lock:
+            entry = self._keyed.get(key)
+            if entry is not None:
+                entry[:] = (fn, args) # Handled once, with the newest arguments
+                self.coalesced += 1
+                return True
+            entry = [fn, args]
+            if not self._enqueue(key, entry):
+                return False
+            self._keyed[key] = entry
+            return True
+
+    def _enqueue(self, key, entry):
+        if len(self._queue) >= self.capacity:
+            self.dropped += 1
+            return False
+        self._queue.append((time.perf_counter(), key, entry))
+        self.posted += 1
+        return True
+
+    # --- Consumer side (Tk thread) ---
+
+    def start(self, after):
+        """Begins draining via `after` (e.g. root.after)."""
+        self._after = after
+        self._schedule()
+
+    def stop(self):
+        self._after = None
+
+    def _schedule(self):
+        if self._after is not None:
+            self._timer = self._after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        self.drain()
+        self._schedule()
+
+    def drain(self, limit=None):
+        """Runs up to `limit` (default max_batch) queued callbacks. Returns how many ran."""
+        limit = self.max_batch if limit is None else limit
+        ran = 0
+        while ran < limit:
+            try:
+                posted_at, key, entry = self._queue.popleft()
+            except IndexError:
+                break
+            if key is not None:
+                with self._key_lock:
+                    # Once unmapped, newer posts queue afresh instead of updating this entry
+                    self._keyed.pop(key, None)
+                    fn, args = entry
+            else:
+                fn, args = entry
+            self.latency.append(time.perf_counter() - posted_at)
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"UI callback failed: {e}")
+            ran += 1
+        self.handled += ran
+        return ran
+
+    def stats(self):
+        samples = sorted(self.latency)
+        n = len(samples)
+        return {
+            "pending": len(self._queue),
+            "posted": self.posted,
+            "handled": self.handled,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "latency_mean_ms": sum(samples) / n * 1000 if n else 0.0,
+            "latency_p99_ms": samples[min(n - 1, int(n * 0.99))] * 1000 if n else 0.0,
+            "latency_max_ms": samples[-1] * 1000 if n else 0.0,
+        }
@@ -1,11 +1,35 @@
-import tkinter as tk
-from app import AutoClickerApp
+import time
+_T_LAUNCH = time.perf_counter()
+
+import sys
+from core import startup
+
+PROFILE_FLAG = "--profile-startup"      # Print where startup time goes
+QUIT_FLAG = "--quit-after-startup"      # Exit once loaded (benchmarks/bench_startup.py)
 
 def main():
+    startup.begin(_T_LAUNCH)
+    if PROFILE_FLAG in sys.argv:
+        startup.ImportTimer().install()
+
+    import tkinter as tk
+    from app import AutoClickerApp
+    startup.mark("imports")
+
     root = tk.Tk()
     # Theme is handled inside AutoClickerApp -> AutoClickerUI
     app = AutoClickerApp(root)
+    if PROFILE_FLAG in sys.argv or QUIT_FLAG in sys.argv:
+        app.on_startup_done = lambda: _finish_profile(app)
     root.mainloop()
 
+def _finish_profile(app):
+    if QUIT_FLAG in sys.argv:
+        import json
+        print(json.dumps(startup.as_dict()))
+        app.on_closing(save=False) # A benchmark launch must not rewrite the user's Grimoire
+    else:
+        print(startup.report())
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
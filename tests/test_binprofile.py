@@ -0,0 +1,96 @@
+"""Binary .btcg profiles: lossless round-trips, and compiling straight from the records."""
+import pytest
+
+import core.binprofile as binprofile
+from core.binprofile import BinaryProfile, write_binary, json_to_binary, binary_to_json, is_binary_profile
+from core.program import compile_sequence
+from core.settings import atomic_write_json, load_locations, load_profile
+
+STEPS = [
+    {"id": 1, "name": "Location 1", "action_type": "click", "x": 10, "y": 20, "click_type": "Left",
+     "hold_duration": 1.0, "group": "Farming", "timestamp": 0.0},
+    {"id": 2, "name": "Keystroke 2", "action_type": "keystroke", "key": "space", "group": "Farming", "delay": 0.25},
+    {"id": 3, "name": "Location 3", "action_type": "click", "x": -5, "y": 7, "click_type": "Hold",
+     "hold_duration": 2.5},
+    {"id": 4, "name": "Scroll 4", "action_type": "scroll", "x": 1, "y": 2, "amount": -3, "group": "Farming"},
+    # Fields that don't fit their packed columns go through the extras
+    {"id": 5, "name": "Ünïcode ✓", "x": 1.5, "y": 2 ** 40, "click_type": "Triple", "note": {"a": [1, 2]}},
+    {"name": "No id", "group": "Boss", "delay": 1},
+    {},
+]
+
+
+@pytest.fixture
+def btcg(tmp_path):
+    path = str(tmp_path / "profile.btcg")
+    write_binary(STEPS, path)
+    return path
+
+
+def test_round_trip_is_lossless(btcg):
+    with BinaryProfile(btcg) as profile:
+        assert len(profile) == len(STEPS)
+        assert list(profile) == STEPS
+        assert profile[-1] == STEPS[-1]
+        assert profile[4] == STEPS[4]
+
+
+def test_json_conversion_round_trip(tmp_path):
+    json_path, bin_path, back = (str(tmp_path / n) for n in ("a.json", "a.btcg", "b.json"))
+    atomic_write_json(STEPS, json_path)
+    json_to_binary(json_path, bin_path)
+    assert is_binary_profile(bin_path) and not is_binary_profile(json_path)
+    binary_to_json(bin_path, back)
+    assert load_locations(back) == STEPS
+
+
+@pytest.mark.parametrize("group", ["All Groups", "Farming", "Boss", "", "Missing"])
+def test_compiled_program_matches_the_json_path(btcg, group):
+    with BinaryProfile(btcg) as profile:
+        program = compile_sequence(profile, group)
+    expected = compile_sequence(STEPS, group)
+    assert program.steps == expected.steps
+    assert program.names == expected.names
+    assert program.times == expected.times
+
+
+def test_iter_compiled_can_skip_names(btcg):
+    with BinaryProfile(btcg) as profile:
+        named = list(profile.iter_compiled())
+        unnamed = list(profile.iter_compiled(names=False))
+    assert [c[0] for c in unnamed] == [c[0] for c in named]
+    # Steps with extras (a scroll's amount, an int delay, ...) are rebuilt as dicts and keep theirs
+    assert [c[1] for c in unnamed] == ["", "", "", "Scroll 4", "Ünïcode ✓", "No id", ""]
+
+
+def test_string_cache_stays_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(binprofile, "STRING_CACHE_SIZE", 8)
+    path = str(tmp_path / "many.btcg")
+    steps = [{"id": i, "name": f"Location {i}", "x": i, "y": i} for i in range(100)]
+    write_binary(steps, path)
+    with BinaryProfile(path) as profile:
+        assert list(profile) == steps
+        assert len(profile._strings) <= 8
+
+
+def test_rejects_truncated_and_foreign_files(tmp_path, btcg):
+    short = tmp_path / "short.btcg"
+    short.write_bytes(b"BTCG")
+    with pytest.raises(ValueError):
+        BinaryProfile(str(short))
+
+    data = bytearray(open(btcg, "rb").read())
+    data[4] = 99  # Version
+    newer = tmp_path / "newer.btcg"
+    newer.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        BinaryProfile(str(newer))
+    assert load_profile(str(newer)) == []
+
+
+def test_empty_profile(tmp_path):
+    path = str(tmp_path / "empty.btcg")
+    write_binary([], path)
+    with BinaryProfile(path) as profile:
+        assert list(profile) == []
+        assert len(compile_sequence(profile)) == 0
@@ -0,0 +1,100 @@
+"""Continuous capture: the event ring, time decimation, RDP simplification and step building."""
+import math
+
+from core.capture import (EventRing, decimate, simplify_path, build_steps,
+                          EV_MOVE, EV_DOWN, EV_UP, EV_SCROLL, EV_KEY, HOLD_THRESHOLD)
+
+
+def _deviation(p, a, b):
+    """Distance from point p to the line through a and b, in pixels."""
+    (_, px, py), (_, ax, ay), (_, bx, by) = p, a, b
+    length = math.hypot(bx - ax, by - ay)
+    return abs((by - ay) * (px - ax) - (bx - ax) * (py - ay)) / length
+
+
+# --- Decimation ---
+
+def test_decimate_keeps_endpoints_and_spaces_the_rest():
+    points = [(i * 0.01, i, 0) for i in range(101)]  # 100 Hz for one second
+    kept = decimate(points, min_dt=0.1)
+    assert kept[0] == points[0] and kept[-1] == points[-1]
+    assert all(b[0] - a[0] >= 0.1 - 1e-9 for a, b in zip(kept[:-2], kept[1:-1]))
+    assert len(kept) == 11
+
+
+def test_decimate_leaves_short_paths_alone():
+    points = [(0.0, 0, 0), (0.001, 5, 5)]
+    assert decimate(points, min_dt=1.0) == points
+
+
+# --- RDP ---
+
+def test_simplify_collapses_a_straight_line():
+    points = [(i * 0.01, i * 3, i * 2) for i in range(50)]
+    assert simplify_path(points, epsilon=0.5) == [points[0], points[-1]]
+
+
+def test_simplify_keeps_corners_and_bounds_the_error():
+    # An L-shaped drag with a little hand wobble on each leg
+    leg1 = [(i * 0.01, i * 10, (i % 2)) for i in range(20)]
+    leg2 = [(0.2 + i * 0.01, 190 + (i % 2), 10 + i * 10) for i in range(20)]
+    points = leg1 + leg2
+    kept = simplify_path(points, epsilon=3.0)
+
+    assert kept[0] == points[0] and kept[-1] == points[-1]
+    assert (0.19, 190, 1) in kept  # The corner survives
+    assert len(kept) < 6
+    # Every dropped point is within epsilon of the segment that replaced it
+    for a, b in zip(kept, kept[1:]):
+        between = points[points.index(a) + 1:points.index(b)]
+        assert all(_deviation(p, a, b) <= 3.0 for p in between)
+
+
+def test_simplify_handles_a_closed_loop_and_long_paths():
+    loop = [(0.0, 0, 0), (0.1, 50, 0), (0.2, 50, 50), (0.3, 0, 0)]  # Starts and ends at one spot
+    assert simplify_path(loop, epsilon=1.0) == loop
+    # A jagged drag keeps every point; the splits run deeper than the default recursion limit
+    long_path = [(i * 0.001, i, (i % 2) * 10) for i in range(1500)]
+    assert len(simplify_path(long_path, epsilon=1.0)) == len(long_path)
+
+
+# --- Events -> Steps ---
+
+def test_build_steps_classifies_clicks():
+    events = [
+        (0.0, EV_DOWN, 10, 10, "left"), (0.05, EV_UP, 10, 10, "left"),
+        (0.15, EV_DOWN, 11, 10, "left"), (0.2, EV_UP, 11, 10, "left"),       # -> Double
+        (1.0, EV_DOWN, 50, 50, "right"), (1.05, EV_UP, 50, 50, "right"),
+        (2.0, EV_DOWN, 70, 70, "left"), (2.0 + HOLD_THRESHOLD + 0.1, EV_UP, 70, 70, "left"),
+        (3.0, EV_SCROLL, 5, 5, 1), (3.1, EV_SCROLL, 5, 5, 2),                # Merged
+        (4.0, EV_KEY, 0, 0, "space"),
+    ]
+    steps = build_steps(events)
+    assert [s.get("click_type", s["action_type"]) for s in steps] == ["Double", "Right", "Hold", "scroll", "keystroke"]
+    assert steps[2]["hold_duration"] == round(HOLD_THRESHOLD + 0.1, 3)
+    assert steps[3]["amount"] == 3
+    assert [s["timestamp"] for s in steps] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_build_steps_simplifies_moves_between_clicks():
+    events = [(0.0, EV_DOWN, 0, 0, "left"), (0.01, EV_UP, 0, 0, "left")]
+    events += [(0.1 + i * 0.01, EV_MOVE, i * 5, 0, None) for i in range(1, 41)]  # Straight drag right
+    events += [(0.6, EV_DOWN, 200, 0, "left"), (0.65, EV_UP, 200, 0, "left")]
+    steps = build_steps(events)
+    # The straight path needs no waypoints: the click moves there itself
+    assert [(s["click_type"], s["x"]) for s in steps] == [("Left", 0), ("Left", 200)]
+
+
+def test_build_steps_vetoes_clicks_on_the_app():
+    events = [(0.0, EV_DOWN, 5, 5, "left"), (0.05, EV_UP, 5, 5, "left"),
+              (1.0, EV_DOWN, 500, 500, "left"), (1.05, EV_UP, 500, 500, "left")]
+    steps = build_steps(events, ignore_click=lambda x, y: x < 100 and y < 100)
+    assert [(s["x"], s["y"]) for s in steps] == [(500, 500)]
+
+
+def test_ring_overwrites_the_oldest_events():
+    ring = EventRing(capacity=4)
+    for i in range(6):
+        ring.append(float(i), EV_MOVE, i, i)
+    assert len(ring) == 4 and ring.dropped == 2
+    assert [e[0] for e in ring.snapshot()] == [2.0, 3.0, 4.0, 5.0]
@@ -0,0 +1,99 @@
+"""Journaled profiles: replaying the journal over the base, and compacting it away."""
+import os
+import json
+
+from core.journal import JournaledProfile, apply_op, ensure_step_ids
+from core.settings import atomic_write_json, load_locations
+
+BASE = [
+    {"id": 1, "name": "Location 1", "x": 10, "y": 20},
+    {"id": 2, "name": "Location 2", "x": 30, "y": 40, "group": "Farming"},
+]
+
+
+def _profile(tmp_path, base=BASE, **kwargs):
+    path = str(tmp_path / "click_locations.json")
+    atomic_write_json([dict(loc) for loc in base], path)
+    profile = JournaledProfile(path, **kwargs)
+    profile.load()
+    return profile
+
+
+def test_replay_applies_every_op_kind(tmp_path):
+    profile = _profile(tmp_path)
+    for op in (
+        {"op": "add", "step": {"id": 3, "name": "Location 3", "x": 1, "y": 2}},
+        {"op": "add", "steps": [{"id": 4, "name": "Location 4"}, {"id": 5, "name": "Location 5"}]},
+        {"op": "update", "id": 1, "fields": {"name": "Renamed"}},
+        {"op": "delete", "ids": [2]},
+        {"op": "group", "ids": [3, 4], "group": "Macro 1"},
+    ):
+        profile.append(op)
+
+    locations = JournaledProfile(profile.path).load()
+    assert [loc["id"] for loc in locations] == [1, 3, 4, 5]
+    assert locations[0]["name"] == "Renamed"
+    assert [loc.get("group") for loc in locations] == [None, "Macro 1", "Macro 1", None]
+
+
+def test_replay_after_clear_starts_empty(tmp_path):
+    profile = _profile(tmp_path)
+    profile.append({"op": "clear"})
+    profile.append({"op": "add", "step": {"id": 9, "name": "Location 9"}})
+    assert JournaledProfile(profile.path).load() == [{"id": 9, "name": "Location 9"}]
+
+
+def test_add_is_an_upsert():
+    # Replaying ops the base already holds (a crash mid-compaction) converges to the same state
+    locations = [dict(loc) for loc in BASE]
+    op = {"op": "add", "step": {"id": 2, "name": "Location 2", "x": 99, "y": 40}}
+    locations = apply_op(locations, op)
+    locations = apply_op(locations, op)
+    assert len(locations) == 2
+    assert locations[1] == op["step"]
+
+
+def test_torn_final_entry_is_discarded(tmp_path):
+    profile = _profile(tmp_path)
+    profile.append({"op": "update", "id": 1, "fields": {"x": 5}})
+    with open(profile.journal_path, "a") as f:
+        f.write('{"op":"delete","ids":[1')  # Crash mid-append
+
+    reloaded = JournaledProfile(profile.path)
+    locations = reloaded.load()
+    assert locations[0]["x"] == 5
+    assert reloaded.seq == 1
+    with open(profile.journal_path) as f:
+        assert f.read().endswith("}\n")
+
+
+def test_compaction_folds_the_journal_into_the_base(tmp_path):
+    profile = _profile(tmp_path, compact_threshold=2)
+    profile.append({"op": "update", "id": 1, "fields": {"x": 7}})
+    assert not profile.needs_compaction
+    profile.append({"op": "delete", "ids": [2]})
+    assert profile.needs_compaction
+
+    profile.compact(JournaledProfile(profile.path).load())
+    assert profile.pending_ops == 0
+    assert not os.path.exists(profile.journal_path)
+    assert load_locations(profile.path) == [{"id": 1, "name": "Location 1", "x": 7, "y": 20}]
+
+
+def test_compaction_keeps_ops_after_the_snapshot(tmp_path):
+    profile = _profile(tmp_path)
+    profile.append({"op": "update", "id": 1, "fields": {"x": 7}})
+    snapshot, upto = JournaledProfile(profile.path).load(), profile.seq
+    profile.append({"op": "update", "id": 2, "fields": {"x": 8}})  # Lands while the snapshot is written
+
+    profile.compact(snapshot, upto)
+    assert profile.pending_ops == 1
+    with open(profile.journal_path) as f:
+        assert [json.loads(line)["id"] for line in f] == [2]
+    assert [loc["x"] for loc in JournaledProfile(profile.path).load()] == [7, 8]
+
+
+def test_ensure_step_ids_fills_gaps_after_the_highest_id():
+    locations = [{"id": 4}, {"name": "new"}, {"id": "x"}]
+    assert ensure_step_ids(locations) == (7, 2)
+    assert [loc["id"] for loc in locations] == [4, 5, 6]
@@ -0,0 +1,65 @@
+"""RunConfig/LiveConfig: immutable snapshots, and versions that only move on real changes."""
+import threading
+
+import pytest
+
+from core.runconfig import RunConfig, LiveConfig
+from core.engine import sequence_config, rapid_config, LIVE_SEQUENCE_OPTIONS
+from core.humanize import DEFAULT_PROFILE
+
+
+def test_run_config_is_an_immutable_mapping():
+    cfg = RunConfig({"interval": 1.0, "jitter": 0})
+    assert dict(cfg) == {"interval": 1.0, "jitter": 0} and cfg.version == 0
+    with pytest.raises(AttributeError):
+        cfg.version = 5
+    with pytest.raises(TypeError):
+        cfg["interval"] = 2.0
+
+    newer = cfg.replace(interval=0.5)
+    assert (newer["interval"], newer.version) == (0.5, 1)
+    assert cfg["interval"] == 1.0  # The old snapshot is untouched
+
+
+def test_publish_bumps_the_version_only_on_live_changes():
+    live = LiveConfig({"interval": 1.0, "timing": "interval"}, live_keys=("interval",))
+    first = live.current
+    assert live.publish(interval=1.0) == 0           # Same value
+    assert live.publish(timing="recorded") == 0      # Fixed at Start
+    assert live.current is first
+
+    assert live.publish(interval=0.5, timing="recorded") == 1
+    assert dict(live.current) == {"interval": 0.5, "timing": "interval"}
+    assert live.publish(interval=0.25) == 2 == live.version
+    assert first["interval"] == 1.0  # Runs holding the old snapshot still see it whole
+
+
+def test_concurrent_publishers_each_get_a_version():
+    live = LiveConfig({"interval": 0}, live_keys=("interval",))
+    barrier = threading.Barrier(4)
+    seen = []
+
+    def publisher(n):
+        barrier.wait()
+        seen.extend(live.publish(interval=n * 1000 + i + 1) for i in range(250))
+
+    threads = [threading.Thread(target=publisher, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(seen) == list(range(1, 1001)) # No two publishes shared or skipped a version
+    assert live.version == 1000
+
+
+def test_sequence_and_rapid_configs():
+    live = sequence_config({"interval": 2.0})
+    assert live.current["interval"] == 2.0 and live.live_keys == frozenset(LIVE_SEQUENCE_OPTIONS)
+    assert sequence_config(live) is live  # Passed through, so every run of a Start shares it
+    assert live.publish(speed=3.0) == 0   # Replay speed is fixed at Start
+
+    rapid = rapid_config(50)
+    assert rapid.current["cps"] == 50.0
+    assert rapid_config(rapid) is rapid
+    assert rapid.publish(cps=80, humanize="gaussian") == 1
+    assert (rapid.current["cps"], rapid.current["humanize"]) == (80, DEFAULT_PROFILE)
@@ -0,0 +1,60 @@
+"""Startup budget: `import app` stays fast and lazy, and the window paints in time."""
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from benchmarks.bench_startup import ROOT, IMPORT_BUDGET_MS, FIRST_PAINT_BUDGET_MS, bench_launch
+
+# Only loaded once input is injected or listened for (core.backends, core.recorder, utils.hotkeys)
+INPUT_LIBRARIES = ("pyautogui", "pydirectinput", "pynput")
+
+_PROBE = """
+import sys, time, json
+t = time.perf_counter()
+import app
+print(json.dumps({"import_ms": (time.perf_counter() - t) * 1000, "modules": sorted(sys.modules)}))
+"""
+
+
+def _import_app():
+    """`import app` in a fresh interpreter: (milliseconds, top-level modules loaded)."""
+    proc = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result["import_ms"], {m.split(".")[0] for m in result["modules"]}
+
+
+def _has_display():
+    import tkinter
+    try:
+        tkinter.Tk().destroy()
+        return True
+    except tkinter.TclError:
+        return False
+
+
+def test_import_app_within_budget():
+    # Best of three, so one slow interpreter start doesn't fail the run
+    best = min(_import_app()[0] for _ in range(3))
+    assert best <= IMPORT_BUDGET_MS, f"import app took {best:.1f} ms (budget {IMPORT_BUDGET_MS} ms)"
+
+
+def test_import_app_leaves_input_libraries_unloaded():
+    _, modules = _import_app()
+    assert not modules & set(INPUT_LIBRARIES)
+
+
+@pytest.mark.skipif(not _has_display(), reason="needs a display")
+def test_first_paint_within_budget():
+    profile = os.path.join(ROOT, "Data", "click_locations.json")
+    before = os.stat(profile).st_mtime_ns if os.path.exists(profile) else None
+
+    phases = bench_launch(1)
+    assert phases["first paint"] <= FIRST_PAINT_BUDGET_MS
+
+    # --quit-after-startup must leave the user's Grimoire alone
+    after = os.stat(profile).st_mtime_ns if os.path.exists(profile) else None
+    assert after == before
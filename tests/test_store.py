@@ -0,0 +1,98 @@
+"""LocationStore: the id, name and group indexes stay right through every kind of edit."""
+import random
+
+from core.store import LocationStore
+from core.program import compile_sequence
+
+
+def _steps():
+    return [
+        {"id": 1, "name": "Location 1", "x": 1, "y": 1, "group": "Farming"},
+        {"id": 2, "name": "Location 2", "x": 2, "y": 2},
+        {"id": 3, "name": "Location 3", "x": 3, "y": 3, "group": "Farming"},
+        {"id": 4, "name": "Location 1", "x": 4, "y": 4, "group": "Boss"},  # Names can repeat
+    ]
+
+
+def _check_indexes(store):
+    """Every index agrees with a plain scan of the steps."""
+    steps = list(store)
+    for group in {s.get("group", "") for s in steps} | {"Missing"}:
+        assert store.in_group(group) == [s for s in steps if s.get("group", "") == group]
+        assert store.group_size(group) == len(store.in_group(group))
+    assert sorted(store.group_names()) == sorted({s["group"] for s in steps if s.get("group")})
+    for name in {s.get("name") for s in steps}:
+        assert store.ids_for_names([name]) == [s["id"] for s in steps if s.get("name") == name]
+        assert store.find_by_name(name)["name"] == name
+
+
+def test_lookups():
+    store = LocationStore(_steps())
+    assert len(store) == 4 and 3 in store and 9 not in store
+    assert store.get(2)["x"] == 2
+    assert store.find_by_name("Location 1")["id"] == 1
+    assert store.find_by_name("Nope") is None
+    assert store.ids_for_names(["Location 3", "Location 1", "Nope"]) == [1, 3, 4]
+    assert [s["id"] for s in store.in_group("Farming")] == [1, 3]
+    assert [s["id"] for s in store.in_group("")] == [2]
+    assert [s["id"] for s in store.in_group("All Groups")] == [1, 2, 3, 4]
+    _check_indexes(store)
+
+
+def test_edits_reindex():
+    store = LocationStore(_steps())
+    store.update(2, {"name": "Renamed", "group": "Boss"})
+    assert store.find_by_name("Location 2") is None
+    assert [s["id"] for s in store.in_group("Boss")] == [2, 4] # Grimoire order, not move order
+    assert store.set_group([1, 3], "Boss") == {"Farming"}
+    assert "Farming" not in store.group_names()  # Emptied groups are dropped
+    assert [s["id"] for s in store.remove([4, 99])] == [4]
+    _check_indexes(store)
+
+
+def test_re_adding_an_id_replaces_it_in_place():
+    store = LocationStore(_steps())
+    store.add({"id": 1, "name": "New", "x": 0, "y": 0})
+    assert [s["id"] for s in store] == [1, 2, 3, 4]
+    assert store.get(1)["name"] == "New"
+    assert [s["id"] for s in store.in_group("Farming")] == [3]
+    _check_indexes(store)
+
+
+def test_extend_and_clear():
+    store = LocationStore()
+    store.extend(_steps())
+    assert len(store) == 4
+    _check_indexes(store)
+    store.clear()
+    assert not store and store.group_names() == [] and store.in_group("Farming") == []
+
+
+def test_compile_program_matches_a_filtered_scan():
+    store = LocationStore(_steps())
+    for group in ("All Groups", "Farming", "Boss", ""):
+        program = store.compile_program(group)
+        assert program.steps == compile_sequence(list(store), group).steps
+
+
+def test_random_edits_keep_indexes_consistent():
+    rng = random.Random(1234)
+    store = LocationStore()
+    next_id = 1
+    for n in range(2000):
+        op = rng.random()
+        ids = [s["id"] for s in store]
+        if op < 0.4 or not ids:
+            store.add({"id": next_id, "name": f"Location {rng.randrange(20)}", "group": rng.choice(["", "A", "B"])})
+            next_id += 1
+        elif op < 0.6:
+            store.update(rng.choice(ids), {"name": f"Location {rng.randrange(20)}"})
+        elif op < 0.8:
+            store.set_group(rng.sample(ids, min(3, len(ids))), rng.choice(["", "A", "B", "C"]))
+        else:
+            store.remove(rng.sample(ids, min(2, len(ids))))
+        if store and rng.random() < 0.05:
+            store.in_group(rng.choice(["A", "B", "C", ""]))  # Warm the sorted cache mid-stream
+        if n % 100 == 0:
+            _check_indexes(store)
+    _check_indexes(store)
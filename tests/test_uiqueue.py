@@ -0,0 +1,93 @@
+"""UIQueue: keyed posts coalesce, plain ones don't, and the queue stays bounded."""
+import threading
+
+from core.uiqueue import UIQueue
+
+
+def test_keyed_posts_coalesce_to_the_newest():
+    q, seen = UIQueue(), []
+    for i in range(5):
+        assert q.post(seen.append, i, key="status")
+    assert q.stats()["pending"] == 1
+    assert q.drain() == 1
+    assert seen == [4]
+    assert (q.posted, q.coalesced, q.handled) == (1, 4, 1)
+
+
+def test_coalesced_post_keeps_its_place_in_line():
+    q, seen = UIQueue(), []
+    q.post(seen.append, "status 1", key="status")
+    q.post(seen.append, "click")
+    q.post(seen.append, "status 2", key="status")
+    q.drain()
+    assert seen == ["status 2", "click"]
+
+
+def test_plain_posts_and_distinct_keys_all_run():
+    q, seen = UIQueue(), []
+    q.post(seen.append, "a")
+    q.post(seen.append, "a")
+    q.post(seen.append, "x", key=1)
+    q.post(seen.append, "y", key=2)
+    q.drain()
+    assert seen == ["a", "a", "x", "y"]
+    assert q.coalesced == 0
+
+
+def test_post_after_drain_queues_afresh():
+    q, seen = UIQueue(), []
+    q.post(seen.append, 1, key="k")
+    q.drain()
+    q.post(seen.append, 2, key="k")  # The old entry is gone, so this one must not vanish into it
+    assert q.drain() == 1
+    assert seen == [1, 2]
+
+
+def test_full_queue_drops_new_posts_but_still_coalesces():
+    q, seen = UIQueue(capacity=2), []
+    assert q.post(seen.append, "a", key="k")
+    assert q.post(seen.append, "b")
+    assert not q.post(seen.append, "c")
+    assert not q.post(seen.append, "d", key="other")
+    assert q.post(seen.append, "e", key="k")  # Updates the queued entry, takes no new slot
+    q.drain()
+    assert seen == ["e", "b"]
+    assert q.dropped == 2
+
+
+def test_drain_is_batched():
+    q, seen = UIQueue(max_batch=3), []
+    for i in range(7):
+        q.post(seen.append, i)
+    assert [q.drain(), q.drain(), q.drain(), q.drain()] == [3, 3, 1, 0]
+    assert seen == list(range(7))
+
+
+def test_failing_callback_doesnt_stop_the_batch():
+    q, seen = UIQueue(), []
+    q.post(lambda: 1 / 0)
+    q.post(seen.append, "after")
+    assert q.drain() == 2
+    assert seen == ["after"]
+
+
+def test_concurrent_keyed_posts_run_the_latest_once():
+    q, seen = UIQueue(capacity=100000), []
+    barrier = threading.Barrier(4)
+
+    def producer(n):
+        barrier.wait()
+        for i in range(2000):
+            q.post(seen.append, (n, i), key=n)
+
+    threads = [threading.Thread(target=producer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads): # Drain alongside the producers, like the Tk thread
+        q.drain()
+    while q.drain():
+        pass
+    # Whatever interleaving the drain saw, each key's final post is the last one it ran
+    for n in range(4):
+        assert [s for s in seen if s[0] == n][-1] == (n, 1999)
+    assert q.posted + q.coalesced == 8000
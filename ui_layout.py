@@ -2,6 +2,11 @@ import tkinter as tk
 from tkinter import ttk, simpledialog
 import tkinter.font as tkfont
 
+# Step lists longer than this switch the Treeview to virtual mode, where only
+# the rows in view exist as Tk items and the scrollbar pages through the rest
+VIRTUAL_THRESHOLD = 2000
+TREE_ROW_HEIGHT = 28
+
 class AutoClickerUI:
     def __init__(self, root, state, callbacks):
         self.root = root
@@ -68,7 +73,7 @@ class AutoClickerUI:
         style.configure("Danger.TButton", background=DANGER_BG, bordercolor="#7a2e2e", foreground="#ff9090")
         style.map("Danger.TButton", background=[('active', "#7a2e2e")], foreground=[('active', "white")])
 
-        style.configure("Treeview", background=self.BG_SLATE, fieldbackground=self.BG_SLATE, foreground=TEXT_GOLD, rowheight=28, borderwidth=1, bordercolor=BORDER_GOLD, font=base_font)
+        style.configure("Treeview", background=self.BG_SLATE, fieldbackground=self.BG_SLATE, foreground=TEXT_GOLD, rowheight=TREE_ROW_HEIGHT, borderwidth=1, bordercolor=BORDER_GOLD, font=base_font)
         style.configure("Treeview.Heading", background="#0f0c0b", foreground=TEXT_BRONZE, relief="flat", font=header_font, padding=(10, 8))
         style.map("Treeview", background=[('selected', "#3e2e28")], foreground=[('selected', TEXT_EMBER)])
         style.configure("Vertical.TScrollbar", troughcolor=BG_VOID, background=BTN_BG, borderwidth=0, arrowcolor=TEXT_GOLD)
@@ -114,6 +119,7 @@ class AutoClickerUI:
         self.record_button.pack(side=tk.LEFT, padx=(0, 10))
         
         ttk.Button(actions, text="+ Key", width=8, command=self._prompt_add_key).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Checkbutton(actions, text="Macro", variable=self.state.get("continuous_record")).pack(side=tk.LEFT, padx=(0, 10))
         
         ttk.Label(actions, text="Guild:").pack(side=tk.LEFT, padx=(20, 5))
         self.group_dropdown = ttk.Combobox(actions, textvariable=self.state.get("group_filter"), state="readonly", width=15)
@@ -139,11 +145,21 @@ class AutoClickerUI:
         self.location_tree.column("Coords", width=80, anchor="center")
         self.location_tree.column("Action", width=120)
         
-        sb = ttk.Scrollbar(border, orient="vertical", command=self.location_tree.yview)
-        self.location_tree.configure(yscrollcommand=sb.set)
+        self.location_sb = sb = ttk.Scrollbar(border, orient="vertical", command=self._on_list_scroll)
+        self.location_tree.configure(yscrollcommand=self._on_tree_yview)
         self.location_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         sb.pack(side=tk.RIGHT, fill=tk.Y)
 
+        # Rows are keyed by step id; refreshes apply diffs against what's on screen
+        self._rows = {}         # iid -> values currently in the tree
+        self._shown = []        # iids in tree order
+        self._view = []         # (iid, values) for the whole filtered list
+        self._top = 0           # Virtual mode: index of the first materialized row
+        self._virtual = False
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.location_tree.bind(seq, self._on_list_wheel)
+        self.location_tree.bind("<Configure>", lambda e: self._virtual and self._render_rows())
+
         tools = ttk.Frame(container)
         tools.pack(fill=tk.X, pady=(15, 0))
         ttk.Button(tools, text="Modify", command=self._trigger_edit).pack(side=tk.LEFT, padx=(0, 10))
@@ -167,7 +183,7 @@ class AutoClickerUI:
         cps_frame = ttk.Frame(mode_frame)
         cps_frame.pack(fill=tk.X, pady=(5,0), padx=(20, 0))
         ttk.Label(cps_frame, text="Clicks/Second:").pack(side=tk.LEFT)
-        ttk.Spinbox(cps_frame, from_=0.1, to=100.0, increment=1.0, textvariable=self.state.get("cps"), width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(cps_frame, from_=0.1, to=1000.0, increment=1.0, textvariable=self.state.get("cps"), width=8).pack(side=tk.LEFT, padx=5)
 
         beh_frame = ttk.LabelFrame(left_col, text="SEQUENCE RULES", padding=15)
         beh_frame.pack(fill=tk.X, pady=(0, 15))
@@ -176,16 +192,26 @@ class AutoClickerUI:
         ttk.Label(beh_frame, text="Repetitions").grid(row=1, column=0, sticky="w", pady=5)
         ttk.Spinbox(beh_frame, from_=1, to=9999, textvariable=self.state.get("repetitions"), width=8).grid(row=1, column=1, sticky="e")
         ttk.Checkbutton(beh_frame, text="Eternal Chant (Infinite)", variable=self.state.get("infinite")).grid(row=2, column=0, columnspan=2, sticky="w", pady=5)
+        ttk.Checkbutton(beh_frame, text="Guilds Chant in Parallel", variable=self.state.get("parallel_groups")).grid(row=3, column=0, columnspan=2, sticky="w", pady=5)
+        ttk.Label(beh_frame, text="Mouse Path").grid(row=4, column=0, sticky="w", pady=5)
+        ttk.Combobox(beh_frame, textvariable=self.state.get("move_curve"), values=["linear", "ease", "bezier", "humanized"], state="readonly", width=10).grid(row=4, column=1, sticky="e")
+        ttk.Checkbutton(beh_frame, text="Replay Recorded Timing", variable=self.state.get("replay_timing")).grid(row=5, column=0, columnspan=2, sticky="w", pady=5)
+        ttk.Label(beh_frame, text="Replay Speed (x)").grid(row=6, column=0, sticky="w", pady=5)
+        ttk.Spinbox(beh_frame, from_=0.25, to=20.0, increment=0.25, textvariable=self.state.get("replay_speed"), width=8).grid(row=6, column=1, sticky="e")
+        ttk.Checkbutton(beh_frame, text="Compress Idle Over (s)", variable=self.state.get("compress_idle")).grid(row=7, column=0, sticky="w", pady=5)
+        ttk.Spinbox(beh_frame, from_=0.1, to=60.0, increment=0.5, textvariable=self.state.get("max_idle_gap"), width=8).grid(row=7, column=1, sticky="e")
 
         # --- Right Col: Hotkeys & Anti-Cheat ---
         key_frame = ttk.LabelFrame(right_col, text="RUNIC BINDINGS", padding=15)
         key_frame.pack(fill=tk.X, pady=(0, 15))
         
-        hotkeys = self.state.get("hotkeys", {"start": "F7", "stop": "F8", "record": "F6"})
+        hotkeys = self.state.get("hotkeys", {"start": "F7", "stop": "F8", "record": "F6", "pause": "F9"})
         self.btn_bind_start = ttk.Button(key_frame, text=f"Start: {hotkeys.get('start')}", command=lambda: self._trigger_rebind('start'))
         self.btn_bind_start.pack(fill=tk.X, pady=2)
         self.btn_bind_stop = ttk.Button(key_frame, text=f"Stop: {hotkeys.get('stop')}", command=lambda: self._trigger_rebind('stop'))
         self.btn_bind_stop.pack(fill=tk.X, pady=2)
+        self.btn_bind_pause = ttk.Button(key_frame, text=f"Pause: {hotkeys.get('pause')}", command=lambda: self._trigger_rebind('pause'))
+        self.btn_bind_pause.pack(fill=tk.X, pady=2)
         self.btn_bind_rec = ttk.Button(key_frame, text=f"Record: {hotkeys.get('record')}", command=lambda: self._trigger_rebind('record'))
         self.btn_bind_rec.pack(fill=tk.X, pady=2)
 
@@ -200,6 +226,9 @@ class AutoClickerUI:
         self.start_button = ttk.Button(footer, text="⚔ BEGIN RITUAL", style="Success.TButton", command=self.callbacks.get("start_clicking"))
         self.start_button.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 15), ipady=5)
         
+        self.pause_button = ttk.Button(footer, text="❚❚ PAUSE", command=self.callbacks.get("toggle_pause"), state="disabled")
+        self.pause_button.pack(side=tk.LEFT, fill=tk.X, expand=True, ipady=5)
+        
         self.stop_button = ttk.Button(footer, text="✖ CEASE", style="Danger.TButton", command=self.callbacks.get("stop_clicking"), state="disabled")
         self.stop_button.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(15, 0), ipady=5)
 
@@ -208,11 +237,19 @@ class AutoClickerUI:
     def update_playback_buttons(self, clicking: bool):
         if clicking:
             self.start_button.configure(state="disabled")
+            self.pause_button.configure(state="normal")
             self.stop_button.configure(state="normal")
         else:
             self.start_button.configure(state="normal")
+            self.pause_button.configure(state="disabled")
             self.stop_button.configure(state="disabled")
 
+    def update_pause_button(self, paused: bool):
+        if paused:
+            self.pause_button.configure(text="▶ RESUME")
+        else:
+            self.pause_button.configure(text="❚❚ PAUSE")
+
     def update_record_button(self, recording: bool):
         if recording:
             self.record_button.configure(text="■ Stop Rec")
@@ -220,30 +257,114 @@ class AutoClickerUI:
             self.record_button.configure(text="◎ Record")
 
     def refresh_location_list(self):
-        for item in self.location_tree.get_children():
-            self.location_tree.delete(item)
-            
+        """Brings the list in line with the Grimoire, touching only rows that changed."""
         current_grp = self.state.get("group_filter").get()
-        for loc in self.state.get("saved_locations", []):
-            if current_grp != "All Groups" and loc.get("group") != current_grp: continue
-            
-            name = loc.get("name")
-            atype = loc.get("action_type", "click")
-            
-            if atype == "click":
-                coords = f"{loc.get('x',0)}, {loc.get('y',0)}"
-                detail = loc.get("click_type", "Left")
+        store = self.state.get("saved_locations")
+        steps = store.in_group(current_grp) if store is not None else []
+        view = [(str(loc["id"]), self._row_values(loc)) for loc in steps]
+        self._view = view
+
+        was_virtual = self._virtual
+        self._virtual = len(view) > VIRTUAL_THRESHOLD
+        if self._virtual != was_virtual:
+            self._top = 0
+        self._render_rows()
+
+    def _row_values(self, loc):
+        atype = loc.get("action_type", "click")
+        if atype == "click":
+            coords = f"{loc.get('x',0)}, {loc.get('y',0)}"
+            detail = loc.get("click_type", "Left")
+        elif atype == "scroll":
+            coords = f"{loc.get('x',0)}, {loc.get('y',0)}"
+            try:
+                detail = f"Scroll: {float(loc.get('amount', 0)):+g}" # Hand-edited profiles may hold floats or strings
+            except (TypeError, ValueError):
+                detail = "Scroll: ?"
+        else:
+            coords = "-, -"
+            detail = f"Key: {loc.get('key','?')}"
+        return (loc.get("name"), loc.get("group"), coords, detail)
+
+    def _visible_rows(self):
+        return max(10, self.location_tree.winfo_height() // TREE_ROW_HEIGHT + 1)
+
+    def _render_rows(self):
+        """Shows all of _view, or in virtual mode just the window starting at _top."""
+        rows = self._view
+        if self._virtual:
+            size = self._visible_rows()
+            self._top = max(0, min(self._top, len(rows) - size))
+            rows = rows[self._top:self._top + size]
+        self._apply_rows(rows)
+        if self._virtual:
+            n = len(self._view) or 1
+            self.location_sb.set(self._top / n, min(1.0, (self._top + len(rows)) / n))
+
+    def _apply_rows(self, rows):
+        """Diffs `rows` against the tree: one batched delete, then in-place updates, moves and inserts."""
+        tree = self._rows
+        wanted = {iid for iid, _ in rows}
+        gone = [iid for iid in self._shown if iid not in wanted]
+        if gone:
+            self.location_tree.delete(*gone)
+            for iid in gone:
+                del tree[iid]
+
+        current = [iid for iid in self._shown if iid in wanted]
+        j = 0
+        placed = set()
+        for index, (iid, values) in enumerate(rows):
+            while j < len(current) and current[j] in placed:
+                j += 1 # Already moved up to an earlier position
+            if iid in tree:
+                if tree[iid] != values:
+                    self.location_tree.item(iid, values=values)
+                    tree[iid] = values
+                if j < len(current) and current[j] == iid:
+                    j += 1
+                else:
+                    self.location_tree.move(iid, "", index)
             else:
-                coords = "-, -"
-                detail = f"Key: {loc.get('key','?')}"
-            
-            self.location_tree.insert("", tk.END, values=(name, loc.get("group"), coords, detail))
+                self.location_tree.insert("", index, iid=iid, values=values)
+                tree[iid] = values
+            placed.add(iid)
+        self._shown = [iid for iid, _ in rows]
+
+    # --- Virtual scrolling ---
+
+    def _on_tree_yview(self, first, last):
+        # In virtual mode the scrollbar tracks the window over _view, not the tree itself
+        if not self._virtual:
+            self.location_sb.set(first, last)
+
+    def _on_list_scroll(self, *args):
+        if not self._virtual:
+            return self.location_tree.yview(*args)
+        size = self._visible_rows()
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * len(self._view))
+        elif args[0] == "scroll":
+            step = size - 1 if args[2] == "pages" else 1
+            self._top += int(args[1]) * step
+        self._render_rows()
+
+    def _on_list_wheel(self, event):
+        if not self._virtual:
+            return None # Native scrolling
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._top -= 3
+        else:
+            self._top += 3
+        self._render_rows()
+        return "break"
 
     def refresh_hotkey_buttons(self):
         """Called by the background listener when a new key is successfully bound."""
         hotkeys = self.state.get("hotkeys", {})
         self.btn_bind_start.configure(text=f"Start: {hotkeys.get('start', 'F7')}")
         self.btn_bind_stop.configure(text=f"Stop: {hotkeys.get('stop', 'F8')}")
+        self.btn_bind_pause.configure(text=f"Pause: {hotkeys.get('pause', 'F9')}")
         self.btn_bind_rec.configure(text=f"Record: {hotkeys.get('record', 'F6')}")
 
     # --- Internal UI Events (Passing Data Back to App) ---
@@ -255,6 +376,7 @@ class AutoClickerUI:
         
         if action == 'start': self.btn_bind_start.configure(text="Start: [Press Key...]")
         elif action == 'stop': self.btn_bind_stop.configure(text="Stop: [Press Key...]")
+        elif action == 'pause': self.btn_bind_pause.configure(text="Pause: [Press Key...]")
         elif action == 'record': self.btn_bind_rec.configure(text="Record: [Press Key...]")
 
     def _prompt_add_key(self):
@@ -262,20 +384,21 @@ class AutoClickerUI:
         if key and self.callbacks.get("add_keystroke"):
             self.callbacks["add_keystroke"](key)
 
+    def _selected_ids(self):
+        # Rows are keyed by step id, so duplicate names still resolve to the right steps
+        return [int(iid) for iid in self.location_tree.selection()]
+
     def _trigger_delete(self):
-        sel = self.location_tree.selection()
-        if not sel: return
-        names = [self.location_tree.item(i, "values")[0] for i in sel]
+        step_ids = self._selected_ids()
+        if not step_ids: return
         if self.callbacks.get("delete_location"):
-            self.callbacks["delete_location"](names)
+            self.callbacks["delete_location"](step_ids)
 
     def _trigger_edit(self):
-        sel = self.location_tree.selection()
-        if not sel: return
-        item_id = sel[0]
-        name = self.location_tree.item(item_id, "values")[0]
+        step_ids = self._selected_ids()
+        if not step_ids: return
         if self.callbacks.get("edit_location"):
-            self.callbacks["edit_location"](item_id, name)
+            self.callbacks["edit_location"](step_ids[0])
 
     # --- Popups ---
 
@@ -298,20 +421,21 @@ class AutoClickerUI:
         ctype_var = tk.StringVar()
         key_var = tk.StringVar()
         
-        if target_data.get("action_type", "click") == "click":
+        atype = target_data.get("action_type", "click")
+        if atype == "click":
             lbl("CLICK TYPE")
             ctype_var.set(target_data.get("click_type", "Left"))
-            ttk.Combobox(pad, textvariable=ctype_var, values=["Left", "Right", "Double", "Hold"], state="readonly").pack(fill=tk.X)
-        else:
+            ttk.Combobox(pad, textvariable=ctype_var, values=["Left", "Right", "Double", "Hold", "Move"], state="readonly").pack(fill=tk.X)
+        elif atype == "keystroke":
             lbl("KEY TO PRESS")
             key_var.set(target_data.get("key", ""))
             ttk.Entry(pad, textvariable=key_var).pack(fill=tk.X)
 
         def save():
             updated = {"name": name_var.get()}
-            if target_data.get("action_type") == "click":
+            if atype == "click":
                 updated["click_type"] = ctype_var.get()
-            else:
+            elif atype == "keystroke":
                 updated["key"] = key_var.get()
                 
             on_save_callback(updated)
@@ -336,12 +460,10 @@ class AutoClickerUI:
 
     def _prompt_assign_group(self):
         """Pops a clean dialog to ask which group to assign the highlighted items to."""
-        sel = self.location_tree.selection()
-        if not sel: 
+        step_ids = self._selected_ids()
+        if not step_ids: 
             tk.messagebox.showinfo("Guild Assignment", "Please select at least one scroll from the list first.")
             return
-            
-        names = [self.location_tree.item(i, "values")[0] for i in sel]
 
         # Grab groups from the dropdown, excluding the default "All Groups"
         available_groups = [g for g in self.group_dropdown['values'] if g != "All Groups"]
@@ -370,8 +492,8 @@ class AutoClickerUI:
         def on_confirm():
             target_group = group_var.get()
             if target_group and self.callbacks.get("assign_to_group"):
-                self.callbacks["assign_to_group"](names, target_group)
-                self.state.get("status_msg").set(f"Assigned {len(names)} scrolls to {target_group}")
+                self.callbacks["assign_to_group"](step_ids, target_group)
+                self.state.get("status_msg").set(f"Assigned {len(step_ids)} scrolls to {target_group}")
             dialog.destroy()
             
         ttk.Button(pad, text="Scribe to Guild", command=on_confirm).pack(fill=tk.X)
\ No newline at end of file
@@ -1,59 +1,172 @@
-try:
-    from pynput import keyboard
-    HAS_PYNPUT = True
-except ImportError:
-    HAS_PYNPUT = False
+import time
+import threading
+import importlib.util
+from collections import deque
+
+# pynput is imported when the listener starts (after the window is up), not at import
+HAS_PYNPUT = importlib.util.find_spec("pynput") is not None
+if not HAS_PYNPUT:
     print("Mouse/Keyboard modules missing. Run: pip install pynput")
 
+DEFAULT_HOTKEYS = {"start": "F7", "stop": "F8", "record": "F6", "pause": "F9"}
+
+# Hotkeys are chords like "F8" or "CTRL+SHIFT+S"; modifiers are always written in this order
+MODIFIERS = ("CTRL", "ALT", "SHIFT", "CMD")
+_MODIFIER_KEYS = {
+    "ctrl": "CTRL", "ctrl_l": "CTRL", "ctrl_r": "CTRL",
+    "alt": "ALT", "alt_l": "ALT", "alt_r": "ALT", "alt_gr": "ALT",
+    "shift": "SHIFT", "shift_l": "SHIFT", "shift_r": "SHIFT",
+    "cmd": "CMD", "cmd_l": "CMD", "cmd_r": "CMD",
+}
+
+HALT_TIMEOUT = 2.0          # How long the latency probe waits for runs to exit (s)
+HALT_SAMPLES = 100
+
+# Hotkey press -> last run stopped injecting, in seconds
+_halt_latency = deque(maxlen=HALT_SAMPLES)
+
+
+def chord(modifiers, key):
+    """Canonical chord string, e.g. chord({"SHIFT", "CTRL"}, "S") -> "CTRL+SHIFT+S"."""
+    return "+".join([m for m in MODIFIERS if m in modifiers] + [key])
+
+
+def parse_chord(text):
+    """Normalizes a user-written chord ("shift+ctrl+s" -> "CTRL+SHIFT+S")."""
+    parts = [p.strip().upper() for p in text.split("+") if p.strip()]
+    return chord(set(parts[:-1]), parts[-1]) if parts else ""
+
+
+def _key_str(key, modifiers):
+    """Hotkey name for a pynput key, or None for keys we can't name."""
+    char = getattr(key, "char", None)
+    if char is not None:
+        vk = getattr(key, "vk", None)
+        # With modifiers held, char is a control code or shifted symbol; the
+        # virtual key code is what the user actually pressed for letters/digits
+        if modifiers and vk is not None and (0x30 <= vk <= 0x39 or 0x41 <= vk <= 0x5A):
+            return chr(vk)
+        return char.upper() if char.isprintable() else None
+    name = getattr(key, "name", None)
+    if name is not None:
+        return name.upper()
+    return str(key).replace("Key.", "").upper() or None
+
+
+def compile_bindings(hotkeys, actions):
+    """chord -> callable dispatch table from {action: chord} and {action: callable}."""
+    return {parse_chord(combo): actions[action] for action, combo in hotkeys.items()
+            if combo and action in actions}
+
+
+def halt_stats():
+    """Hotkey-to-halt latency of the Stop hotkey so far."""
+    samples = sorted(_halt_latency)
+    n = len(samples)
+    return {
+        "count": n,
+        "mean_ms": sum(samples) / n * 1000 if n else 0.0,
+        "p99_ms": samples[min(n - 1, int(n * 0.99))] * 1000 if n else 0.0,
+        "max_ms": samples[-1] * 1000 if n else 0.0,
+    }
+
+
+def _report_halt(app, runs, pressed_at):
+    """Waits for the stopped runs to exit, records the latency and lets the UI catch up."""
+    for run in runs:
+        run.join(HALT_TIMEOUT)
+    ended = [run.ended_at for run in runs if run.ended_at is not None]
+    halt_ms = None
+    if ended:
+        latency = max(ended) - pressed_at
+        _halt_latency.append(latency)
+        halt_ms = latency * 1000
+    app.ui_queue.post(app.on_hotkey_stop, halt_ms, key="stop")
+
+
 def setup_hotkeys(app):
-    if not HAS_PYNPUT: 
+    if not HAS_PYNPUT:
         return
-        
+    from pynput import keyboard
+    from core.clicker import stop_clicking
+
     # 1. Initialize hotkey state if it doesn't exist yet
     if "hotkeys" not in app.state:
-        app.state["hotkeys"] = {"start": "F7", "stop": "F8", "record": "F6"}
+        app.state["hotkeys"] = dict(DEFAULT_HOTKEYS)
     if "is_rebinding" not in app.state:
         app.state["is_rebinding"] = None
 
+    def direct_stop():
+        # Halts the engines right here on the listener thread, so a busy or blocked
+        # Tk thread can't delay it; the UI is reconciled once the runs have exited
+        pressed_at = time.perf_counter()
+        runs = stop_clicking()
+        threading.Thread(target=_report_halt, args=(app, runs, pressed_at),
+                         name="hotkey-halt", daemon=True).start()
+
+    # Keyed posts coalesce key repeat while the UI hasn't handled the first press yet
+    actions = {
+        "stop": direct_stop,
+        "record": lambda: app.ui_queue.post(app.toggle_recording, key="record"),
+        "start": lambda: app.ui_queue.post(app.start_clicking, key="start"),
+        "pause": lambda: app.ui_queue.post(app.toggle_pause, key="pause"),
+    }
+    held = set()                        # Modifiers currently down
+    compiled = {"source": None, "table": {}, "stop": None}
+
+    def bindings():
+        """The dispatch table, rebuilt only when the bindings change."""
+        hotkeys = app.state["hotkeys"]
+        if hotkeys != compiled["source"]:
+            compiled["source"] = dict(hotkeys)
+            compiled["table"] = compile_bindings(hotkeys, actions)
+            stop = parse_chord(hotkeys.get("stop", ""))
+            compiled["stop"] = stop.rsplit("+", 1)[-1] if stop else None
+        return compiled
+
     def on_press(key):
         try:
-            # 2. Securely convert key to string format
-            if hasattr(key, 'char') and key.char is not None:
-                k_str = key.char.upper()
-            elif hasattr(key, 'name') and key.name is not None:
-                k_str = key.name.upper()
-            else:
-                k_str = str(key).replace("Key.", "").upper()
+            modifier = _MODIFIER_KEYS.get(getattr(key, "name", None))
+            if modifier:
+                held.add(modifier)
+                return
+            k_str = _key_str(key, held)
+            if k_str is None:
+                return
+            combo = chord(held, k_str)
 
             # --- REBINDING MODE ---
             current_rebind = app.state.get("is_rebinding")
             if current_rebind:
                 # Update the state dictionary
-                app.state["hotkeys"][current_rebind] = k_str
+                app.state["hotkeys"][current_rebind] = combo
                 app.state["is_rebinding"] = None
-                
+
                 # Safely update the status bar from the main thread
-                app.root.after(0, lambda: app.state["status_msg"].set(f"Bound {current_rebind.upper()} to {k_str}"))
-                
-                # Tell the UI to refresh the button labels (we'll add this method to UI next)
+                app.ui_queue.post(app.state["status_msg"].set, f"Bound {current_rebind.upper()} to {combo}", key="status")
+
+                # Tell the UI to refresh the button labels
                 if hasattr(app.ui, 'refresh_hotkey_buttons'):
-                    app.root.after(0, app.ui.refresh_hotkey_buttons)
+                    app.ui_queue.post(app.ui.refresh_hotkey_buttons, key="hotkey_buttons")
                 return
 
             # --- NORMAL MODE ---
-            # Check against saved hotkeys in state
-            hotkeys = app.state["hotkeys"]
-            if k_str == hotkeys.get('record'):
-                app.root.after(0, app.toggle_recording)
-            elif k_str == hotkeys.get('start'):
-                app.root.after(0, app.start_clicking)
-            elif k_str == hotkeys.get('stop'):
-                app.root.after(0, app.stop_clicking)
-                
+            table = bindings()
+            action = table["table"].get(combo)
+            if action is None and held and k_str == table["stop"]:
+                action = direct_stop # Stop still works with stray modifiers held
+            if action is not None:
+                action()
+
         except Exception as e:
             print(f"Key listener error: {e}")
-            
-    # 3. Start the background listener
-    app.listener = keyboard.Listener(on_press=on_press)
+
+    def on_release(key):
+        modifier = _MODIFIER_KEYS.get(getattr(key, "name", None))
+        if modifier:
+            held.discard(modifier)
+
+    # 2. Start the background listener
+    app.listener = keyboard.Listener(on_press=on_press, on_release=on_release)
     app.listener.daemon = True
-    app.listener.start()
\ No newline at end of file
+    app.listener.start()